@@ -1,19 +1,17 @@
-import RPi.GPIO as GPIO
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness.gpio import open_gpio, play
 
 BUZZER_PIN = 17
-GPIO.setwarnings(False)
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(BUZZER_PIN, GPIO.OUT)
+# RPi.GPIO on the Pi, DROWSINESS_GPIO=fake to run off-device
+gpio = open_gpio()
+gpio.setup(BUZZER_PIN)
 
+# Blocking helpers; the detection loop uses drowsiness.alerts.DriverAlerts instead
 def buzz_drowsy(duration=1.5):
-    GPIO.output(BUZZER_PIN, GPIO.HIGH)
-    time.sleep(duration)
-    GPIO.output(BUZZER_PIN, GPIO.LOW)
+    play(gpio, BUZZER_PIN, ((True, duration),))
 
 def buzz_alert(beeps=6, interval=0.3, duration=0.2):
-    for _ in range(beeps):
-        GPIO.output(BUZZER_PIN, GPIO.HIGH)
-        time.sleep(duration)
-        GPIO.output(BUZZER_PIN, GPIO.LOW)
-        time.sleep(interval)
+    play(gpio, BUZZER_PIN, ((True, duration), (False, interval)) * beeps)
@@ -1,99 +1,130 @@
+import os
+import sys
 import cv2
 import mediapipe as mp
-import numpy as np
 import time
-from buzzer import buzz_drowsy, buzz_alert
-import requests
+from buzzer import BUZZER_PIN, gpio
 from datetime import datetime
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness.alert_client import AlertClient
+from drowsiness.alerts import DriverAlerts
+from drowsiness.fatigue import DROWSY, FatigueMonitor
+from drowsiness.fusion import IMPACT, FusionEngine
+from drowsiness.gating import HandGate
+from drowsiness.gestures import is_peace_sign
+from drowsiness.landmarks import face_features, landmarks_to_array
+from drowsiness.pipeline import Pipeline
+from drowsiness.recorder import EventRecorder
+
 mp_hands = mp.solutions.hands
 mp_face_mesh = mp.solutions.face_mesh
 
 hands = mp_hands.Hands(min_detection_confidence=0.7)
+# Hands only runs on motion / skin change in the hand regions, after a hit, or every few frames
+hand_gate = HandGate(idle_interval=6)
 face_mesh = mp_face_mesh.FaceMesh(min_detection_confidence=0.5)
 
-LEFT_EYE = [33, 160, 158, 133, 153, 144]
-RIGHT_EYE = [362, 385, 387, 263, 373, 380]
 EAR_THRESHOLD = 0.25
 YAWN_THRESHOLD = 25
 DROWSY_DURATION = 2
 NO_FACE_TIMEOUT = 2
 FIST_ALERT_COOLDOWN = 10
-
-def send_emergency_alert():
-    url = "https://dd-api-production.up.railway.app/sendAlerts?deviceKey=key-001"
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            buzz_alert()
-            print("[Alert] Sent successfully.")
-        else:
-            print("[Alert] Failed:", response.status_code)
-    except Exception as e:
-        print("[Alert] Exception:", e)
-
-def eye_aspect_ratio(eye):
-    A = np.linalg.norm(np.array(eye[1]) - np.array(eye[5]))
-    B = np.linalg.norm(np.array(eye[2]) - np.array(eye[4]))
-    C = np.linalg.norm(np.array(eye[0]) - np.array(eye[3]))
-    return (A + B) / (2.0 * C)
-
-def run_detection_loop():
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Camera couldn't be opened.")
-        return
-
-    eye_closed_start = None
-    no_face_start = None
+EVENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events")
+
+API_URL = "https://dd-api-production.up.railway.app"
+DEVICE_KEY = "key-001"
+
+# Pooled connection with retries; alerts sent while offline are spooled to disk
+# and replayed in order once the API is reachable again
+alert_client = AlertClient(API_URL, DEVICE_KEY)
+alert_client.start_replay()
+
+# Buzzer patterns and the emergency request run on background workers so the
+# detection loop keeps its frame rate while alerting
+alerts = DriverAlerts(alert_client.url, gpio=gpio, buzzer_pin=BUZZER_PIN, send=alert_client)
+
+# Last 10 s of frames stay in memory; drowsy / emergency events write them plus 5 s after to EVENTS_DIR
+recorder = EventRecorder(EVENTS_DIR, pre_s=10, post_s=5, max_disk_mb=500).start()
+
+def on_imu_event(kind, timestamp, value):
+    print(f"[Fusion] {kind} ({value:.2f})")
+    # A crash is reported from the IMU thread even if the camera is down
+    if kind == IMPACT:
+        alerts.emergency()
+        recorder.trigger("impact", {"value": value})
+
+def create_pipeline(source=0, sink=None, motion=None):
+    """
+    Detection pipeline and its monitor; main.py keeps it open across stops.
+    With a VehicleStateEngine `motion`, frames go through a FusionEngine (feed it
+    IMU blocks with monitor.update_block), otherwise through a FatigueMonitor.
+    """
+    # Head angle is not used on the Pi, only closed eyes / yawns
+    fatigue = FatigueMonitor(ear_threshold=EAR_THRESHOLD, yawn_threshold=YAWN_THRESHOLD, head_threshold=None,
+                             sustain_s=DROWSY_DURATION, no_face_timeout=NO_FACE_TIMEOUT)
+    fusion = FusionEngine(fatigue, motion, on_event=on_imu_event) if motion is not None else None
     last_fist_alert_time = 0
+    was_drowsy = False
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
+    def infer(frame):
         h, w, _ = frame.shape
         image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
+        fist = False
         drowsy = False
-        hand_results = hands.process(image_rgb)
+        hand_landmarks_list = hand_gate.process(hands, frame, image_rgb)
 
-        if hand_results.multi_hand_landmarks:
-            for hand in hand_results.multi_hand_landmarks:
-                lm = hand.landmark
-                if lm[8].y < lm[6].y and lm[12].y < lm[10].y and lm[16].y > lm[14].y and lm[20].y > lm[18].y:
-                    if time.time() - last_fist_alert_time > FIST_ALERT_COOLDOWN:
-                        send_emergency_alert()
-                        last_fist_alert_time = time.time()
+        if hand_landmarks_list:
+            # The alert gesture has always been index + middle up, ring + pinky folded
+            fist = any(is_peace_sign(hand) for hand in hand_landmarks_list)
 
         face_results = face_mesh.process(image_rgb)
         if face_results.multi_face_landmarks:
-            lm = face_results.multi_face_landmarks[0].landmark
-            left_eye = [(lm[i].x * w, lm[i].y * h) for i in LEFT_EYE]
-            right_eye = [(lm[i].x * w, lm[i].y * h) for i in RIGHT_EYE]
-
-            ear = (eye_aspect_ratio(left_eye) + eye_aspect_ratio(right_eye)) / 2.0
-
-            lip_top = np.array([lm[13].x * w, lm[13].y * h])
-            lip_bottom = np.array([lm[14].x * w, lm[14].y * h])
-            yawn_dist = np.linalg.norm(lip_top - lip_bottom)
-
-            now = time.time()
-            if ear < EAR_THRESHOLD or yawn_dist > YAWN_THRESHOLD:
-                if eye_closed_start is None:
-                    eye_closed_start = now
-                elif now - eye_closed_start > DROWSY_DURATION:
-                    drowsy = True
+            features = face_features(landmarks_to_array(face_results.multi_face_landmarks[0]), w, h)
+            if fusion is not None:
+                drowsy = fusion.update_features(features).drowsy
             else:
-                eye_closed_start = None
-
-            if drowsy:
-                buzz_drowsy()
-
-        cv2.imshow("Driver Monitor", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+                drowsy = fatigue.update_features(features).state == DROWSY
+        elif fusion is not None:
+            fusion.no_face()
+        else:
+            fatigue.no_face()
+
+        return fist, drowsy
+
+    def alert(frame, result):
+        nonlocal last_fist_alert_time, was_drowsy
+
+        fist, drowsy = result
+        snapshot = fatigue.last
+        recorder.add(frame, {"fist": fist, "drowsy": drowsy, "perclos": snapshot.perclos,
+                             "mean_ear": snapshot.mean_ear, "eyes_closed_s": snapshot.eyes_closed_s})
+        if fist and time.time() - last_fist_alert_time > FIST_ALERT_COOLDOWN:
+            alerts.emergency()
+            recorder.trigger("emergency")
+            last_fist_alert_time = time.time()
+        if drowsy and not was_drowsy:
+            recorder.trigger("drowsy", {"perclos": snapshot.perclos})
+        was_drowsy = drowsy
+
+        # Coalesced while a buzz is playing, cut short once the driver recovers
+        if drowsy:
+            alerts.drowsy()
+        else:
+            alerts.recovered()
+
+    pipeline = Pipeline(infer, alert, source=source, window_name="Driver Monitor", sink=sink)
+    return pipeline, fusion or fatigue
+
+def report(monitor):
+    print("[HandGate]", hand_gate.summary())
+    print("[Fusion]" if isinstance(monitor, FusionEngine) else "[Fatigue]", monitor.summary())
+    print("[Alerts]", alerts.summary())
+    print("[AlertClient]", alert_client.summary())
+    print("[Recorder]", recorder.summary())
+
+def run_detection_loop(source=0, sink=None):
+    pipeline, fatigue = create_pipeline(source, sink)
+    pipeline.run()
+    report(fatigue)
@@ -1,12 +1,16 @@
-import RPi.GPIO as GPIO
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness.gpio import open_gpio
 
 LED_PIN = 27
-GPIO.setwarnings(False)
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(LED_PIN, GPIO.OUT)
+# RPi.GPIO on the Pi, DROWSINESS_GPIO=fake to run off-device
+gpio = open_gpio()
+gpio.setup(LED_PIN)
 
 def led_on():
-    GPIO.output(LED_PIN, GPIO.HIGH)
+    gpio.output(LED_PIN, True)
 
 def led_off():
-    GPIO.output(LED_PIN, GPIO.LOW)
+    gpio.output(LED_PIN, False)
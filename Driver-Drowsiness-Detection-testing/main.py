@@ -1,27 +1,39 @@
+import time
+STARTED = time.perf_counter()
+
+import os
+import sys
 from motion_sensor import MPU6050
-from drowsy_detector import run_detection_loop
+from drowsy_detector import alerts, create_pipeline, recorder, report
 from led import led_on, led_off
-import time
 
-motion_sensor = MPU6050()
-cooldown_start = None
-camera_on = False
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness.supervisor import Supervisor
+
+# 200 Hz through the FIFO into the vehicle state engine: the camera runs while
+# the car is idling or driving; single bumps no longer toggle it
+motion_sensor = MPU6050(stream_rate=200)
+
+# Camera and models are opened once; parked means standby, not teardown.
+# Frames are fused with the IMU stream: adapted thresholds, weaving, impacts.
+# Blocks reach the fusion engine on the IMU drain thread, so impacts are
+# reported within a drain interval, not at the supervisor's poll rate
+pipeline, fusion = create_pipeline(motion=motion_sensor.engine)
+motion_sensor.on_block = fusion.update_block
+
+def on_active():
+    print("[Motion] Vehicle moving — monitoring.")
+    led_on()
 
-while True:
-    if motion_sensor.detect_motion():
-        if not camera_on:
-            print("[Motion] Detected — Turning on camera.")
-            led_on()
-            camera_on = True
-            run_detection_loop()
-            cooldown_start = None
-    else:
-        if camera_on and cooldown_start is None:
-            cooldown_start = time.time()
-        elif camera_on and cooldown_start and time.time() - cooldown_start > 3:
-            print("[Motion] No activity — Turning off camera.")
-            led_off()
-            camera_on = False
-            cooldown_start = None
+def on_standby():
+    print("[Motion] Parked — camera on standby.")
+    led_off()
+    alerts.recovered()
 
-    time.sleep(0.2)
+supervisor = Supervisor(pipeline, motion_sensor.vehicle_state, on_active=on_active, on_standby=on_standby,
+                        started=STARTED)
+print("[Supervisor]", supervisor.run())
+# Open event clips are finished with the frames recorded so far
+recorder.close()
+report(fusion)
+motion_sensor.stream.stop()
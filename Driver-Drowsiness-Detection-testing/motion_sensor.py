@@ -1,29 +1,60 @@
-import smbus2
+import os
+import sys
 import time
 
-class MPU6050:
-    def __init__(self, address=0x68, threshold=0.5):
-        self.bus = smbus2.SMBus(1)
-        self.address = address
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness import imu
+from drowsiness.motion import PARKED, VehicleStateEngine
+
+class MPU6050(imu.MPU6050):
+    """
+    Shared burst-read driver (drowsiness/imu.py) with the motion check used by main.py
+
+    detect_motion() is True while the vehicle state engine (drowsiness/motion.py)
+    reports idle or driving. With `stream_rate` set, every FIFO block goes
+    through the engine and then to `on_block` (e.g. FusionEngine.update_block)
+    on the stream's drain thread as soon as it is read: both lag the IMU by one
+    drain interval (<= 0.1 s), not by the caller's polling period. Without a
+    stream each call feeds one read.
+    `threshold` is kept for the old per-axis delta check, detect_motion_raw().
+    """
+
+    def __init__(self, address=0x68, threshold=0.5, bus=None, stream_rate=None, engine=None, on_block=None):
+        super().__init__(address, bus=bus)
         self.threshold = threshold
         self.previous_values = {'x': 0, 'y': 0, 'z': 0}
-        self.bus.write_byte_data(self.address, 0x6B, 0)
-
-    def read_word(self, reg):
-        high = self.bus.read_byte_data(self.address, reg)
-        low = self.bus.read_byte_data(self.address, reg + 1)
-        val = (high << 8) + low
-        return val - 65536 if val > 32768 else val
-
-    def get_accel_data(self):
-        accel = {
-            'x': self.read_word(0x3B) / 16384.0,
-            'y': self.read_word(0x3D) / 16384.0,
-            'z': self.read_word(0x3F) / 16384.0,
-        }
-        return accel
+        self.engine = engine or VehicleStateEngine(on_transition=self._log_transition)
+        self.on_block = on_block
+        self.stream = None
+        if stream_rate:
+            self.stream = imu.ImuStream(self, rate_hz=stream_rate, max_blocks=0, on_block=self._feed).start()
+
+    def get_accel_data(self, g=True):
+        # This sensor always reported acceleration in g
+        return super().get_accel_data(g)
+
+    @staticmethod
+    def _log_transition(old, new, status):
+        print(f"[Motion] {old} -> {new} (accel rms {status.accel_rms:.3f} g, gyro rms {status.gyro_rms:.1f} deg/s)")
+
+    def _feed(self, block):
+        # Drain thread
+        self.engine.update_block(block)
+        on_block = self.on_block
+        if on_block is not None:
+            on_block(block)
+
+    def vehicle_state(self):
+        """Parked / idle / driving; without a stream this also feeds one read to the engine"""
+        if self.stream is None:
+            s = self.read()
+            self.engine.update(time.monotonic(), s.ax, s.ay, s.az, s.gx, s.gy, s.gz)
+        return self.engine.state
 
     def detect_motion(self):
+        return self.vehicle_state() != PARKED
+
+    def detect_motion_raw(self):
         accel = self.get_accel_data()
         for axis in ['x', 'y', 'z']:
             if abs(accel[axis] - self.previous_values[axis]) > self.threshold:
@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drowsiness.startup import StartupTimer
+
+# Started before the heavy imports so the [Startup] report covers them
+STARTUP = StartupTimer()
+
+from drowsiness.__main__ import run_script
+
+# cascade detector, now drowsiness.detectors.LandmarkCascadeDetector; also: python -m drowsiness --detector cascade
+
+if __name__ == "__main__":
+    # Optional argument: webcam index, video file, image folder or synthetic[:frames]
+    # --compare also runs the CNN on every frame and reports agreement with CNN-only decisions
+    run_script("cascade", startup=STARTUP)
@@ -0,0 +1 @@
+"""Shared building blocks for the driver drowsiness detection scripts."""
@@ -0,0 +1,133 @@
+"""
+Single entry point for the detectors in drowsiness/detectors.py
+
+    python -m drowsiness --detector mtl --source 0 --backend auto
+    python -m drowsiness --detector cascade --source clip.mp4 --compare
+    python -m drowsiness --detector ear --source synthetic:300 --headless
+    python -m drowsiness --detector mtl --metrics-port 9108 --metrics-json metrics.json --profile
+    python -m drowsiness --detector mtl --adaptive --capture 1280x720@30
+    python -m drowsiness --detector ear --workers
+    python -m drowsiness --detector mtl --record events --record-max-mb 500
+
+Prints each component's report ([Tracker], [HandGate], [Fatigue], ...), the
+per-stage timings ([Stages]) and the [Startup] phases when the stream ends or
+'q' is pressed. With --record, drowsy and fist onsets write pre / post-event
+clips (recorder.EventRecorder). With --profile, SIGUSR1 or GET /profile/start|stop on the
+metrics port toggles the sampling profiler while the loop runs.
+"""
+import argparse
+import os
+import sys
+
+from drowsiness.startup import StartupTimer
+
+
+def main(argv=None, startup=None):
+    # Started before the heavy imports so the [Startup] report covers them
+    startup = startup or StartupTimer()
+    from drowsiness.detectors import DETECTORS, create
+    from drowsiness.adaptive import DEFAULT_CAPTURE, AdaptiveController, parse_capture
+    from drowsiness.metrics import JsonExporter, Metrics, MetricsServer, PiThermals, SamplingProfiler
+    from drowsiness.pipeline import Pipeline
+    from drowsiness.recorder import EventRecorder, RecordingRender
+    from drowsiness.sources import HeadlessSink, open_source
+
+    parser = argparse.ArgumentParser(prog="python -m drowsiness", description="Run one drowsiness detector on a stream")
+    parser.add_argument("--detector", default="mtl", choices=list(DETECTORS))
+    parser.add_argument("--source", default=0, help="webcam index, video file, image folder or synthetic[:frames]")
+    # Not choices=BACKENDS: importing drowsiness.backends pulls in torch, which the ear detector never needs
+    parser.add_argument("--backend", help="model backend for the CNN detectors: eager, torchscript, "
+                                          "torchscript-int8, onnx or auto; defaults to $DROWSINESS_BACKEND or eager")
+    parser.add_argument("--headless", action="store_true", help="no preview window")
+    parser.add_argument("--compare", action="store_true",
+                        help="cascade only: also run the CNN on every frame and report agreement")
+    parser.add_argument("--verbose", action="store_true", help="print per-frame predictions")
+    parser.add_argument("--metrics-port", type=int, help="serve /metrics (Prometheus text) on this local port")
+    parser.add_argument("--metrics-json", help="rewrite this JSON file with the metrics every --metrics-interval s")
+    parser.add_argument("--metrics-interval", type=float, default=5.0)
+    parser.add_argument("--profile", action="store_true",
+                        help="allow toggling the sampling profiler at runtime (SIGUSR1, /profile/start|stop)")
+    parser.add_argument("--profile-dir", default=".", help="where profile-<pid>-<n>.folded files go")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt processing rate and detection width to fatigue risk, latency and temperature")
+    parser.add_argument("--capture", type=parse_capture,
+                        help=f"camera mode WxH[@FPS]; with --adaptive defaults to {'%dx%d@%d' % DEFAULT_CAPTURE}")
+    parser.add_argument("--detect-width", type=int,
+                        help="run MediaPipe on frames downscaled to this width (fixed; --adaptive steps it)")
+    parser.add_argument("--workers", action="store_true",
+                        help="run MediaPipe hands and face in parallel worker processes (shared-memory frames)")
+    parser.add_argument("--record", metavar="DIR", help="write pre / post-event clips of drowsy and fist events here")
+    parser.add_argument("--record-pre-s", type=float, default=10.0, help="seconds kept before an event")
+    parser.add_argument("--record-post-s", type=float, default=5.0, help="seconds recorded after an event")
+    parser.add_argument("--record-max-mb", type=float, default=500.0,
+                        help="disk budget of DIR; least recently used clips are evicted")
+    args = parser.parse_args(argv)
+    if args.compare and args.detector != "cascade":
+        parser.error("--compare only applies to --detector cascade")
+    startup.mark("import")
+
+    metrics = Metrics()
+    metrics.add_collector(PiThermals())
+    profiler = SamplingProfiler(output_dir=args.profile_dir) if args.profile else None
+    if profiler is not None and profiler.install_signal():
+        print(f"[Profiler] kill -USR1 {os.getpid()} to start / stop sampling")
+    exporters = []
+    if args.metrics_port is not None:
+        exporters.append(MetricsServer(metrics, args.metrics_port, profiler=profiler).start())
+    if args.metrics_json:
+        exporters.append(JsonExporter(metrics, args.metrics_json, args.metrics_interval).start())
+
+    options = {"backend": args.backend, "verbose": args.verbose, "startup": startup, "metrics": metrics,
+               "detect_width": args.detect_width, "workers": args.workers}
+    if args.compare:
+        options["compare"] = True
+    detector = create(args.detector, **options)
+
+    source, controller = args.source, None
+    if args.adaptive:
+        widths = {"detect_widths": (args.detect_width,)} if args.detect_width else {}
+        controller = AdaptiveController(capture=args.capture or DEFAULT_CAPTURE, risk=detector.risk,
+                                        on_width=detector.set_detect_width, **widths)
+        metrics.add_collector(controller.gauges)
+    elif args.capture:
+        source = open_source(args.source)
+        print("[Capture]", source.configure(*args.capture))
+
+    render, recorder = detector.draw, None
+    if args.record:
+        recorder = EventRecorder(args.record, pre_s=args.record_pre_s, post_s=args.record_post_s,
+                                 max_disk_mb=args.record_max_mb).start()
+        render = RecordingRender(recorder, detector.draw)
+
+    sink = HeadlessSink() if args.headless else None
+    try:
+        Pipeline(startup.first_call(detector.process, "first_frame"), render, source=source,
+                 window_name=detector.window_name, sink=sink, metrics=metrics, controller=controller).run()
+    finally:
+        detector.close()
+        if recorder is not None:
+            recorder.close()
+        if profiler is not None:
+            profiler.stop()
+        for exporter in exporters:
+            exporter.stop()
+    for name, report in detector.summary().items():
+        print(f"[{name}]", report)
+    if controller is not None:
+        print("[Adaptive]", controller.summary())
+    if recorder is not None:
+        print("[Recorder]", recorder.summary())
+    print("[Stages]", dict(metrics.summary()))
+    print("[Startup]", startup.summary())
+
+
+def run_script(detector, argv=None, startup=None):
+    """Entry point of the old per-detector scripts: `script.py [source] [options]`"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and not argv[0].startswith("-"):
+        argv[:1] = ["--source", argv[0]]
+    main(["--detector", detector] + argv, startup=startup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Adaptive capture resolution, detection scale and processing rate
+
+The models only ever see 84-128 px crops, yet MediaPipe and the colour
+conversion used to run on whatever frame the webcam delivered. The
+controller splits the two: the camera is set to a high resolution (crops are
+cut from the full frame) while detection runs on a copy downscaled to
+`detect_width` (detectors.Detector.to_rgb). MediaPipe returns normalized
+coordinates, so the boxes still land on the full frame.
+
+How many frames get inferred is decided at runtime from:
+
+    risk          FatigueMonitor.risk(), 0 (alert) .. 1 (drowsy): full rate when
+                  the driver looks drowsy, `alert_fps` when alert
+    latency       EMA of the measured infer time; the rate never asks for more
+                  than the stage can deliver, and the detection width steps down
+                  first when it is the bottleneck (up again with headroom)
+    temperature   above `temp_soft` an alert driver gets `min_fps`, above
+                  `temp_hard` everybody gets at most `alert_fps`
+
+Frames that are not inferred are still shown, with the previous result drawn
+on them. Rate drops wait `hold_s` so a blink does not toggle the rate; rises
+for risk are immediate. Every change is logged with the inputs that caused it:
+
+    [Adaptive] 10 -> 30 fps, detect 320 px | risk 0.62, infer 21.4 ms, 58.2 C | drowsy risk
+
+    controller = AdaptiveController(risk=detector.risk, on_width=detector.set_detect_width)
+    Pipeline(detector.process, detector.draw, source=0, controller=controller).run()
+"""
+import collections
+import time
+
+from drowsiness.metrics import read_cpu_temp
+
+DEFAULT_CAPTURE = (1280, 720, 30)
+DETECT_WIDTHS = (480, 320, 240)
+
+Decision = collections.namedtuple("Decision", "time fps detect_width risk infer_ms temperature reason")
+
+
+def parse_capture(spec):
+    """"1280x720@30" -> (1280, 720, 30); "640x480" keeps the camera's fps (None)"""
+    size, _, fps = spec.partition("@")
+    width, _, height = size.lower().partition("x")
+    return int(width), int(height), float(fps) if fps else None
+
+
+class AdaptiveController:
+    """
+    Args:
+        capture: (width, height, fps) requested from a live camera, None to leave it alone
+        max_fps: processing rate for a drowsy driver
+        alert_fps: processing rate for an alert driver
+        min_fps: floor, also used when hot and alert (FatigueMonitor needs frames < max_gap_s apart)
+        detect_widths: detection widths to step through, largest first
+        risk: callable() -> 0..1, e.g. Detector.risk
+        risk_high: risk at and above which the full rate is used
+        temperature: callable() -> degrees C or None
+        temp_soft: above it an alert driver drops to min_fps
+        temp_hard: above it the rate is capped at alert_fps whatever the risk
+        headroom: fraction of the frame period one inference may take
+        interval: seconds between decisions
+        hold_s: a lower rate / larger width must be wanted this long before it is applied
+        on_width: callable(detect_width) when the detection width changes
+        log: callable(str) for the trade-off messages, None to stay quiet
+    """
+
+    def __init__(self, capture=DEFAULT_CAPTURE, max_fps=30.0, alert_fps=10.0, min_fps=5.0,
+                 detect_widths=DETECT_WIDTHS, risk=None, risk_high=0.5, temperature=read_cpu_temp,
+                 temp_soft=70.0, temp_hard=80.0, headroom=0.8, interval=1.0, hold_s=3.0,
+                 on_width=None, log=print):
+        self.capture = capture
+        self.max_fps = max_fps
+        self.alert_fps = alert_fps
+        self.min_fps = min_fps
+        self.detect_widths = tuple(detect_widths)
+        self.risk = risk
+        self.risk_high = risk_high
+        self.temperature = temperature
+        self.temp_soft = temp_soft
+        self.temp_hard = temp_hard
+        self.headroom = headroom
+        self.interval = interval
+        self.hold_s = hold_s
+        self.on_width = on_width
+        self.log = log
+
+        self.fps = alert_fps
+        self.width_index = 0
+        self.capture_actual = None
+        self.infer_s = None
+        self.inferred = 0
+        self.skipped = 0
+        self.decisions = []
+        self.reasons = collections.Counter()
+        self._last_run = None
+        self._last_decision = None
+        self._lower_since = None
+        self._width_changed = None
+        self._temperature = None
+
+    @property
+    def detect_width(self):
+        return self.detect_widths[self.width_index] if self.detect_widths else None
+
+    # ---------------- Pipeline Hooks ----------------
+    def start(self, cap):
+        """Configure a live capture and apply the starting detection width"""
+        if self.capture is not None and getattr(cap, "live", False):
+            self.capture_actual = cap.configure(*self.capture)
+            if self.log:
+                self.log(f"[Adaptive] capture requested {self.capture}, got {self.capture_actual}")
+        if self.on_width is not None:
+            self.on_width(self.detect_width)
+
+    def due(self, timestamp):
+        """True if the frame captured at `timestamp` should be inferred"""
+        # 10% slack so a 15 fps target on a 30 fps camera takes every other frame, not every third
+        if self._last_run is not None and timestamp - self._last_run < 0.9 / self.fps:
+            self.skipped += 1
+            return False
+        self._last_run = timestamp
+        return True
+
+    def observe(self, seconds, now=None):
+        """Report one inference time; decides at most every `interval` seconds"""
+        now = time.perf_counter() if now is None else now
+        self.inferred += 1
+        self.infer_s = seconds if self.infer_s is None else 0.8 * self.infer_s + 0.2 * seconds
+        if self._last_decision is None or now - self._last_decision >= self.interval:
+            self._last_decision = now
+            self.decide(now)
+
+    # ---------------- Policy ----------------
+    def _wanted(self, risk, temperature):
+        """Rate the risk and temperature ask for, before the latency cap"""
+        share = min(1.0, risk / self.risk_high) if self.risk_high > 0 else 1.0
+        fps = self.alert_fps + (self.max_fps - self.alert_fps) * share
+        reason = "drowsy risk" if risk >= self.risk_high else "rising risk" if risk > 0.1 else "alert"
+        if temperature is not None and temperature >= self.temp_hard and fps > self.alert_fps:
+            return self.alert_fps, "temperature limit"
+        if temperature is not None and temperature >= self.temp_soft and risk < self.risk_high:
+            return self.min_fps, "warm, driver alert"
+        return fps, reason
+
+    def _step_width(self, now, capacity, fps):
+        """Shrink detection when latency caps the rate, grow it back with headroom"""
+        if self._width_changed is not None and now - self._width_changed < self.hold_s:
+            return None
+        if capacity < fps and self.width_index < len(self.detect_widths) - 1:
+            self.width_index += 1
+        elif capacity > 2.0 * fps and self.width_index > 0:
+            self.width_index -= 1
+        else:
+            return None
+        self._width_changed = now
+        # The latency EMA was measured at the old width
+        self.infer_s = None
+        if self.on_width is not None:
+            self.on_width(self.detect_width)
+        return self.detect_width
+
+    def decide(self, now):
+        risk = float(self.risk()) if self.risk is not None else 0.0
+        temperature = self.temperature() if self.temperature is not None else None
+        self._temperature = temperature
+        fps, reason = self._wanted(risk, temperature)
+        infer_ms = 1000.0 * self.infer_s if self.infer_s else None
+
+        width = None
+        if self.infer_s:
+            capacity = self.headroom / self.infer_s
+            width = self._step_width(now, capacity, fps) if self.detect_widths else None
+            if capacity < fps:
+                fps, reason = capacity, f"{reason}, latency bound"
+        fps = max(self.min_fps, min(self.max_fps, fps))
+
+        if fps < self.fps - 0.5:
+            # Lower only once it has been wanted for hold_s
+            if self._lower_since is None:
+                self._lower_since = now
+            if now - self._lower_since < self.hold_s:
+                fps = self.fps
+        else:
+            self._lower_since = None
+
+        # Latency-bound rates wander by a frame or two; only act on real changes
+        if abs(fps - self.fps) < max(1.0, 0.1 * self.fps) and width is None:
+            return None
+        previous = self.fps
+        self.fps = fps
+        self.reasons[reason] += 1
+        decision = Decision(now, round(fps, 1), self.detect_width, round(risk, 2),
+                            round(infer_ms, 1) if infer_ms is not None else None, temperature, reason)
+        self.decisions.append(decision)
+        if self.log:
+            latency = f"{infer_ms:.1f} ms" if infer_ms is not None else "n/a"
+            heat = f"{temperature:.1f} C" if temperature is not None else "no sensor"
+            self.log(f"[Adaptive] {previous:.0f} -> {fps:.0f} fps, detect {self.detect_width} px | "
+                     f"risk {risk:.2f}, infer {latency}, {heat} | {reason}")
+        return decision
+
+    # ---------------- Reporting ----------------
+    def gauges(self):
+        """metrics.Metrics collector"""
+        return {"target_fps": self.fps, "detect_width": self.detect_width, "skipped_frames": self.skipped}
+
+    def summary(self):
+        total = self.inferred + self.skipped
+        return {
+            "target_fps": round(self.fps, 1),
+            "detect_width": self.detect_width,
+            "capture": self.capture_actual,
+            "inferred": self.inferred,
+            "skipped_pct": round(100.0 * self.skipped / total, 1) if total else 0.0,
+            "infer_ms": round(1000.0 * self.infer_s, 2) if self.infer_s else None,
+            "temperature": self._temperature,
+            "changes": len(self.decisions),
+            "reasons": dict(self.reasons),
+        }
@@ -0,0 +1,268 @@
+"""
+Outbound alert client for the dd-api emergency endpoint
+
+    client = AlertClient("https://dd-api-production.up.railway.app", "key-001", spool_dir)
+    client.send()            # True once the API accepted the alert
+    client.start_replay()    # background flush of the spool while offline
+
+- One requests.Session per client, so calls reuse a keep-alive connection
+  instead of a fresh TCP + TLS handshake per alert.
+- Every attempt has a (connect, read) timeout; connection errors, timeouts
+  and 5xx answers are retried with capped exponential backoff. 4xx answers
+  (missing key, no emergency contacts) are not retried.
+- An alert that still fails is written to an on-disk spool (one JSON file
+  per alert, written atomically) and replayed oldest first once the API is
+  reachable again. New alerts queue behind spooled ones so delivery stays in
+  order, and the spool survives a reboot of the Pi. Spooled alerts older
+  than `max_age_s` are dropped instead of replayed: the contacts should not
+  get a burst of stale emergency texts once the car is back online.
+
+drowsiness/alert_stub.py is a local stand-in for the API to measure latency
+and delivery without network access:
+
+    python -m drowsiness.alert_client --check
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+DEFAULT_URL = "https://dd-api-production.up.railway.app"
+DEFAULT_SPOOL = os.path.join(os.path.expanduser("~"), ".drowsiness", "alert-spool")
+
+
+class AlertSpool:
+    """Durable FIFO of alert records, one JSON file per record"""
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+        names = self._names()
+        self._next = int(names[-1].split(".")[0]) + 1 if names else 0
+
+    def _names(self):
+        return sorted(name for name in os.listdir(self.path) if name.endswith(".json"))
+
+    def __len__(self):
+        return len(self._names())
+
+    def append(self, record):
+        names = self._names()
+        for name in names[:max(0, len(names) - self.max_entries + 1)]:
+            print(f"[AlertClient] Spool full, dropping {name}")
+            os.remove(os.path.join(self.path, name))
+
+        final = os.path.join(self.path, f"{self._next:012d}.json")
+        tmp = final + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        self._next += 1
+
+    def peek(self):
+        """(name, record) of the oldest entry, or None"""
+        names = self._names()
+        if not names:
+            return None
+        with open(os.path.join(self.path, names[0])) as f:
+            return names[0], json.load(f)
+
+    def remove(self, name):
+        os.remove(os.path.join(self.path, name))
+
+
+class AlertClient:
+    """
+    Args:
+        base_url: dd-api root URL
+        device_key: device key sent as ?deviceKey=
+        spool_dir: directory of the offline spool, None disables spooling
+        timeout: (connect, read) seconds per attempt
+        retries: extra attempts after the first one
+        backoff: first retry delay in seconds, doubled per attempt
+        max_backoff: cap on a single retry delay
+        session: requests.Session to reuse, a new one by default
+        max_age_s: spooled alerts older than this are dropped, None keeps them
+        debug: also send createdAt (ignored by dd-api) so the local stub can check delivery order
+    """
+
+    def __init__(self, base_url=DEFAULT_URL, device_key="key-001", spool_dir=DEFAULT_SPOOL,
+                 timeout=(3.05, 5.0), retries=3, backoff=0.5, max_backoff=8.0, session=None,
+                 max_age_s=900.0, debug=False):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.requests = requests
+        self.url = base_url.rstrip("/") + "/sendAlerts"
+        self.device_key = device_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_age_s = max_age_s
+        self.debug = debug
+        self.spool = AlertSpool(spool_dir) if spool_dir else None
+
+        self.session = session or requests.Session()
+        self.session.mount(self.url.split("://")[0] + "://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._replay_thread = None
+        self.stats = {"sent": 0, "failed_attempts": 0, "spooled": 0, "replayed": 0, "rejected": 0, "expired": 0}
+        self.latencies_ms = []
+
+    # ---------------- Delivery ----------------
+    def _attempt(self, record):
+        """One GET; True on 200, False if it should be retried, None if rejected for good"""
+        start = time.perf_counter()
+        try:
+            params = {"deviceKey": record["device_key"]}
+            if self.debug:
+                params["createdAt"] = repr(record["created"])
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+        except self.requests.RequestException as e:
+            print(f"[AlertClient] {type(e).__name__}: {e}")
+            return False
+        if response.status_code == 200:
+            self.latencies_ms.append(1000.0 * (time.perf_counter() - start))
+            return True
+        print(f"[AlertClient] Failed: {response.status_code}")
+        return None if 400 <= response.status_code < 500 else False
+
+    def _deliver(self, record, retries):
+        delay = self.backoff
+        for attempt in range(retries + 1):
+            if attempt:
+                if self._stop.wait(min(delay, self.max_backoff)):
+                    return False
+                delay *= 2
+            result = self._attempt(record)
+            if result is None:
+                self.stats["rejected"] += 1
+                return None
+            if result:
+                return True
+            self.stats["failed_attempts"] += 1
+        return False
+
+    def _flush(self, retries):
+        while self.spool is not None:
+            entry = self.spool.peek()
+            if entry is None:
+                return True
+            name, record = entry
+            age = time.time() - record["created"]
+            if self.max_age_s is not None and age > self.max_age_s:
+                print(f"[AlertClient] Dropping {record['kind']} alert spooled {age:.0f} s ago")
+                self.spool.remove(name)
+                self.stats["expired"] += 1
+                continue
+            result = self._deliver(record, retries)
+            if result is False:
+                return False
+            self.spool.remove(name)
+            self.stats["replayed"] += result is True
+
+    # ---------------- Public API ----------------
+    def send(self, kind="emergency"):
+        """Deliver one alert; False means it was spooled (or rejected) instead"""
+        record = {"kind": kind, "device_key": self.device_key, "created": time.time()}
+        with self._lock:
+            # Older spooled alerts go first; if they cannot, the new one queues behind them
+            if self._flush(retries=0):
+                result = self._deliver(record, self.retries)
+                if result is not False:
+                    self.stats["sent"] += result is True
+                    return bool(result)
+            if self.spool is not None:
+                self.spool.append(record)
+                self.stats["spooled"] += 1
+                print(f"[AlertClient] Offline, alert spooled ({len(self.spool)} pending)")
+            return False
+
+    def __call__(self, url=None):
+        """send() with the DriverAlerts `send(url)` signature"""
+        return self.send()
+
+    def flush(self):
+        """Replay spooled alerts oldest first; True when the spool is empty"""
+        with self._lock:
+            return self._flush(self.retries)
+
+    def start_replay(self, interval=30.0):
+        """Flush the spool every `interval` seconds on a daemon thread"""
+        def loop():
+            while not self._stop.wait(interval):
+                if self.spool is not None and len(self.spool):
+                    self.flush()
+
+        self._replay_thread = threading.Thread(target=loop, name="alert-replay", daemon=True)
+        self._replay_thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._replay_thread is not None:
+            self._replay_thread.join(timeout=2.0)
+        self.session.close()
+
+    def summary(self):
+        ordered = sorted(self.latencies_ms)
+        report = dict(self.stats, pending=len(self.spool) if self.spool is not None else 0)
+        if ordered:
+            report["latency_ms_p50"] = round(ordered[len(ordered) // 2], 1)
+            report["latency_ms_max"] = round(ordered[-1], 1)
+        return report
+
+
+def check(count=20, offline=(5, 12), latency_ms=20.0):
+    """Send `count` alerts to a local stub that is down for alerts in `offline`, then verify order"""
+    import tempfile
+
+    from drowsiness.alert_stub import StubServer
+
+    with tempfile.TemporaryDirectory() as spool_dir, StubServer(latency_ms=latency_ms) as stub:
+        client = AlertClient(stub.url, "key-001", spool_dir, timeout=(0.5, 1.0), retries=1, backoff=0.05,
+                             debug=True)
+        for i in range(count):
+            stub.online = not (offline[0] <= i < offline[1])
+            client.send(kind=f"alert-{i}")
+        stub.online = True
+        client.flush()
+        client.close()
+        received = [float(params["createdAt"]) for params in stub.received]
+        return {
+            "client": client.summary(),
+            "stub_received": len(stub.received),
+            "in_order": received == sorted(received),
+            "all_delivered": len(stub.received) == count,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send or replay dd-api emergency alerts")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--device-key", default="key-001")
+    parser.add_argument("--spool", default=DEFAULT_SPOOL)
+    parser.add_argument("--flush", action="store_true", help="replay the spool and exit")
+    parser.add_argument("--check", action="store_true", help="latency / delivery check against a local stub")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        print(json.dumps(check(), indent=2))
+        return
+    client = AlertClient(args.url, args.device_key, args.spool)
+    if args.flush:
+        client.flush()
+    else:
+        client.send()
+    print(json.dumps(client.summary(), indent=2))
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
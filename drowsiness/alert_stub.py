@@ -0,0 +1,111 @@
+"""
+Local stand-in for the dd-api /sendAlerts endpoint
+
+Answers GET /sendAlerts?deviceKey=... like the real route (200, or 400
+without a key) after an optional artificial latency, and records the query
+parameters of every accepted alert. Setting `online = False` makes it answer
+503, to simulate the car losing connectivity.
+
+    with StubServer(latency_ms=20) as stub:
+        client = AlertClient(stub.url, "key-001", spool_dir)
+        ...
+        stub.received   # list of query dicts, in arrival order (createdAt with AlertClient(debug=True))
+
+    python -m drowsiness.alert_stub --port 8080   # standalone, for manual runs
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0.0):
+        self.latency_ms = latency_ms
+        self.online = True
+        self.received = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API behind its proxy
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/sendAlerts":
+                    return self._reply(404, {"error": "Not found"})
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000.0)
+                with stub._lock:
+                    stub.requests += 1
+                    if not stub.online:
+                        return self._reply(503, {"error": "Service unavailable"})
+                    params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                    if "deviceKey" not in params:
+                        return self._reply(400, {"error": "Missing deviceKey in query"})
+                    stub.received.append(params)
+                return self._reply(200, {"message": "Text messages sent to emergency contacts"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="alert-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the dd-api /sendAlerts endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    stub = StubServer(args.host, args.port, args.latency_ms)
+    print(f"[Stub] Listening on {stub.url}/sendAlerts")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+        print(f"[Stub] {len(stub.received)} alerts received")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Non-blocking alert dispatcher
+
+Buzzer patterns and the emergency HTTP call take seconds; running them in
+the detection loop froze frame processing exactly when the driver was
+drowsy. AlertDispatcher runs them on background lanes instead:
+
+    actuator  buzzer / LED patterns, one at a time
+    network   emergency HTTP requests
+
+Each lane is a worker thread with a priority queue. Submitting is a few
+microseconds and never blocks the caller. Alerts with the same key are
+coalesced while one is pending or running (a drowsy buzz requested on every
+frame plays once at a time), a higher-priority alert preempts the running
+one on its lane, and cancel(key) drops the pending alert and interrupts the
+running pattern, e.g. when the driver recovers.
+
+DriverAlerts wires the buzzer, the GPIO backend (drowsiness/gpio.py) and the
+emergency endpoint to the three calls the detectors need:
+
+    alerts = DriverAlerts(url)
+    alerts.drowsy()      # every drowsy frame, coalesced
+    alerts.recovered()   # cancels the drowsy buzz
+    alerts.emergency()   # HTTP in the background, alert beeps on success
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from drowsiness.gpio import DROWSY_PATTERN, EMERGENCY_PATTERN, open_gpio, play
+
+# Lower value runs first
+EMERGENCY = 0
+DROWSY = 1
+INFO = 2
+
+
+class Alert:
+    __slots__ = ("key", "priority", "action", "cancelled", "submitted")
+
+    def __init__(self, key, priority, action):
+        self.key = key
+        self.priority = priority
+        self.action = action
+        self.cancelled = threading.Event()
+        self.submitted = time.monotonic()
+
+
+class AlertStats:
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.preempted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_wait_ms = 0.0
+
+    def summary(self):
+        return {name: round(value, 1) if isinstance(value, float) else value
+                for name, value in vars(self).items()}
+
+
+class Lane:
+    """One worker thread draining a priority queue of Alerts"""
+
+    def __init__(self, name, stats):
+        self.name = name
+        self.stats = stats
+        self._heap = []
+        self._order = itertools.count()
+        self._pending = {}
+        self._running = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=f"alerts-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, alert):
+        with self._cond:
+            if self._stopped:
+                return False
+            running = self._running
+            if alert.key in self._pending or (running is not None and running.key == alert.key
+                                              and not running.cancelled.is_set()):
+                self.stats.coalesced += 1
+                return False
+            heapq.heappush(self._heap, (alert.priority, next(self._order), alert))
+            self._pending[alert.key] = alert
+            self.stats.submitted += 1
+            if running is not None and alert.priority < running.priority:
+                running.cancelled.set()
+                self.stats.preempted += 1
+            self._cond.notify()
+            return True
+
+    def cancel(self, key):
+        with self._cond:
+            cancelled = False
+            alert = self._pending.pop(key, None)
+            if alert is not None:
+                # Left in the heap and skipped when popped
+                alert.cancelled.set()
+                cancelled = True
+            if self._running is not None and self._running.key == key and not self._running.cancelled.is_set():
+                self._running.cancelled.set()
+                cancelled = True
+            self.stats.cancelled += cancelled
+            return cancelled
+
+    def busy(self):
+        with self._cond:
+            return self._running is not None or bool(self._pending)
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while not self._heap and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return None
+                _, _, alert = heapq.heappop(self._heap)
+                if alert.cancelled.is_set():
+                    continue
+                del self._pending[alert.key]
+                self._running = alert
+                return alert
+
+    def _run(self):
+        while True:
+            alert = self._next()
+            if alert is None:
+                return
+            wait_ms = 1000.0 * (time.monotonic() - alert.submitted)
+            self.stats.max_wait_ms = max(self.stats.max_wait_ms, wait_ms)
+            try:
+                alert.action(alert.cancelled)
+                self.stats.completed += not alert.cancelled.is_set()
+            except Exception as e:
+                self.stats.failed += 1
+                print(f"[Alerts] {alert.key} failed: {e}")
+            finally:
+                with self._cond:
+                    self._running = None
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            if self._running is not None:
+                self._running.cancelled.set()
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+class AlertDispatcher:
+    """
+    Run alert actions on background lanes
+
+    Args:
+        lanes: lane names, each gets its own worker thread
+    """
+
+    def __init__(self, lanes=("actuator", "network")):
+        self.stats = AlertStats()
+        self.lanes = {name: Lane(name, self.stats) for name in lanes}
+
+    def submit(self, key, action, priority=INFO, lane="actuator"):
+        """
+        Queue `action(cancelled_event)`; returns False when coalesced with a pending or running
+        alert of the same key. Long actions should poll / wait on the event to stop early.
+        """
+        return self.lanes[lane].submit(Alert(key, priority, action))
+
+    def cancel(self, key):
+        """Drop the pending alert `key` and interrupt it if running; True if anything was cancelled"""
+        return any([lane.cancel(key) for lane in self.lanes.values()])
+
+    def busy(self):
+        return any(lane.busy() for lane in self.lanes.values())
+
+    def stop(self, timeout=2.0):
+        for lane in self.lanes.values():
+            lane.stop(timeout)
+
+    def summary(self):
+        return self.stats.summary()
+
+
+class DriverAlerts:
+    """
+    Buzzer patterns and the emergency HTTP request behind an AlertDispatcher
+
+    Args:
+        url: emergency endpoint, called with GET
+        gpio: GPIO backend, defaults to open_gpio()
+        buzzer_pin: BCM pin of the buzzer
+        send: callable(url) -> True on success, defaults to a GET with `timeout`
+        timeout: seconds for the default HTTP request
+    """
+
+    def __init__(self, url, gpio=None, buzzer_pin=17, send=None, timeout=5.0):
+        self.url = url
+        self.gpio = gpio or open_gpio()
+        self.buzzer_pin = buzzer_pin
+        self.gpio.setup(buzzer_pin)
+        self.timeout = timeout
+        self.send = send or self._get
+        self.dispatcher = AlertDispatcher()
+
+    def _get(self, url):
+        import requests
+
+        response = requests.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            print("[Alert] Failed:", response.status_code)
+        return response.status_code == 200
+
+    def _buzz(self, pattern):
+        return lambda cancelled: play(self.gpio, self.buzzer_pin, pattern, cancelled)
+
+    def drowsy(self):
+        return self.dispatcher.submit("drowsy", self._buzz(DROWSY_PATTERN), DROWSY)
+
+    def recovered(self):
+        return self.dispatcher.cancel("drowsy")
+
+    def emergency(self):
+        def send(cancelled):
+            if self.send(self.url) and not cancelled.is_set():
+                print("[Alert] Sent successfully.")
+                self.dispatcher.submit("emergency", self._buzz(EMERGENCY_PATTERN), EMERGENCY)
+
+        return self.dispatcher.submit("emergency-http", send, EMERGENCY, lane="network")
+
+    def stop(self, timeout=2.0):
+        self.dispatcher.stop(timeout)
+
+    def summary(self):
+        return self.dispatcher.summary()
@@ -0,0 +1,92 @@
+"""
+Inference backends for the detector models
+
+    eager             fp32 PyTorch module built from the .pth checkpoint
+    torchscript       fp32 TorchScript exported by optimize_model.py
+    torchscript-int8  statically quantized int8 TorchScript (optimize_model.py)
+    onnx              ONNX Runtime session on the exported .onnx file
+    auto              torchscript when its export exists, else eager; the
+                      scripted file loads without importing torchvision or
+                      building the architecture, the fastest cold start
+
+Every backend is a callable taking a (N, 1, H, W) float32 tensor and
+returning a tensor, or a tuple of tensors for multi-head models, so it can
+replace the eager model anywhere (BatchedInference, the scripts).
+
+The scripts pick a backend from the DROWSINESS_BACKEND environment variable.
+"""
+import os
+
+import torch
+
+from drowsiness.models import checkpoint_path, load_model
+
+BACKENDS = ("eager", "torchscript", "torchscript-int8", "onnx", "auto")
+
+EXPORT_SUFFIXES = {
+    "torchscript": ".torchscript.pt",
+    "torchscript-int8": ".int8.torchscript.pt",
+    "onnx": ".onnx",
+}
+
+
+class OnnxBackend:
+    """ONNX Runtime session wrapped to take and return torch tensors"""
+
+    def __init__(self, path, threads=None):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime")
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        outputs = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})
+        tensors = tuple(torch.from_numpy(output) for output in outputs)
+        return tensors[0] if len(tensors) == 1 else tensors
+
+    def eval(self):
+        return self
+
+
+def exported_path(name, backend):
+    return checkpoint_path(name, EXPORT_SUFFIXES[backend])
+
+
+def load_backend(name, backend=None, device="cpu", path=None):
+    """
+    Load model `name` (see models.MODEL_SPECS) on the requested backend
+
+    Args:
+        name: model key, e.g. "mtl"
+        backend: one of BACKENDS, defaults to $DROWSINESS_BACKEND or "eager"
+        device: torch device for eager / TorchScript backends
+        path: override the checkpoint or exported file location
+    """
+    backend = backend or os.environ.get("DROWSINESS_BACKEND", "eager")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if backend == "auto":
+        scripted = path or exported_path(name, "torchscript")
+        backend = "torchscript" if os.path.exists(scripted) and not scripted.endswith(".pth") else "eager"
+
+    if backend == "eager":
+        return load_model(name, checkpoint=path, device=device)
+
+    path = path or exported_path(name, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found, run: python optimize_model.py --model {name}")
+    if backend == "onnx":
+        return OnnxBackend(path)
+
+    if backend == "torchscript-int8":
+        # Quantized kernels only run on CPU
+        device = "cpu"
+    model = torch.jit.load(path, map_location=device)
+    model.eval()
+    return model
@@ -0,0 +1,124 @@
+"""
+Batched inference over face / hand crops
+
+Instead of one `model(transform(crop).unsqueeze(0))` per crop, crops from
+one or more frames are transformed, stacked into one tensor and sent
+through a single forward pass. Works with the single-head MobileNetV3
+classifiers (tensor output) and MultiTaskMobileNet (tuple of head outputs).
+
+Two ways to use it:
+
+    classifier.predict(crops)          # all crops of one frame, chunked by max_batch_size
+    classifier.submit(key, crop)       # streaming / offline: batches fill up across
+    classifier.poll() / flush()        # frames and are flushed on size or deadline
+"""
+import time
+
+import torch
+
+from drowsiness.metrics import Metrics
+
+
+# ---------------- Postprocessing ----------------
+def class_ids(outputs):
+    """argmax class index per row (single-head multi-class models)"""
+    return torch.argmax(outputs, dim=1).tolist()
+
+
+def sigmoid_probs(outputs):
+    """Sigmoid probability per row (single-logit binary models)"""
+    return torch.sigmoid(outputs).view(-1).tolist()
+
+
+def softmax_heads(outputs):
+    """Softmax probabilities per row for every head of a multi-task model"""
+    probs = [torch.softmax(head, dim=1).tolist() for head in outputs]
+    return [tuple(head[row] for head in probs) for row in range(len(probs[0]))]
+
+
+# ---------------- Batched Inference ----------------
+class BatchedInference:
+    """
+    Run a classifier on many crops with as few forward passes as possible
+
+    Args:
+        model: eval-mode nn.Module returning a tensor or a tuple of tensors
+        transform: callable(crop) -> (C, H, W) tensor, same shape for every crop;
+                   a preprocess.CropPreprocessor fills its batch buffer in place
+        device: torch device the model lives on
+        max_batch_size: upper bound on rows per forward pass
+        deadline_ms: submit()/poll() flush pending crops once the oldest has
+                     waited this long, even if the batch is not full
+        postprocess: callable(batched outputs) -> list with one entry per row
+        metrics: optional metrics.Metrics timing the "transform" and "forward" stages
+    """
+
+    def __init__(self, model, transform, device="cpu", max_batch_size=8,
+                 deadline_ms=50.0, postprocess=class_ids, metrics=None):
+        self.model = model
+        self.transform = transform
+        self.device = device
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.deadline = deadline_ms / 1000.0
+        self.postprocess = postprocess
+        self.metrics = metrics if metrics is not None else Metrics(enabled=False)
+
+        self.pending = []  # (key, tensor, submitted_at)
+        self.batches = 0
+        self.rows = 0
+
+    def _forward(self, tensors):
+        return self._run(torch.stack(tensors))
+
+    def _run(self, batch):
+        with torch.no_grad(), self.metrics.stage("forward"):
+            outputs = self.model(batch.to(self.device))
+        self.batches += 1
+        self.rows += batch.shape[0]
+        return self.postprocess(outputs)
+
+    def predict(self, crops):
+        """Return one result per crop, in order"""
+        results = []
+        for start in range(0, len(crops), self.max_batch_size):
+            chunk = crops[start:start + self.max_batch_size]
+            with self.metrics.stage("transform"):
+                if hasattr(self.transform, "batch"):
+                    # Preprocessed straight into a reused buffer, no per-crop tensors
+                    batch = self.transform.batch(chunk)
+                else:
+                    batch = torch.stack([self.transform(crop) for crop in chunk])
+            results.extend(self._run(batch))
+        return results
+
+    __call__ = predict
+
+    def submit(self, key, crop):
+        """Queue a crop under `key`; returns any (key, result) pairs that became ready"""
+        self.pending.append((key, self.transform(crop), time.perf_counter()))
+        return self.poll()
+
+    def poll(self, force=False):
+        """Flush pending crops if the batch is full, the deadline passed or force is set"""
+        if not self.pending:
+            return []
+        full = len(self.pending) >= self.max_batch_size
+        expired = time.perf_counter() - self.pending[0][2] >= self.deadline
+        if not (force or full or expired):
+            return []
+
+        # On deadline / force everything goes out, otherwise only full batches
+        flush_all = force or expired
+        ready = []
+        while self.pending and (flush_all or len(self.pending) >= self.max_batch_size):
+            chunk = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            results = self._forward([tensor for _, tensor, _ in chunk])
+            ready.extend(zip([key for key, _, _ in chunk], results))
+        return ready
+
+    def flush(self):
+        return self.poll(force=True)
+
+    def mean_batch_size(self):
+        return self.rows / self.batches if self.batches else 0.0
@@ -0,0 +1,154 @@
+"""
+Headless benchmark for the detector scripts
+
+Runs each registered detector's process/draw (drowsiness/detectors.py) over
+the same recorded clip (or any frame source) with no camera and no window, and prints a JSON report
+with throughput, p50/p95/p99 per-frame latency, peak RSS and the per-stage
+breakdown from drowsiness/metrics.py.
+
+Every detector is measured in its own subprocess so that peak RSS and
+imported libraries do not leak between variants. Frames are processed one
+after another on a single thread, so runs are repeatable.
+
+Usage:
+    python -m drowsiness.benchmark --source clip.mp4
+    python -m drowsiness.benchmark --source synthetic:300 --detectors ear mtl --output report.json
+    python -m drowsiness.benchmark --detectors mtl cascade --backend torchscript
+    python -m drowsiness.benchmark --detectors ear mtl --workers
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from drowsiness.sources import HeadlessSink, open_source
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Registered names, kept here so listing them does not import mediapipe / torch
+DETECTORS = ("drowsy", "drowsy-mt", "mtl", "ear", "cascade", "gesture")
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def benchmark_detector(name, source, max_frames=None, warmup=5, backend=None, workers=False):
+    """Measure one detector in the current process and return its report dict"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        from drowsiness.detectors import create
+        from drowsiness.metrics import Metrics
+        metrics = Metrics()
+        detector = create(name, backend=backend, metrics=metrics, workers=workers)
+        load_seconds = time.perf_counter() - start
+
+        sink = HeadlessSink()
+        frames = open_source(source)
+        latencies = []
+        processed = 0
+        try:
+            for frame in frames:
+                if max_frames is not None and processed >= max_frames + warmup:
+                    break
+                start = time.perf_counter()
+                result = detector.process(frame)
+                detector.draw(frame, result)
+                sink.show(frame)
+                elapsed = time.perf_counter() - start
+                if processed >= warmup:
+                    latencies.append(elapsed)
+                processed += 1
+        finally:
+            frames.release()
+            detector.close()
+
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "detector": name,
+        "workers": workers,
+        "frames": len(ordered),
+        "warmup_frames": min(processed, warmup),
+        "load_s": round(load_seconds, 3),
+        "fps": round(len(ordered) / total, 2) if total else 0.0,
+        "latency_ms": {
+            "mean": round(1000.0 * total / len(ordered), 2) if ordered else 0.0,
+            "p50": round(1000.0 * percentile(ordered, 50), 2),
+            "p95": round(1000.0 * percentile(ordered, 95), 2),
+            "p99": round(1000.0 * percentile(ordered, 99), 2),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": metrics.summary(),
+    }
+
+
+def run_in_subprocess(name, args):
+    command = [sys.executable, "-m", "drowsiness.benchmark", "--child", name,
+               "--source", args.source, "--warmup", str(args.warmup)]
+    if args.backend:
+        command += ["--backend", args.backend]
+    if args.frames is not None:
+        command += ["--frames", str(args.frames)]
+    if args.workers:
+        command.append("--workers")
+    proc = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = proc.stderr.strip().splitlines()
+        return {"detector": name, "error": error[-1] if error else f"exit code {proc.returncode}"}
+    return json.loads(lines[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless FPS / latency benchmark for the detectors")
+    parser.add_argument("--source", default="synthetic:300",
+                        help="video file, image directory, webcam index or synthetic[:frames]")
+    parser.add_argument("--detectors", nargs="+", choices=sorted(DETECTORS),
+                        default=sorted(name for name in DETECTORS if name != "gesture"))
+    # Not choices=BACKENDS: importing drowsiness.backends pulls in torch, which the ear detector never needs
+    parser.add_argument("--backend", help="model backend for the CNN detectors: eager, torchscript, "
+                                          "torchscript-int8, onnx or auto; defaults to $DROWSINESS_BACKEND or eager")
+    parser.add_argument("--frames", type=int, default=None, help="measured frames per detector")
+    parser.add_argument("--warmup", type=int, default=5, help="frames excluded from the statistics")
+    parser.add_argument("--workers", action="store_true",
+                        help="MediaPipe hands and face in worker processes (detectors.Detector workers=True)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--child", choices=sorted(DETECTORS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.source):
+        args.source = os.path.abspath(args.source)
+
+    if args.child:
+        print(json.dumps(benchmark_detector(args.child, args.source, args.frames, args.warmup, args.backend,
+                                            args.workers)))
+        return
+
+    report = {
+        "source": args.source,
+        "backend": args.backend or os.environ.get("DROWSINESS_BACKEND", "eager"),
+        "results": [run_in_subprocess(name, args) for name in args.detectors],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Cascade drowsiness decision: landmark heuristics first, CNN only when unsure
+
+The FaceMesh features (drowsiness/landmarks.py) are computed on every frame
+and are almost free next to a MultiTaskMobileNet forward pass. The heuristic
+EAR / lip-distance decision is used as is unless the frame is ambiguous:
+
+    ear_band    EAR within `ear_band` of the EAR threshold
+    yawn_band   lip distance within `yawn_band` pixels of the yawn threshold
+    flip        the heuristic disagrees with the previous frame's decision,
+                i.e. the state is about to change
+
+Only then is the face crop sent through the CNN, whose drowsy / yawn heads
+replace the heuristic for that frame.
+
+With `shadow=True` the CNN runs on every frame, confident ones included, so
+the cascade can be compared against CNN-only decisions (per-frame eyes / yawn
+agreement and agreement of the resulting fatigue states) on a replay clip.
+Shadow mode therefore costs a full CNN pass per frame; it is for evaluation.
+"""
+import collections
+
+from drowsiness.fatigue import FatigueMonitor
+
+# MultiTaskMobileNet head classes (see detectors.MultiTaskDetector)
+DROWSY_CLASS = 0
+YAWN_CLASS = 1
+
+CascadeDecision = collections.namedtuple("CascadeDecision", "eyes_closed yawning used_cnn reason")
+
+
+def mtl_decision(drowsy_probs, yawn_probs):
+    """(eyes_closed, yawning) from the MultiTaskMobileNet head probabilities"""
+    return (drowsy_probs[DROWSY_CLASS] > drowsy_probs[1 - DROWSY_CLASS],
+            yawn_probs[YAWN_CLASS] > yawn_probs[1 - YAWN_CLASS])
+
+
+class CascadeStats:
+    def __init__(self):
+        self.frames = 0
+        self.cnn_calls = 0
+        self.reasons = collections.Counter()
+        self.compared = 0
+        self.eyes_agree = 0
+        self.yawn_agree = 0
+        self.state_agree = 0
+
+    def summary(self):
+        skipped = self.frames - self.cnn_calls
+        report = {
+            "frames": self.frames,
+            "cnn_calls": self.cnn_calls,
+            "cnn_skipped_pct": round(100.0 * skipped / self.frames, 1) if self.frames else 0.0,
+            "reasons": dict(self.reasons),
+        }
+        if self.compared:
+            report["vs_cnn_only"] = {
+                "frames": self.compared,
+                "eyes_agree_pct": round(100.0 * self.eyes_agree / self.compared, 1),
+                "yawn_agree_pct": round(100.0 * self.yawn_agree / self.compared, 1),
+                "state_agree_pct": round(100.0 * self.state_agree / self.compared, 1),
+            }
+        return report
+
+
+class CascadeDetector:
+    """
+    Args:
+        classifier: batching.BatchedInference over MultiTaskMobileNet with softmax_heads
+        ear_threshold: EAR below which the heuristic says eyes closed
+        yawn_threshold: lip distance in pixels above which the heuristic says yawning
+        ear_band: half-width of the uncertain EAR band around ear_threshold
+        yawn_band: half-width in pixels of the uncertain lip-distance band
+        shadow: also run the CNN on confident frames and record agreement
+    """
+
+    def __init__(self, classifier, ear_threshold=0.25, yawn_threshold=25.0, ear_band=0.03, yawn_band=5.0,
+                 shadow=False):
+        self.classifier = classifier
+        self.ear_threshold = ear_threshold
+        self.yawn_threshold = yawn_threshold
+        self.ear_band = ear_band
+        self.yawn_band = yawn_band
+        self.shadow = shadow
+        self.stats = CascadeStats()
+        self._last = None
+        # Only used in shadow mode, to compare the resulting fatigue states
+        self._cascade_fatigue = FatigueMonitor()
+        self._cnn_fatigue = FatigueMonitor()
+
+    def _reason(self, features, heuristic):
+        if abs(features.ear - self.ear_threshold) <= self.ear_band:
+            return "ear_band"
+        if abs(features.lip_distance - self.yawn_threshold) <= self.yawn_band:
+            return "yawn_band"
+        if self._last is not None and heuristic != self._last:
+            return "flip"
+        return None
+
+    def _cnn(self, frame, bbox):
+        height, width = frame.shape[:2]
+        x_min, y_min = max(0, bbox[0]), max(0, bbox[1])
+        x_max, y_max = min(width, bbox[2]), min(height, bbox[3])
+        crop = frame[y_min:y_max, x_min:x_max]
+        if crop.size == 0:
+            return None
+        return mtl_decision(*self.classifier.predict([crop])[0])
+
+    def _compare(self, decision, cnn_only, timestamp):
+        self.stats.compared += 1
+        self.stats.eyes_agree += decision[0] == cnn_only[0]
+        self.stats.yawn_agree += decision[1] == cnn_only[1]
+        cascade_state = self._cascade_fatigue.update(decision[0], decision[1], timestamp=timestamp).state
+        cnn_state = self._cnn_fatigue.update(cnn_only[0], cnn_only[1], timestamp=timestamp).state
+        self.stats.state_agree += cascade_state == cnn_state
+
+    def update(self, frame, features, timestamp=None):
+        """Decide (eyes_closed, yawning) for one BGR frame and its landmarks.FaceFeatures"""
+        self.stats.frames += 1
+        heuristic = (features.ear < self.ear_threshold, features.lip_distance > self.yawn_threshold)
+        reason = self._reason(features, heuristic)
+
+        cnn = None
+        if reason is not None or self.shadow:
+            cnn = self._cnn(frame, features.bbox)
+            if cnn is not None:
+                self.stats.cnn_calls += reason is not None
+        if reason is not None and cnn is not None:
+            self.stats.reasons[reason] += 1
+            decision = CascadeDecision(cnn[0], cnn[1], True, reason)
+        else:
+            decision = CascadeDecision(heuristic[0], heuristic[1], False, None)
+
+        if self.shadow and cnn is not None:
+            self._compare(decision, cnn, timestamp)
+        self._last = (decision.eyes_closed, decision.yawning)
+        return decision
+
+    def reset(self):
+        """Forget the previous decision, e.g. after frames without a face"""
+        self._last = None
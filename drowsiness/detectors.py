@@ -0,0 +1,629 @@
+"""
+Detector registry: every driver-monitoring variant behind one API
+
+The detector scripts used to copy the MediaPipe setup, the gesture checks,
+the box clamping and the camera loop, and built all of it on import. Each
+variant is now a Detector subclass registered under the name the benchmark
+already used; MediaPipe and the model are only loaded when one is created:
+
+    ear         FaceMesh EAR / lip-distance heuristics (Mediapipe/drowsy.py)
+    drowsy      binary MobileNetV3 on tracked face crops
+    drowsy-mt   4-class MobileNetV3 on hand or face crops
+    mtl         MultiTaskMobileNet drowsy + yawn heads
+    cascade     EAR heuristics with a MultiTaskMobileNet fallback
+    gesture     fist / peace sign, otherwise the head box (Mediapipe/mediapipe_test.py)
+
+Every detector turns a BGR frame into a Result and draws it. Inside process()
+the frame is wrapped in a frame.FrameContext, so the RGB, grey and downscaled
+views are computed once into pooled buffers and shared by every stage:
+
+    detector = create("mtl", backend="auto")
+    result = detector.process(frame)        # Result(regions, drowsy, state, features)
+    detector.draw(frame, result)
+    print(detector.summary())               # {"Tracker": {...}, "Fatigue": {...}, ...}
+
+`detect_width` runs MediaPipe on a copy downscaled to that width while crops
+and boxes stay on the full frame (see adaptive.AdaptiveController).
+
+`workers=True` runs Hands and the face model (FaceDetection / FaceMesh) in
+their own processes (workers.MediaPipeWorkers). Both start on the frame
+together, then the stages collect them in the usual order, so a hand gesture
+still wins over the face.
+
+With `metrics=Metrics()` every stage of process() / draw() is timed: color_convert,
+hands, face_detection, face_tracking (includes keyframe detections), face_mesh,
+transform, forward and draw.
+
+`python -m drowsiness --detector mtl --source 0` runs one on a camera.
+"""
+import collections
+
+import cv2
+
+from drowsiness.cascade import CascadeDetector
+from drowsiness.fatigue import DROWSY, NO_FACE, FatigueMonitor
+from drowsiness.frame import BufferPool, FrameContext, as_context
+from drowsiness.gestures import FIST_TIPS, FIST_TIPS_WITH_THUMB, detection_box, gesture_name, hand_box
+from drowsiness.landmarks import face_features, landmarks_to_array
+from drowsiness.metrics import Metrics
+
+Region = collections.namedtuple("Region", "kind label box color")
+# `features`: per-frame measurements of the first face (EAR, head pose, head probabilities), None without one
+Result = collections.namedtuple("Result", "regions drowsy state features", defaults=(None,))
+
+HAND_COLOR = (0, 255, 0)
+FACE_COLOR = (255, 0, 0)
+ALERT_COLOR = (0, 0, 255)
+OVERLAY_COLOR = (255, 255, 0)
+
+# MediaPipe solution settings, shared by the in-process and the worker-process setup
+MEDIAPIPE_OPTIONS = {
+    "hands": {"min_detection_confidence": 0.7, "max_num_hands": 1},
+    "face_detection": {"min_detection_confidence": 0.6},
+    "face_mesh": {"static_image_mode": False, "max_num_faces": 1, "min_detection_confidence": 0.5},
+}
+
+DETECTORS = collections.OrderedDict()
+
+
+def register(name):
+    """Class decorator adding a Detector subclass to DETECTORS under `name`"""
+    def decorator(cls):
+        cls.name = name
+        DETECTORS[name] = cls
+        return cls
+    return decorator
+
+
+def create(name, **kwargs):
+    """Build the detector registered as `name`; kwargs go to its constructor"""
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown detector '{name}', expected one of {', '.join(DETECTORS)}")
+    return DETECTORS[name](**kwargs)
+
+
+def crop_regions(frame, boxes):
+    """Non-empty crops of `boxes` and the boxes they came from"""
+    crops, kept = [], []
+    for x_min, y_min, x_max, y_max in boxes:
+        crop = frame[y_min:y_max, x_min:x_max]
+        if crop.size > 0:
+            crops.append(crop)
+            kept.append((x_min, y_min, x_max, y_max))
+    return crops, kept
+
+
+class Detector:
+    """
+    Base class: MediaPipe Hands behind a HandGate, an optional FatigueMonitor and drawing
+
+    Args:
+        backend: model backend for CNN detectors, defaults to $DROWSINESS_BACKEND
+        verbose: print per-frame predictions
+        startup: optional startup.StartupTimer; "mediapipe" / "model_load" are marked on it
+        gate_hands: run Hands behind a HandGate instead of on every frame
+        metrics: optional metrics.Metrics receiving the per-stage timings
+        detect_width: downscale frames wider than this before MediaPipe, None for full size
+        workers: run Hands and the face model in parallel worker processes
+    """
+
+    name = None
+    window_name = "Gesture or Head Detector"
+    fist_tips = FIST_TIPS
+    # MediaPipe face solution next to Hands: "face_detection", "face_mesh" or None
+    face_task = None
+
+    def __init__(self, backend=None, verbose=False, startup=None, gate_hands=True, metrics=None,
+                 detect_width=None, workers=False):
+        import mediapipe as mp
+        from drowsiness.gating import HandGate
+
+        self.backend = backend
+        self.verbose = verbose
+        self.startup = startup
+        self.metrics = metrics if metrics is not None else Metrics(enabled=False)
+        self.detect_width = detect_width
+        # Output buffers for the per-frame views, reused across frames
+        self.pool = BufferPool()
+        self.mp = mp
+        self.workers = None
+        if workers:
+            from drowsiness.workers import MediaPipeWorkers
+            tasks = ("hands", self.face_task) if self.face_task else ("hands",)
+            self.workers = MediaPipeWorkers({task: MEDIAPIPE_OPTIONS[task] for task in tasks}).start()
+        self.hands = self.solution("hands")
+        # Hands only runs on motion / skin change in the hand regions, after a hit, or every few frames
+        self.hand_gate = HandGate(idle_interval=6) if gate_hands else None
+        self._hands_due = None
+        self.fatigue = None
+
+    def _mark(self, phase):
+        if self.startup is not None:
+            self.startup.mark(phase)
+
+    def solution(self, task):
+        """MediaPipe solution for `task`: built here, or a stand-in for the one in its worker"""
+        if self.workers is not None:
+            return self.workers.solution(task)
+        from drowsiness.workers import TASKS
+        module, factory = TASKS[task]
+        return getattr(getattr(self.mp.solutions, module), factory)(**MEDIAPIPE_OPTIONS[task])
+
+    # ---------------- Shared Stages ----------------
+    def context(self, frame):
+        """FrameContext of one BGR frame, backed by this detector's BufferPool"""
+        return FrameContext(frame, self.pool, detect_width=self.detect_width)
+
+    def to_rgb(self, frame):
+        """RGB view for MediaPipe, at detect_width; landmarks are normalized so boxes map back to `frame`"""
+        with self.metrics.stage("color_convert"):
+            return as_context(frame).rgb()
+
+    def prefetch(self, ctx, image_rgb):
+        """Worker mode: start Hands and the face model on this frame at once; the stages collect them"""
+        if self.workers is None:
+            return
+        with self.metrics.stage("submit"):
+            self._hands_due = self.hand_gate.should_run(ctx) if self.hand_gate is not None else True
+            tasks = ["hands"] if self._hands_due else []
+            if self.face_task is not None and self.face_due():
+                tasks.append(self.face_task)
+            self.workers.prefetch(image_rgb, tasks)
+
+    def face_due(self):
+        """Whether this frame needs the face model (worker mode submits it up front)"""
+        return True
+
+    def set_detect_width(self, width):
+        self.detect_width = width
+
+    def risk(self):
+        """0 (alert) .. 1 (drowsy), for adaptive.AdaptiveController"""
+        return self.fatigue.risk() if self.fatigue is not None else 0.0
+
+    def detect_hands(self, ctx, image_rgb):
+        with self.metrics.stage("hands"):
+            if self.hand_gate is None:
+                return self.hands.process(image_rgb).multi_hand_landmarks
+            return self.hand_gate.process(self.hands, ctx, image_rgb, due=self._hands_due)
+
+    def gesture(self, hand_landmarks_list, width, height):
+        """Region of the first fist / peace sign, or None"""
+        for hand_landmarks in hand_landmarks_list or ():
+            gesture = gesture_name(hand_landmarks, self.fist_tips)
+            if gesture:
+                return Region("hand", gesture, hand_box(hand_landmarks, width, height), HAND_COLOR)
+        return None
+
+    def on_hand(self):
+        """A hand took the frame: the face was not measured for a known reason"""
+        if self.fatigue is not None:
+            self.fatigue.pause()
+
+    def result(self, regions, features=None):
+        state = self.fatigue.last.state if self.fatigue is not None else None
+        return Result(regions, state == DROWSY, state, features)
+
+    # ---------------- Public API ----------------
+    def process(self, frame):
+        """One BGR frame -> Result"""
+        raise NotImplementedError
+
+    def caption(self, region):
+        return region.label
+
+    def draw(self, frame, result):
+        """Fatigue overlay, boxes and captions; regions without a box are drawn as a banner"""
+        with self.metrics.stage("draw"):
+            self._draw(frame, result)
+
+    def _draw(self, frame, result):
+        if self.fatigue is not None:
+            cv2.putText(frame, self.fatigue.describe(), (10, frame.shape[0] - 15),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, OVERLAY_COLOR, 1)
+        for region in result.regions:
+            if region.box is None:
+                cv2.putText(frame, self.caption(region), (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.9, region.color, 2)
+                continue
+            x_min, y_min, x_max, y_max = region.box
+            cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), region.color, 2)
+            cv2.putText(frame, self.caption(region), (x_min, y_min - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, region.color, 2)
+
+    def reset(self):
+        if self.fatigue is not None:
+            self.fatigue.pause()
+
+    def close(self):
+        """Stop the worker processes, if any"""
+        if self.workers is not None:
+            self.workers.close()
+
+    def summary(self):
+        """Component reports keyed by the [Name] they are printed under"""
+        summary = collections.OrderedDict()
+        if self.workers is not None:
+            summary["Workers"] = self.workers.summary()
+        if self.hand_gate is not None:
+            summary["HandGate"] = self.hand_gate.summary()
+        if self.fatigue is not None:
+            summary["Fatigue"] = self.fatigue.summary()
+        return summary
+
+
+class FaceDetectionMixin:
+    """MediaPipe FaceDetection on keyframes, optical-flow FaceTracker in between"""
+
+    # Face detector runs on keyframes only, optical flow moves the boxes in between
+    face_keyframe_interval = 5
+    face_task = "face_detection"
+
+    def _init_faces(self):
+        from drowsiness.tracking import FaceTracker
+
+        self.face_detection = self.solution("face_detection")
+        self.face_tracker = FaceTracker(self.detect_faces, keyframe_interval=self.face_keyframe_interval)
+
+    def detect_faces(self, image_rgb, width, height):
+        with self.metrics.stage("face_detection"):
+            face_results = self.face_detection.process(image_rgb)
+        return [detection_box(detection, width, height) for detection in face_results.detections or ()]
+
+    def tracked_faces(self, ctx, image_rgb, width, height):
+        with self.metrics.stage("face_tracking"):
+            boxes = self.face_tracker.update(ctx, image_rgb, width, height)
+        return crop_regions(ctx.bgr, boxes)
+
+    def face_due(self):
+        return self.face_tracker.keyframe_due()
+
+    def on_hand(self):
+        self.face_tracker.reset()
+        super().on_hand()
+
+    def reset(self):
+        self.face_tracker.reset()
+        super().reset()
+
+    def summary(self):
+        summary = collections.OrderedDict(Tracker=self.face_tracker.stats.summary())
+        summary.update(super().summary())
+        return summary
+
+
+class CNNDetector(Detector):
+    """Loads MODEL_SPECS[model_name] on the requested backend and batches crops through it"""
+
+    model_name = None
+    max_batch_size = 4
+
+    def _init_model(self, postprocess):
+        """`postprocess` names one of the drowsiness.batching postprocessing functions"""
+        import torch
+        from drowsiness import batching
+        from drowsiness.backends import load_backend
+        from drowsiness.models import MODEL_SPECS
+        from drowsiness.preprocess import CropPreprocessor
+
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # backend=None falls back to DROWSINESS_BACKEND: eager (default), torchscript, torchscript-int8, onnx or auto
+        self.model = load_backend(self.model_name, backend=self.backend, device=self.device)
+        self._mark("model_load")
+        transform = CropPreprocessor(**MODEL_SPECS[self.model_name].preprocess,
+                                     max_batch_size=self.max_batch_size)
+        self.classifier = batching.BatchedInference(self.model, transform, self.device,
+                                                    max_batch_size=self.max_batch_size,
+                                                    postprocess=getattr(batching, postprocess),
+                                                    metrics=self.metrics)
+
+
+# ---------------- Landmark Heuristics ----------------
+@register("ear")
+class EARDetector(Detector):
+    """FaceMesh EAR / lip distance / head roll into the FatigueMonitor, no CNN"""
+
+    window_name = "Fatigue + Gesture Detector"
+    # This variant also counted the thumb when looking for a fist
+    fist_tips = FIST_TIPS_WITH_THUMB
+    face_task = "face_mesh"
+
+    def __init__(self, ear_threshold=0.25, yawn_threshold=25.0, head_threshold=15, sustain_s=2.0,
+                 no_face_timeout=2.0, **kwargs):
+        super().__init__(**kwargs)
+        self.face_mesh = self.solution("face_mesh")
+        self._mark("mediapipe")
+        # State tracking: sustained signs, PERCLOS, blinks, yawns and microsleeps
+        self.fatigue = FatigueMonitor(ear_threshold=ear_threshold, yawn_threshold=yawn_threshold,
+                                      head_threshold=head_threshold, sustain_s=sustain_s,
+                                      no_face_timeout=no_face_timeout)
+
+    def face_landmarks(self, image_rgb, width, height):
+        """landmarks.FaceFeatures of the first face, or None"""
+        with self.metrics.stage("face_mesh"):
+            face_results = self.face_mesh.process(image_rgb)
+        if not face_results.multi_face_landmarks:
+            return None
+        return face_features(landmarks_to_array(face_results.multi_face_landmarks[0]), width, height)
+
+    def no_face(self):
+        if self.fatigue.no_face().state == NO_FACE:
+            return self.result([Region("no_face", "No Face Detected", None, ALERT_COLOR)])
+        return self.result([])
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        hand = self.gesture(self.detect_hands(ctx, image_rgb), width, height)
+        if hand:
+            self.on_hand()
+            return self.result([hand])
+
+        features = self.face_landmarks(image_rgb, width, height)
+        if features is None:
+            return self.no_face()
+        drowsy = self.fatigue.update_features(features).state == DROWSY
+        region = Region("face", "Drowsy" if drowsy else "Awake", features.bbox,
+                        ALERT_COLOR if drowsy else HAND_COLOR)
+        return self.result([region], self.feature_values(features))
+
+    @staticmethod
+    def feature_values(features):
+        """landmarks.FaceFeatures without the bbox, for Result.features"""
+        values = features._asdict()
+        del values["bbox"]
+        return values
+
+
+@register("cascade")
+class LandmarkCascadeDetector(EARDetector, CNNDetector):
+    """EAR heuristics with the MultiTaskMobileNet run only on ambiguous frames"""
+
+    window_name = "Cascade Detector"
+    model_name = "mtl"
+    max_batch_size = 1
+    fist_tips = FIST_TIPS
+
+    def __init__(self, ear_threshold=0.25, yawn_threshold=25.0, ear_band=0.03, yawn_band=5.0,
+                 head_threshold=15, compare=False, **kwargs):
+        super().__init__(ear_threshold=ear_threshold, yawn_threshold=yawn_threshold,
+                         head_threshold=head_threshold, **kwargs)
+        self.head_threshold = head_threshold
+        self._init_model("softmax_heads")
+        # `compare` also runs the CNN on every frame and reports agreement with CNN-only decisions
+        self.cascade = CascadeDetector(self.classifier, ear_threshold, yawn_threshold,
+                                       ear_band=ear_band, yawn_band=yawn_band, shadow=compare)
+
+    def on_hand(self):
+        self.cascade.reset()
+        super().on_hand()
+
+    def no_face(self):
+        self.cascade.reset()
+        return super().no_face()
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        hand = self.gesture(self.detect_hands(ctx, image_rgb), width, height)
+        if hand:
+            self.on_hand()
+            return self.result([hand])
+
+        # ---- Landmark Features, CNN Only When Ambiguous ----
+        features = self.face_landmarks(image_rgb, width, height)
+        if features is None:
+            return self.no_face()
+        decision = self.cascade.update(frame, features)
+        status = self.fatigue.update(decision.eyes_closed, decision.yawning,
+                                     abs(features.roll) > self.head_threshold,
+                                     ear=features.ear, head_angle=features.roll)
+        label = "Drowsy" if status.state == DROWSY else "Awake"
+        if decision.used_cnn:
+            label += " (CNN)"
+        values = self.feature_values(features)
+        values["used_cnn"] = decision.used_cnn
+        return self.result([Region("face", label, features.bbox, FACE_COLOR)], values)
+
+    def reset(self):
+        self.cascade.reset()
+        super().reset()
+
+    def summary(self):
+        summary = collections.OrderedDict(Cascade=self.cascade.stats.summary())
+        summary.update(super().summary())
+        return summary
+
+
+# ---------------- CNN On Face Crops ----------------
+@register("drowsy")
+class BinaryDetector(FaceDetectionMixin, CNNDetector):
+    """Single-logit MobileNetV3 on the first tracked face"""
+
+    model_name = "drowsy"
+    max_batch_size = 1
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._init_faces()
+        self._mark("mediapipe")
+        self._init_model("sigmoid_probs")
+        # Per-frame "Drowsy" predictions feed the shared fatigue state machine (PERCLOS, microsleeps)
+        self.fatigue = FatigueMonitor()
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        # ---- Check for Hand First ----
+        hand = self.gesture(self.detect_hands(ctx, image_rgb), width, height)
+        if hand:
+            self.on_hand()
+            return self.result([hand])
+
+        # ---- If no hand gesture, check the first face ----
+        crops, boxes = self.tracked_faces(ctx, image_rgb, width, height)
+        if not crops:
+            self.fatigue.no_face()
+            return self.result([])
+        prob = self.classifier.predict(crops[:1])[0]
+        label = "Not Drowsy" if prob >= 0.5 else "Drowsy"
+        if self.verbose:
+            print(f"[Drowsy] {label} | Predicted probability: {prob:.3f}")
+        self.fatigue.update(eyes_closed=label == "Drowsy")
+        return self.result([Region("face", label, boxes[0], FACE_COLOR)], {"not_drowsy_prob": prob})
+
+    def caption(self, region):
+        return f"Face: {region.label}" if region.kind == "face" else region.label
+
+
+@register("drowsy-mt")
+class FourClassDetector(FaceDetectionMixin, CNNDetector):
+    """4-class MobileNetV3 on every hand crop, or on every tracked face when there is no hand"""
+
+    window_name = "Live Classification (Hand/Face)"
+    model_name = "drowsy-mt"
+    label_names = {
+        0: "Drowsy",
+        1: "Not Drowsy",
+        2: "Gesture A",
+        3: "Gesture B"
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._init_faces()
+        self._mark("mediapipe")
+        self._init_model("class_ids")
+        # The first face's "Drowsy" prediction feeds the shared fatigue state machine
+        self.fatigue = FatigueMonitor()
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        # The CNN classifies the hand crops itself, so any hand takes the frame
+        hand_boxes = [hand_box(hand_landmarks, width, height)
+                      for hand_landmarks in self.detect_hands(ctx, image_rgb) or ()]
+        crops, boxes = crop_regions(ctx.bgr, hand_boxes)
+        kind, color = "hand", HAND_COLOR
+        if crops:
+            self.on_hand()
+        else:
+            crops, boxes = self.tracked_faces(ctx, image_rgb, width, height)
+            kind, color = "face", FACE_COLOR
+
+        if not crops:
+            self.fatigue.no_face()
+            return self.result([])
+        preds = self.classifier.predict(crops)
+        features = None
+        if kind == "face":
+            self.fatigue.update(eyes_closed=self.label_names.get(preds[0]) == "Drowsy")
+            features = {"class_id": preds[0]}
+        return self.result([Region(kind, self.label_names.get(pred, "Unknown"), box, color)
+                            for pred, box in zip(preds, boxes)], features)
+
+    def caption(self, region):
+        return f"{region.kind.capitalize()}: {region.label}"
+
+
+@register("mtl")
+class MultiTaskDetector(FaceDetectionMixin, CNNDetector):
+    """MultiTaskMobileNet drowsy + yawn heads on every tracked face in one batch"""
+
+    model_name = "mtl"
+
+    # MultiTaskMobileNet head classes
+    DROWSY = 0
+    NOT_DROWSY = 1
+    NOT_YAWN = 0
+    YAWN = 1
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._init_faces()
+        self._mark("mediapipe")
+        self._init_model("softmax_heads")
+        # The first face's drowsy / yawn heads feed the shared fatigue state machine
+        self.fatigue = FatigueMonitor()
+
+    def state_label(self, drowsy_probs, yawn_probs):
+        drowsy_class = max(range(len(drowsy_probs)), key=drowsy_probs.__getitem__)
+        yawn_class = max(range(len(yawn_probs)), key=yawn_probs.__getitem__)
+        if drowsy_class == self.DROWSY:
+            return "Drowsy"
+        elif yawn_class == self.YAWN:
+            return "Tired"
+        return "Alert"
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        hand = self.gesture(self.detect_hands(ctx, image_rgb), width, height)
+        if hand:
+            self.on_hand()
+            return self.result([hand])
+
+        # ---- Face Tracking + Model Prediction ----
+        crops, boxes = self.tracked_faces(ctx, image_rgb, width, height)
+        if not crops:
+            self.fatigue.no_face()
+            return self.result([])
+
+        predictions = self.classifier.predict(crops)
+        regions = []
+        for (drowsy_probs, yawn_probs), box in zip(predictions, boxes):
+            label = self.state_label(drowsy_probs, yawn_probs)
+            if self.verbose:
+                print(f"[State] {label} | Drowsy Prob: {drowsy_probs} | Yawn Prob: {yawn_probs}")
+            regions.append(Region("face", label, box, FACE_COLOR))
+
+        drowsy_probs, yawn_probs = predictions[0]
+        self.fatigue.update(eyes_closed=drowsy_probs[self.DROWSY] > drowsy_probs[self.NOT_DROWSY],
+                            yawning=yawn_probs[self.YAWN] > yawn_probs[self.NOT_YAWN])
+        return self.result(regions, {"drowsy_prob": drowsy_probs[self.DROWSY], "yawn_prob": yawn_probs[self.YAWN]})
+
+    def caption(self, region):
+        return f"State: {region.label}" if region.kind == "face" else region.label
+
+
+# ---------------- Gestures Only ----------------
+@register("gesture")
+class GestureDetector(Detector):
+    """Fist / peace sign with a green box, otherwise the first face as "Head"; no fatigue tracking"""
+
+    face_task = "face_detection"
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("gate_hands", False)
+        super().__init__(**kwargs)
+        self.face_detection = self.solution("face_detection")
+        self._mark("mediapipe")
+
+    def process(self, frame):
+        ctx = self.context(frame)
+        image_rgb = self.to_rgb(ctx)
+        self.prefetch(ctx, image_rgb)
+        height, width = ctx.height, ctx.width
+
+        hand = self.gesture(self.detect_hands(ctx, image_rgb), width, height)
+        if hand:
+            return self.result([hand])
+        with self.metrics.stage("face_detection"):
+            detections = self.face_detection.process(image_rgb).detections
+        if detections:
+            return self.result([Region("face", "Head", detection_box(detections[0], width, height), FACE_COLOR)])
+        return self.result([])
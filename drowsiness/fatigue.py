@@ -0,0 +1,350 @@
+"""
+Streaming fatigue state machine shared by the detectors
+
+Every frame feeds one observation (eyes closed / yawning / head down, plus
+the raw EAR and head angle when the detector has landmarks) into
+FatigueMonitor. It keeps fixed-size time-binned ring buffers, so per-frame
+cost and memory do not depend on the window length, and derives:
+
+    perclos       fraction of face time with eyes closed over `window_s`
+    blink_rate    blinks per minute (closures shorter than `blink_max_s`)
+    blink_ms      mean blink duration
+    yawn_rate     yawns per minute (mouth open for at least `yawn_min_s`)
+    microsleeps   closures of at least `microsleep_s` inside the window
+
+The state is AWAKE, DROWSY or NO_FACE. DROWSY is entered when a sign (eyes
+closed, yawn, head down) is held for `sustain_s` (the old
+DROWSY_DURATION rule), when PERCLOS crosses its threshold, or after
+`microsleep_limit` microsleeps; transitions are debounced by `enter_s` /
+`exit_s` and reported to `on_transition(old, new, snapshot)`.
+
+    fatigue = FatigueMonitor(sustain_s=DROWSY_DURATION)
+    status = fatigue.update_features(face_features(...))   # or fatigue.update(eyes_closed=...)
+    status = fatigue.no_face()                              # frame without a face
+    if status.state == DROWSY: ...
+"""
+import collections
+import math
+import time
+
+AWAKE = "awake"
+DROWSY = "drowsy"
+NO_FACE = "no_face"
+
+FatigueSnapshot = collections.namedtuple(
+    "FatigueSnapshot",
+    "state changed reason perclos blink_rate blink_ms yawn_rate microsleeps mean_ear mean_head_angle eyes_closed_s")
+
+
+class RollingWindow:
+    """
+    Time-bounded window of (value, weight) samples in a fixed-size ring
+
+    Samples closer than `resolution` seconds to the newest bin are merged into
+    it, so capacity is window_s / resolution whatever the frame rate. Sums are
+    maintained incrementally; push and evict are O(1) amortized.
+    """
+
+    def __init__(self, window_s, resolution=0.1):
+        self.window_s = window_s
+        self.resolution = resolution
+        self.capacity = int(math.ceil(window_s / resolution)) + 1
+        self._times = [0.0] * self.capacity
+        self._values = [0.0] * self.capacity
+        self._weights = [0.0] * self.capacity
+        self._head = 0  # next slot to write
+        self._size = 0
+        self.total = 0.0
+        self.weight = 0.0
+
+    def __len__(self):
+        return self._size
+
+    def _tail(self):
+        return (self._head - self._size) % self.capacity
+
+    def _drop_oldest(self):
+        tail = self._tail()
+        self.total -= self._values[tail]
+        self.weight -= self._weights[tail]
+        self._size -= 1
+
+    def _resum(self):
+        # Re-add from scratch once per lap so float error cannot accumulate
+        slots = [(self._tail() + i) % self.capacity for i in range(self._size)]
+        self.total = sum(self._values[i] for i in slots)
+        self.weight = sum(self._weights[i] for i in slots)
+
+    def push(self, timestamp, value, weight=1.0):
+        newest = (self._head - 1) % self.capacity
+        lap = False
+        if self._size and timestamp - self._times[newest] < self.resolution:
+            self._values[newest] += value
+            self._weights[newest] += weight
+        else:
+            if self._size == self.capacity:
+                self._drop_oldest()
+            self._times[self._head] = timestamp
+            self._values[self._head] = value
+            self._weights[self._head] = weight
+            self._head = (self._head + 1) % self.capacity
+            self._size += 1
+            lap = self._head == 0
+        self.total += value
+        self.weight += weight
+        if lap:
+            self._resum()
+        self.evict(timestamp)
+
+    def evict(self, now):
+        while self._size and self._times[self._tail()] <= now - self.window_s:
+            self._drop_oldest()
+
+    def span(self, now):
+        """Seconds covered by the window contents"""
+        return now - self._times[self._tail()] if self._size else 0.0
+
+    def mean(self, default=0.0):
+        return self.total / self.weight if self.weight > 0 else default
+
+
+class FatigueMonitor:
+    """
+    Args:
+        ear_threshold: EAR below which the eyes count as closed (update_features)
+        yawn_threshold: lip distance in pixels above which the mouth counts as yawning
+        head_threshold: |roll| in degrees that counts as head down, None to ignore the head
+        sustain_s: seconds a sign must be held continuously to become DROWSY
+        window_s: length of the rolling PERCLOS / blink / yawn window
+        perclos_threshold: PERCLOS that makes the driver DROWSY
+        perclos_hysteresis: PERCLOS must drop this far below the threshold to clear it
+        min_coverage_s: window seconds needed before PERCLOS is trusted
+        blink_max_s: longest closure still counted as a blink
+        microsleep_s: shortest closure counted as a microsleep
+        microsleep_limit: microsleeps inside the window that make the driver DROWSY
+        yawn_min_s: shortest mouth opening counted as a yawn
+        enter_s / exit_s: how long the raw decision must hold before entering / leaving DROWSY
+        no_face_timeout: seconds without a face before NO_FACE
+        max_gap_s: longest frame gap credited to a sample (e.g. after the face was lost)
+        resolution: ring buffer bin width in seconds
+        on_transition: optional callable(old_state, new_state, snapshot)
+        clock: time source used when update() gets no timestamp
+    """
+
+    def __init__(self, ear_threshold=0.25, yawn_threshold=25.0, head_threshold=15.0, sustain_s=2.0,
+                 window_s=60.0, perclos_threshold=0.15, perclos_hysteresis=0.03, min_coverage_s=10.0,
+                 blink_max_s=0.5, microsleep_s=1.0, microsleep_limit=2, yawn_min_s=1.0,
+                 enter_s=0.0, exit_s=1.0, no_face_timeout=2.0, max_gap_s=0.5, resolution=0.1,
+                 on_transition=None, clock=time.monotonic):
+        self.ear_threshold = ear_threshold
+        self.yawn_threshold = yawn_threshold
+        self.head_threshold = head_threshold
+        self.sustain_s = sustain_s
+        self.perclos_threshold = perclos_threshold
+        self.perclos_hysteresis = perclos_hysteresis
+        self.min_coverage_s = min(min_coverage_s, window_s)
+        self.blink_max_s = blink_max_s
+        self.microsleep_s = microsleep_s
+        self.microsleep_limit = microsleep_limit
+        self.yawn_min_s = yawn_min_s
+        self.enter_s = enter_s
+        self.exit_s = exit_s
+        self.no_face_timeout = no_face_timeout
+        self.max_gap_s = max_gap_s
+        self.on_transition = on_transition
+        self.clock = clock
+
+        # Per-frame signals, weighted by frame duration
+        self.closed = RollingWindow(window_s, resolution)
+        self.ear = RollingWindow(window_s, resolution)
+        self.head_angle = RollingWindow(window_s, resolution)
+        # Events: value = duration in seconds, weight = 1
+        self.blinks = RollingWindow(window_s, resolution)
+        self.yawns = RollingWindow(window_s, resolution)
+        self.microsleeps = RollingWindow(window_s, resolution)
+
+        self.state = AWAKE
+        self.reason = None
+        self.frames = 0
+        self.transitions = 0
+
+        self._last_time = None
+        self._closed_since = None
+        self._microsleep_counted = False
+        self._yawn_since = None
+        self._yawn_counted = False
+        self._sign_since = None
+        self._pending_since = None
+        self._perclos_high = False
+        self._no_face_since = None
+        self.last = self._snapshot(0.0, False)
+
+    # ---------------- Episodes ----------------
+    def _track_closure(self, now, eyes_closed):
+        if eyes_closed:
+            if self._closed_since is None:
+                self._closed_since = now
+                self._microsleep_counted = False
+            elif not self._microsleep_counted and now - self._closed_since >= self.microsleep_s:
+                self.microsleeps.push(now, now - self._closed_since)
+                self._microsleep_counted = True
+        elif self._closed_since is not None:
+            duration = now - self._closed_since
+            if duration <= self.blink_max_s:
+                self.blinks.push(now, duration)
+            self._closed_since = None
+
+    def _track_yawn(self, now, yawning):
+        if not yawning:
+            self._yawn_since = None
+        elif self._yawn_since is None:
+            self._yawn_since = now
+            self._yawn_counted = False
+        elif not self._yawn_counted and now - self._yawn_since >= self.yawn_min_s:
+            self.yawns.push(now, now - self._yawn_since)
+            self._yawn_counted = True
+
+    def _end_episodes(self):
+        self._closed_since = None
+        self._yawn_since = None
+        self._sign_since = None
+
+    # ---------------- Decision ----------------
+    def _raw_decision(self, now, sign):
+        if sign:
+            if self._sign_since is None:
+                self._sign_since = now
+        else:
+            self._sign_since = None
+        if sign and now - self._sign_since >= self.sustain_s:
+            return "sustained"
+
+        perclos = self.closed.mean()
+        if self.closed.span(now) >= self.min_coverage_s:
+            limit = self.perclos_threshold - (self.perclos_hysteresis if self._perclos_high else 0.0)
+            self._perclos_high = perclos >= limit
+            if self._perclos_high:
+                return "perclos"
+        if self.microsleeps.weight >= self.microsleep_limit:
+            return "microsleeps"
+        return None
+
+    def _debounce(self, now, target, reason):
+        if target == self.state:
+            self._pending_since = None
+            if target == DROWSY:
+                self.reason = reason
+            return False
+        if self._pending_since is None:
+            self._pending_since = now
+        hold = self.enter_s if target == DROWSY else self.exit_s
+        if self.state == NO_FACE or now - self._pending_since >= hold:
+            self._pending_since = None
+            self._set_state(target, reason, now)
+            return True
+        return False
+
+    def _set_state(self, state, reason, now):
+        old = self.state
+        self.state = state
+        self.reason = reason
+        self.transitions += 1
+        self.last = self._snapshot(now, True)
+        if self.on_transition is not None:
+            self.on_transition(old, state, self.last)
+
+    def _snapshot(self, now, changed):
+        # Rates over the covered part of the window, not yet full at start-up
+        minutes = max(self.closed.span(now), self.min_coverage_s) / 60.0
+        return FatigueSnapshot(
+            state=self.state,
+            changed=changed,
+            reason=self.reason,
+            perclos=self.closed.mean(),
+            blink_rate=self.blinks.weight / minutes,
+            blink_ms=1000.0 * self.blinks.mean(),
+            yawn_rate=self.yawns.weight / minutes,
+            microsleeps=int(self.microsleeps.weight),
+            mean_ear=self.ear.mean(None),
+            mean_head_angle=self.head_angle.mean(None),
+            eyes_closed_s=now - self._closed_since if self._closed_since is not None else 0.0,
+        )
+
+    # ---------------- Public API ----------------
+    def update(self, eyes_closed, yawning=False, head_down=False, ear=None, head_angle=None, timestamp=None):
+        """Feed one frame with a face; returns a FatigueSnapshot"""
+        now = self.clock() if timestamp is None else timestamp
+        dt = 0.0 if self._last_time is None else min(max(now - self._last_time, 0.0), self.max_gap_s)
+        self._last_time = now
+        self._no_face_since = None
+        self.frames += 1
+
+        self.closed.push(now, dt if eyes_closed else 0.0, dt)
+        if ear is not None:
+            self.ear.push(now, ear * dt, dt)
+        if head_angle is not None:
+            self.head_angle.push(now, abs(head_angle) * dt, dt)
+        for window in (self.blinks, self.yawns, self.microsleeps):
+            window.evict(now)
+        self._track_closure(now, eyes_closed)
+        self._track_yawn(now, yawning)
+
+        reason = self._raw_decision(now, eyes_closed or yawning or head_down)
+        changed = self._debounce(now, DROWSY if reason else AWAKE, reason)
+        if not changed:
+            self.last = self._snapshot(now, False)
+        return self.last
+
+    def update_features(self, features, timestamp=None):
+        """update() from drowsiness.landmarks.FaceFeatures using the configured thresholds"""
+        head_down = self.head_threshold is not None and abs(features.roll) > self.head_threshold
+        return self.update(features.ear < self.ear_threshold, features.lip_distance > self.yawn_threshold,
+                           head_down, ear=features.ear, head_angle=features.roll, timestamp=timestamp)
+
+    def no_face(self, timestamp=None):
+        """Feed one frame without a face; NO_FACE after `no_face_timeout` seconds"""
+        now = self.clock() if timestamp is None else timestamp
+        self.frames += 1
+        self._end_episodes()
+        if self._no_face_since is None:
+            self._no_face_since = now
+        changed = False
+        if self.state != NO_FACE and now - self._no_face_since >= self.no_face_timeout:
+            self._set_state(NO_FACE, "no_face", now)
+            changed = True
+        if not changed:
+            self.last = self._snapshot(now, False)
+        return self.last
+
+    def pause(self):
+        """The face was not measured for a known reason (e.g. a hand gesture took the frame)"""
+        self._no_face_since = None
+        self._end_episodes()
+
+    def risk(self, snapshot=None):
+        """0 (alert) .. 1 (drowsy): PERCLOS against its threshold, or an ongoing closure against sustain_s"""
+        s = snapshot or self.last
+        if s.state == DROWSY:
+            return 1.0
+        if s.state == NO_FACE:
+            return 0.0
+        return min(1.0, max(s.perclos / self.perclos_threshold, s.eyes_closed_s / self.sustain_s))
+
+    def describe(self, snapshot=None):
+        """One-line status for an on-screen overlay"""
+        s = snapshot or self.last
+        return (f"Fatigue: {s.state} | PERCLOS {100 * s.perclos:.0f}% | "
+                f"{s.blink_rate:.0f} blinks/min | {s.yawn_rate:.1f} yawns/min")
+
+    def summary(self):
+        s = self.last
+        return {
+            "frames": self.frames,
+            "state": s.state,
+            "transitions": self.transitions,
+            "perclos": round(s.perclos, 3),
+            "blink_rate_per_min": round(s.blink_rate, 1),
+            "blink_ms": round(s.blink_ms, 1),
+            "yawn_rate_per_min": round(s.yawn_rate, 2),
+            "microsleeps": s.microsleeps,
+        }
@@ -0,0 +1,311 @@
+"""
+Per-frame context: convert once, share across stages
+
+Every stage used to derive its own copy of the frame: the RGB image for
+MediaPipe, a 1/8 scale copy plus its grey and YCrCb versions in the HandGate and
+a full-size grey image in the FaceTracker. FrameContext computes each view
+lazily on first use and caches it for the rest of the frame:
+
+    ctx = FrameContext(frame, pool, detect_width=320)
+    ctx.rgb()                  MediaPipe input at detect_width (normalized landmarks map to ctx.bgr)
+    ctx.gray()                 full-resolution grey
+    ctx.resized(0.125)         downscaled BGR, INTER_AREA
+    ctx.convert(image, code)   any cv2 colour conversion of one of the above, cached
+
+Outputs are written into buffers from a BufferPool, so steady-state frames
+allocate (almost) nothing. Ownership is explicit: a pool serves one frame at
+a time, and creating the next FrameContext on it returns every buffer of the
+previous frame. A view that has to outlive its frame (the tracker's previous
+grey image) is kept with ctx.keep() and released by its owner:
+
+    self.prev_gray = ctx.keep(ctx.gray())    # later: ctx.pool.release(self.prev_gray)
+
+Components take either a plain BGR array or a FrameContext (as_context),
+so older callers keep working. `mirror=True` flips the frame once, into a
+pooled buffer, before anything else sees it.
+
+    python -m drowsiness.frame --frames 300 --size 1280x720
+
+compares bytes allocated and time per frame for the old per-stage
+conversions and the shared context.
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+class BufferPool:
+    """
+    Reusable NumPy output buffers keyed by (name, shape, dtype)
+
+    get() leases a free buffer to the current frame; next_frame() (called by
+    FrameContext) returns the leases of the previous frame to the free lists.
+    hold() keeps a leased buffer out of the pool until a matching release(),
+    for views that live longer than one frame. Only buffers still leased to
+    the current frame can be held; other arrays pass through untouched.
+
+    Args:
+        max_per_key: free buffers kept per key; extra returned buffers are left to the GC
+    """
+
+    def __init__(self, max_per_key=3):
+        self.max_per_key = max_per_key
+        self._free = {}
+        self._leased = []
+        self._held = {}
+        self.generation = 0
+        self.allocations = 0
+        self.reuses = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        free = self._free.get(key)
+        if free:
+            buffer = free.pop()
+            self.reuses += 1
+        else:
+            buffer = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        self._leased.append((key, buffer))
+        return buffer
+
+    def _recycle(self, key, buffer):
+        free = self._free.setdefault(key, [])
+        if len(free) < self.max_per_key:
+            free.append(buffer)
+
+    def _leased_now(self, buffer):
+        return any(leased is buffer for _, leased in self._leased)
+
+    def next_frame(self):
+        """End the current frame: its buffers become free unless held"""
+        leased, self._leased = self._leased, []
+        for key, buffer in leased:
+            if id(buffer) not in self._held:
+                self._recycle(key, buffer)
+        self.generation += 1
+
+    def hold(self, buffer):
+        """Keep `buffer` past the current frame; returns it"""
+        entry = self._held.get(id(buffer))
+        if entry is not None:
+            entry[2] += 1
+            return buffer
+        for key, leased in self._leased:
+            if leased is buffer:
+                self._held[id(buffer)] = [key, buffer, 1]
+                break
+        return buffer
+
+    def release(self, buffer):
+        """Undo one hold(); None and arrays that are not held are ignored"""
+        entry = self._held.get(id(buffer))
+        if entry is None or entry[1] is not buffer:
+            return
+        entry[2] -= 1
+        if entry[2] == 0:
+            del self._held[id(buffer)]
+            # Still leased: next_frame() recycles it
+            if not self._leased_now(buffer):
+                self._recycle(entry[0], buffer)
+
+    def summary(self):
+        total = self.allocations + self.reuses
+        buffers = {id(b): b for free in self._free.values() for b in free}
+        buffers.update((id(b), b) for _, b in self._leased)
+        buffers.update((id(entry[1]), entry[1]) for entry in self._held.values())
+        return {
+            "buffers": len(buffers),
+            "held": len(self._held),
+            "bytes": sum(buffer.nbytes for buffer in buffers.values()),
+            "reuse_pct": round(100.0 * self.reuses / total, 1) if total else 0.0,
+        }
+
+
+class FrameContext:
+    """
+    Lazily computed, cached views of one BGR frame
+
+    Creating a context on a pool starts a new frame on it (BufferPool.next_frame),
+    so views of the previous context must not be used afterwards unless kept.
+
+    Args:
+        frame: BGR image from the source
+        pool: optional BufferPool for the outputs; None allocates like plain cv2 calls
+        detect_width: width of the MediaPipe input, None for full size
+        mirror: flip horizontally (selfie view) before any other view is made
+    """
+
+    __slots__ = ("bgr", "height", "width", "pool", "detect_width", "_cache")
+
+    def __init__(self, frame, pool=None, detect_width=None, mirror=False):
+        self.pool = pool
+        self.detect_width = detect_width
+        self._cache = {}
+        if pool is not None:
+            pool.next_frame()
+        if mirror:
+            frame = cv2.flip(frame, 1, dst=self._buffer("mirror", frame.shape))
+        self.bgr = frame
+        self.height, self.width = frame.shape[:2]
+
+    def _buffer(self, name, shape, dtype=np.uint8):
+        if self.pool is None:
+            return None
+        return self.pool.get(name, shape, dtype)
+
+    def keep(self, image):
+        """Hold a view of this frame past it (BufferPool.hold); returns `image`"""
+        return image if self.pool is None else self.pool.hold(image)
+
+    # ---------------- Views ----------------
+    def resized(self, scale=None, width=None):
+        """BGR frame scaled by `scale` or to `width` (aspect kept); the frame itself when not smaller"""
+        if width is None:
+            width = max(1, int(round(self.width * scale)))
+        if width >= self.width:
+            return self.bgr
+        key = ("resized", width)
+        image = self._cache.get(key)
+        if image is None:
+            height = max(1, int(round(self.height * width / self.width)))
+            image = cv2.resize(self.bgr, (width, height), dst=self._buffer(key, (height, width, 3)),
+                               interpolation=cv2.INTER_AREA)
+            self._cache[key] = image
+        return image
+
+    def convert(self, image, code, name=None):
+        """cv2.cvtColor(image, code), cached per (name or source image, code) for this frame"""
+        key = ("convert", name or id(image), code)
+        cached = self._cache.get(key)
+        # An unnamed entry only matches the very array it was made from
+        if cached is not None and (name or cached[0] is image):
+            return cached[1]
+        channels = 1 if code in (cv2.COLOR_BGR2GRAY, cv2.COLOR_RGB2GRAY) else 3
+        shape = image.shape[:2] if channels == 1 else image.shape[:2] + (channels,)
+        converted = cv2.cvtColor(image, code, dst=self._buffer(("convert", name, code), shape))
+        self._cache[key] = (image, converted)
+        return converted
+
+    def detect_bgr(self):
+        """The BGR frame at detect_width"""
+        if not self.detect_width:
+            return self.bgr
+        return self.resized(width=self.detect_width)
+
+    def rgb(self):
+        """MediaPipe input: RGB at detect_width"""
+        return self.convert(self.detect_bgr(), cv2.COLOR_BGR2RGB)
+
+    def gray(self):
+        """Full-resolution grey (true BGR weights, for tracking)"""
+        return self.convert(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    def crop(self, box):
+        """View of the BGR frame inside a clamped (x_min, y_min, x_max, y_max) box"""
+        x_min, y_min = max(0, int(box[0])), max(0, int(box[1]))
+        x_max, y_max = min(self.width, int(box[2])), min(self.height, int(box[3]))
+        return self.bgr[y_min:y_max, x_min:x_max]
+
+
+def as_context(frame):
+    """Accept a FrameContext or a plain BGR array (wrapped, without a pool)"""
+    return frame if isinstance(frame, FrameContext) else FrameContext(frame)
+
+
+# ---------------- Allocation benchmark ----------------
+def _legacy_frame(frame, state, detect_width, preprocess, face_box):
+    """The per-stage conversions as the detectors did them before FrameContext"""
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (detect_width, int(round(height * detect_width / width))),
+                       interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(small, cv2.COLOR_BGR2RGB)                                     # MediaPipe input
+    gate = cv2.resize(frame, None, fx=0.125, fy=0.125, interpolation=cv2.INTER_AREA)
+    gate_gray = cv2.cvtColor(gate, cv2.COLOR_BGR2GRAY)                         # HandGate motion
+    cv2.cvtColor(gate, cv2.COLOR_BGR2YCrCb)                                    # HandGate skin
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)                             # FaceTracker
+    if state.get("prev_gray") is not None:
+        for points in state["tracks"]:                                         # one LK call per face
+            cv2.calcOpticalFlowPyrLK(state["prev_gray"], gray, points, None,
+                                     winSize=(15, 15), maxLevel=2)
+    state["prev_gray"], state["prev_gate"] = gray, gate_gray
+    preprocess.batch([frame[face_box[1]:face_box[3], face_box[0]:face_box[2]]])
+
+
+def _shared_frame(frame, state, detect_width, preprocess, face_box, pool):
+    ctx = FrameContext(frame, pool, detect_width=detect_width)
+    ctx.rgb()
+    gate = ctx.resized(0.125)
+    gate_gray = ctx.convert(gate, cv2.COLOR_BGR2GRAY, "gate_gray")
+    ctx.convert(gate, cv2.COLOR_BGR2YCrCb, "gate_skin")
+    gray = ctx.gray()
+    if state.get("prev_gray") is not None:
+        # FaceTracker sends every face's points through one call: one pyramid per frame
+        cv2.calcOpticalFlowPyrLK(state["prev_gray"], gray, np.concatenate(state["tracks"]), None,
+                                 winSize=(15, 15), maxLevel=2)
+    pool.release(state.get("prev_gray"))
+    pool.release(state.get("prev_gate"))
+    state["prev_gray"], state["prev_gate"] = ctx.keep(gray), ctx.keep(gate_gray)
+    preprocess.batch([ctx.crop(face_box)])
+
+
+def _measure(step, frames):
+    """Mean traced bytes allocated (peak over the frame) and mean ms per frame"""
+    tracemalloc.start()
+    peaks, times = [], []
+    try:
+        for frame in frames:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            step(frame)
+            times.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    # The first frames fill the pool
+    steady = slice(min(3, len(frames) - 1), None)
+    return {
+        "bytes_per_frame": int(np.mean(peaks[steady])),
+        "ms_per_frame": round(1000.0 * float(np.mean(times[steady])), 3),
+    }
+
+
+def main(argv=None):
+    from drowsiness.preprocess import CropPreprocessor
+    from drowsiness.sources import SyntheticSource
+
+    parser = argparse.ArgumentParser(description="Bytes allocated per frame: per-stage conversions vs FrameContext")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="1280x720", help="frame WxH")
+    parser.add_argument("--detect-width", type=int, default=320)
+    parser.add_argument("--faces", type=int, default=2, help="tracked faces (one LK call each before, one in total after)")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    frames = list(SyntheticSource(args.frames, width, height))
+    face_box = (width // 3, height // 5, 2 * width // 3, 4 * height // 5)
+    rng = np.random.RandomState(0)
+    tracks = [(rng.rand(40, 1, 2) * [face_box[2] - face_box[0], face_box[3] - face_box[1]]
+               + face_box[:2]).astype(np.float32) for _ in range(args.faces)]
+
+    legacy_state, shared_state, pool = {"tracks": tracks}, {"tracks": tracks}, BufferPool()
+    preprocess = CropPreprocessor((128, 128), max_batch_size=1)
+    report = {
+        "frame": f"{width}x{height}",
+        "legacy": _measure(lambda f: _legacy_frame(f, legacy_state, args.detect_width, preprocess, face_box),
+                           frames),
+        "shared": _measure(lambda f: _shared_frame(f, shared_state, args.detect_width, preprocess, face_box,
+                                                   pool), frames),
+        "pool": pool.summary(),
+    }
+    for key, value in report.items():
+        print(f"[{key}]", value)
+    return report
+
+
+if __name__ == "__main__":
+    main()
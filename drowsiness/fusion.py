@@ -0,0 +1,454 @@
+"""
+IMU + vision fusion for drowsiness and crash detection
+
+The MPU-6050 used to be only an on/off switch for the camera. FusionEngine
+feeds the IMU stream through constant-time filters and lines it up with the
+per-frame face features:
+
+    steering    yaw rate about the gravity axis (independent of how the board
+                is mounted), low-passed; swings of `correction_dps` count as
+                steering corrections, sign reversals beyond `weave_dps` inside
+                `weave_window_s` as lane weaving
+    impact      linear acceleration above `impact_g` (crash), or horizontal
+                deceleration above `brake_g` held for `brake_s` (hard brake);
+                reported straight from the IMU thread through `on_event`, so a
+                crash alert does not wait for the camera
+    adaptation  vibration RMS lowers the EAR threshold (a shaking camera makes
+                EAR noisy), speed shortens the sustain time, and weaving or
+                steering inactivity shortens it further and lets an elevated
+                PERCLOS count as drowsy
+
+IMU state is binned every `bin_s` into a bounded history; each frame is
+aligned with the newest bin not after its capture time (minus
+`video_delay_s`), so frames and samples from the FIFO (which arrive in
+bursts) are compared at the same moment. Memory is bounded by history_s and
+the per-frame cost is measured against `budget_us`.
+
+    fusion = FusionEngine(fatigue, motion_sensor.engine, on_event=handle)
+    motion_sensor.on_block = fusion.update_block    # ImuStream drain thread
+    snapshot = fusion.update_features(features)      # inference thread
+
+Paired recordings (IMU trace + face features) replay offline:
+
+    python -m drowsiness.fusion --imu imu.csv --features features.csv
+    python -m drowsiness.fusion --synthetic
+"""
+import argparse
+import collections
+import json
+import math
+import threading
+import time
+
+import numpy as np
+
+from drowsiness.fatigue import DROWSY, RollingWindow
+from drowsiness.landmarks import FaceFeatures
+from drowsiness.motion import DRIVING, PARKED, VehicleStateEngine, load_trace, synthetic_trace
+from drowsiness.pipeline import StageStats
+
+IMPACT = "impact"
+HARD_BRAKE = "hard_brake"
+WEAVING = "weaving"
+STEERING_IDLE = "steering_idle"
+
+FusionSnapshot = collections.namedtuple(
+    "FusionSnapshot",
+    "fatigue drowsy reason vehicle_state weaving steering_idle_s ear_threshold sustain_s imu_lag_ms events")
+
+# IMU state at one bin boundary
+_Bin = collections.namedtuple("_Bin", "t vehicle_state vibration weaving steering_idle_s")
+
+
+class FusionEngine:
+    """
+    Args:
+        fatigue: FatigueMonitor whose ear_threshold / sustain_s are adapted per frame
+        motion: VehicleStateEngine fed elsewhere (e.g. MPU6050.engine); None feeds an own one
+        history_s / bin_s: length and resolution of the aligned IMU history
+        video_delay_s: capture-to-processing delay subtracted from frame timestamps
+        gravity_tau / yaw_tau: low-pass time constants in seconds
+        correction_dps: yaw-rate swing that counts as a steering correction
+        weave_dps / weave_window_s / weave_reversals: yaw reversals that count as weaving
+        idle_steering_s: seconds of driving without a correction that count as steering inactivity
+        impact_g: linear acceleration magnitude of an impact
+        brake_g / brake_s: horizontal deceleration held this long is a hard brake
+        vibration_ear_gain / max_ear_drop: EAR threshold drop per g of vibration RMS, and its cap
+        speed_ref_kph / min_sustain_scale: above speed_ref the sustain time scales by speed_ref / speed
+        risk_sustain_scale: sustain time factor while weaving or steering is inactive
+        risk_perclos: fraction of fatigue.perclos_threshold that is drowsy while weaving / inactive
+        budget_us: per-frame cost budget; overruns are counted in summary()
+        on_event: optional callable(kind, timestamp, value), called on the IMU thread
+        clock: time source for frames without a timestamp, same clock as the IMU stream
+    """
+
+    def __init__(self, fatigue, motion=None, history_s=10.0, bin_s=0.05, video_delay_s=0.05,
+                 gravity_tau=1.0, yaw_tau=0.3, correction_dps=1.0,
+                 weave_dps=4.0, weave_window_s=20.0, weave_reversals=4, idle_steering_s=15.0,
+                 impact_g=2.5, brake_g=0.5, brake_s=0.3,
+                 vibration_ear_gain=0.5, max_ear_drop=0.03, speed_ref_kph=50.0, min_sustain_scale=0.5,
+                 risk_sustain_scale=0.6, risk_perclos=0.5, budget_us=500.0, on_event=None,
+                 clock=time.monotonic):
+        self.fatigue = fatigue
+        self.motion = motion or VehicleStateEngine()
+        self._feed_motion = motion is None
+        self.bin_s = bin_s
+        self.video_delay_s = video_delay_s
+        self.gravity_tau = gravity_tau
+        self.yaw_tau = yaw_tau
+        self.correction_dps = correction_dps
+        self.weave_dps = weave_dps
+        self.weave_reversals = weave_reversals
+        self.idle_steering_s = idle_steering_s
+        self.impact_g = impact_g
+        self.brake_g = brake_g
+        self.brake_s = brake_s
+        self.vibration_ear_gain = vibration_ear_gain
+        self.max_ear_drop = max_ear_drop
+        self.speed_ref_kph = speed_ref_kph
+        self.min_sustain_scale = min_sustain_scale
+        self.risk_sustain_scale = risk_sustain_scale
+        self.risk_perclos = risk_perclos
+        self.budget_us = budget_us
+        self.on_event = on_event
+        self.clock = clock
+
+        self.base_ear_threshold = fatigue.ear_threshold
+        self.base_sustain_s = fatigue.sustain_s
+        self.speed_kph = None
+
+        # IMU thread state
+        self._lock = threading.Lock()
+        self._bins = collections.deque(maxlen=int(math.ceil(history_s / bin_s)))
+        self._events = collections.deque(maxlen=32)
+        self.reversals = RollingWindow(weave_window_s, resolution=0.1)
+        self._gravity = None
+        self._last_imu_time = None
+        self._yaw = 0.0
+        self._yaw_anchor = 0.0
+        self._yaw_sign = 0
+        self._last_correction = None
+        self._brake_since = None
+        self._braking = False
+        self._last_impact = -math.inf
+        self._idle_reported = False
+        self._weaving = False
+
+        self.imu_samples = 0
+        self.event_counts = collections.Counter()
+        self.max_steering_idle_s = 0.0
+        self.frames = 0
+        self.overruns = 0
+        self.frame_cost = StageStats(window=500)
+        self.block_cost = StageStats(window=100)
+        self.imu_lag = StageStats(window=500)
+        self.last = None
+
+    # ---------------- IMU side ----------------
+    def _event(self, kind, t, value):
+        self.event_counts[kind] += 1
+        with self._lock:
+            self._events.append((kind, t, value))
+        if self.on_event is not None:
+            self.on_event(kind, t, value)
+
+    def update_sample(self, t, ax, ay, az, gx, gy, gz):
+        """One IMU sample: seconds, g, deg/s"""
+        dt = 0.0 if self._last_imu_time is None else max(0.0, t - self._last_imu_time)
+        previous = self._last_imu_time
+        self._last_imu_time = t
+        self.imu_samples += 1
+        if self._feed_motion:
+            self.motion.update(t, ax, ay, az, gx, gy, gz)
+
+        if self._gravity is None:
+            self._gravity = [ax, ay, az]
+            self._last_correction = t
+        else:
+            k = dt / (self.gravity_tau + dt)
+            gravity = self._gravity
+            gravity[0] += k * (ax - gravity[0])
+            gravity[1] += k * (ay - gravity[1])
+            gravity[2] += k * (az - gravity[2])
+        gx_, gy_, gz_ = self._gravity
+        norm = math.sqrt(gx_ * gx_ + gy_ * gy_ + gz_ * gz_) or 1.0
+        ux, uy, uz = gx_ / norm, gy_ / norm, gz_ / norm
+        lx, ly, lz = ax - gx_, ay - gy_, az - gz_
+
+        # Crash: any direction, once per second
+        magnitude = math.sqrt(lx * lx + ly * ly + lz * lz)
+        if magnitude >= self.impact_g and t - self._last_impact >= 1.0:
+            self._last_impact = t
+            self._event(IMPACT, t, magnitude)
+
+        # Hard brake: horizontal part of the linear acceleration, held
+        vertical = lx * ux + ly * uy + lz * uz
+        horizontal = math.sqrt(max(0.0, magnitude * magnitude - vertical * vertical))
+        if horizontal >= self.brake_g:
+            if self._brake_since is None:
+                self._brake_since = t
+            if not self._braking and t - self._brake_since >= self.brake_s:
+                self._braking = True
+                self._event(HARD_BRAKE, t, horizontal)
+        else:
+            self._brake_since = None
+            self._braking = False
+
+        # Steering: yaw rate about gravity, low-passed
+        yaw_rate = gx * ux + gy * uy + gz * uz
+        self._yaw += (dt / (self.yaw_tau + dt)) * (yaw_rate - self._yaw)
+        if abs(self._yaw - self._yaw_anchor) >= self.correction_dps:
+            self._yaw_anchor = self._yaw
+            self._last_correction = t
+            self._idle_reported = False
+        sign = 1 if self._yaw > self.weave_dps else -1 if self._yaw < -self.weave_dps else 0
+        if sign and sign != self._yaw_sign:
+            if self._yaw_sign:
+                self.reversals.push(t, 1.0)
+            self._yaw_sign = sign
+        self.reversals.evict(t)
+
+        driving = self.motion.state == DRIVING
+        steering_idle_s = t - self._last_correction if driving else 0.0
+        if driving:
+            self.max_steering_idle_s = max(self.max_steering_idle_s, steering_idle_s)
+            if steering_idle_s >= self.idle_steering_s and not self._idle_reported:
+                self._idle_reported = True
+                self._event(STEERING_IDLE, t, steering_idle_s)
+        else:
+            # Parked / idle: no steering expected
+            self._last_correction = t
+        weaving = driving and self.reversals.weight >= self.weave_reversals
+        if weaving and not self._weaving:
+            self._event(WEAVING, t, self.reversals.weight)
+        self._weaving = weaving
+
+        if previous is None or not self._bins or t - self._bins[-1].t >= self.bin_s:
+            entry = _Bin(t, self.motion.state, self.motion.last.accel_rms, weaving, steering_idle_s)
+            with self._lock:
+                self._bins.append(entry)
+
+    def update_block(self, block):
+        """Feed an imu.ImuBlock (MPU6050.on_block / ImuStream on_block)"""
+        start = time.perf_counter()
+        for t, (ax, ay, az), (gx, gy, gz) in zip(block.timestamps.tolist(), block.accel.tolist(),
+                                                  block.gyro.tolist()):
+            self.update_sample(t, ax, ay, az, gx, gy, gz)
+        if len(block.timestamps):
+            self.block_cost.add((time.perf_counter() - start) / len(block.timestamps))
+
+    # ---------------- Frame side ----------------
+    def _aligned(self, t):
+        """Newest bin at or before t (bins are few per frame back), and the IMU lag in ms"""
+        with self._lock:
+            if not self._bins:
+                return None, None
+            newest = self._bins[-1]
+            for entry in reversed(self._bins):
+                if entry.t <= t:
+                    return entry, 1000.0 * (t - newest.t)
+            return self._bins[0], 1000.0 * (t - newest.t)
+
+    def set_speed(self, kph):
+        """Vehicle speed from an external source (OBD, GPS); None when unknown"""
+        self.speed_kph = kph
+
+    def _adapt(self, entry):
+        fatigue = self.fatigue
+        vibration = entry.vibration if entry is not None else 0.0
+        fatigue.ear_threshold = self.base_ear_threshold - min(self.max_ear_drop, self.vibration_ear_gain * vibration)
+        scale = 1.0
+        if self.speed_kph and self.speed_kph > self.speed_ref_kph:
+            scale = max(self.min_sustain_scale, self.speed_ref_kph / self.speed_kph)
+        risky = entry is not None and (entry.weaving or entry.steering_idle_s >= self.idle_steering_s)
+        if risky:
+            scale *= self.risk_sustain_scale
+        fatigue.sustain_s = self.base_sustain_s * scale
+        return risky
+
+    def _finish(self, start, snapshot, entry, lag_ms, risky):
+        drowsy, reason = snapshot.state == DROWSY, snapshot.reason
+        if not drowsy and risky and snapshot.perclos >= self.risk_perclos * self.fatigue.perclos_threshold:
+            drowsy, reason = True, "weaving" if entry.weaving else "steering_idle"
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        self.last = FusionSnapshot(
+            fatigue=snapshot,
+            drowsy=drowsy,
+            reason=reason,
+            vehicle_state=entry.vehicle_state if entry is not None else PARKED,
+            weaving=entry is not None and entry.weaving,
+            steering_idle_s=entry.steering_idle_s if entry is not None else 0.0,
+            ear_threshold=self.fatigue.ear_threshold,
+            sustain_s=self.fatigue.sustain_s,
+            imu_lag_ms=lag_ms,
+            events=events,
+        )
+        self.frames += 1
+        if lag_ms is not None:
+            self.imu_lag.add(lag_ms / 1000.0)
+        cost = time.perf_counter() - start
+        self.frame_cost.add(cost)
+        self.overruns += 1e6 * cost > self.budget_us
+        return self.last
+
+    def update_features(self, features, timestamp=None):
+        """Frame with a face (landmarks.FaceFeatures); returns a FusionSnapshot"""
+        start = time.perf_counter()
+        now = self.clock() if timestamp is None else timestamp
+        entry, lag_ms = self._aligned(now - self.video_delay_s)
+        risky = self._adapt(entry)
+        snapshot = self.fatigue.update_features(features, timestamp=now)
+        return self._finish(start, snapshot, entry, lag_ms, risky)
+
+    def no_face(self, timestamp=None):
+        start = time.perf_counter()
+        now = self.clock() if timestamp is None else timestamp
+        entry, lag_ms = self._aligned(now - self.video_delay_s)
+        snapshot = self.fatigue.no_face(timestamp=now)
+        return self._finish(start, snapshot, entry, lag_ms, False)
+
+    def describe(self):
+        """One-line status for an on-screen overlay"""
+        s = self.last
+        if s is None:
+            return "Vehicle: -"
+        flags = "".join([" | weaving" if s.weaving else "",
+                         f" | no steering {s.steering_idle_s:.0f}s" if s.steering_idle_s >= self.idle_steering_s else ""])
+        return f"Vehicle: {s.vehicle_state} | EAR<{s.ear_threshold:.2f} | hold {s.sustain_s:.1f}s{flags}"
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "imu_samples": self.imu_samples,
+            "events": dict(self.event_counts),
+            "max_steering_idle_s": round(self.max_steering_idle_s, 1),
+            "frame_cost_us": {"mean": round(1000.0 * self.frame_cost.mean_ms(), 1),
+                              "p95": round(1000.0 * self.frame_cost.percentile_ms(95), 1),
+                              "budget": self.budget_us, "overruns": self.overruns},
+            "imu_sample_cost_us": round(1000.0 * self.block_cost.mean_ms(), 2),
+            "imu_lag_ms_p50": round(self.imu_lag.percentile_ms(50), 1),
+            "fatigue": self.fatigue.summary(),
+        }
+
+
+# ---------------- Paired recordings ----------------
+FEATURE_COLUMNS = ("t", "ear", "lip_distance", "roll", "pitch", "yaw")
+
+
+class PairedRecorder:
+    """
+    Bounded recorder of IMU blocks and face features for offline replay
+
+    Args:
+        max_seconds: newest seconds kept of each stream
+        imu_rate / fps: expected rates, used to size the buffers
+    """
+
+    def __init__(self, max_seconds=300.0, imu_rate=200, fps=30):
+        self.imu = collections.deque(maxlen=int(max_seconds * imu_rate))
+        self.features = collections.deque(maxlen=int(max_seconds * fps))
+
+    def add_block(self, block):
+        self.imu.extend(np.column_stack([block.timestamps, block.accel, block.gyro]).tolist())
+
+    def add_features(self, timestamp, features):
+        """features=None records a frame without a face"""
+        if features is None:
+            self.features.append((timestamp, math.nan, math.nan, math.nan, math.nan, math.nan))
+        else:
+            self.features.append((timestamp, features.ear, features.lip_distance,
+                                  features.roll, features.pitch, features.yaw))
+
+    def save(self, prefix):
+        """Write <prefix>-imu.npz and <prefix>-features.npz"""
+        imu, frames = np.array(self.imu).reshape(-1, 7), np.array(self.features).reshape(-1, 6)
+        np.savez_compressed(prefix + "-imu.npz", **{name: imu[:, i] for i, name in
+                                                    enumerate(("t", "ax", "ay", "az", "gx", "gy", "gz"))})
+        np.savez_compressed(prefix + "-features.npz", **{name: frames[:, i] for i, name in
+                                                         enumerate(FEATURE_COLUMNS)})
+        return prefix + "-imu.npz", prefix + "-features.npz"
+
+
+def load_features(path):
+    """(N, 6) array [t, ear, lip_distance, roll, pitch, yaw] from CSV or NPZ; NaN ear = no face"""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return np.column_stack([data[column] for column in FEATURE_COLUMNS])
+    with open(path) as f:
+        has_header = not f.readline().lstrip()[:1].isdigit()
+    return np.loadtxt(path, delimiter=",", skiprows=int(has_header), ndmin=2)[:, :6]
+
+
+def synthetic_pair(fps=30, seed=0):
+    """motion.synthetic_trace() plus weaving, a crash and matching face features"""
+    rng = np.random.RandomState(seed)
+    imu = synthetic_trace(seed=seed)
+    t = imu[:, 0]
+    weave = (t >= 48.0) & (t < 68.0)
+    imu[weave, 6] = 10.0 * np.sin(2 * np.pi * 0.25 * t[weave])    # straight road, drifting between lane edges
+    crash = (t >= 73.0) & (t < 73.02)
+    imu[crash, 1] -= 3.5
+
+    frame_t = np.arange(0.0, t[-1], 1.0 / fps)
+    ear = 0.30 + rng.normal(0.0, 0.01, len(frame_t))
+    blinks = rng.rand(len(frame_t)) < 0.01
+    ear[blinks] = 0.15
+    # Heavier eyelids while weaving: closures just under a microsleep, a quarter of the time
+    heavy = (frame_t >= 52.0) & (frame_t < 68.0) & (np.sin(2 * np.pi * 0.3 * frame_t) > 0.7)
+    ear[heavy] = 0.18
+    zeros = np.zeros(len(frame_t))
+    features = np.column_stack([frame_t, ear, zeros + 10.0, zeros, zeros, zeros])
+    return imu, features
+
+
+def replay(imu, features, engine=None, fatigue=None, imu_block_s=0.1):
+    """Run a paired recording; IMU arrives in blocks of imu_block_s like the FIFO drain"""
+    from drowsiness.fatigue import FatigueMonitor
+    from drowsiness.imu import ImuBlock
+
+    engine = engine or FusionEngine(fatigue or FatigueMonitor(head_threshold=None))
+    snapshots = []
+    position, block_end = 0, imu[0, 0] + imu_block_s if len(imu) else 0.0
+    for t, ear, lip, roll, pitch, yaw in features.tolist():
+        # Everything the FIFO would have delivered by frame time t
+        while position < len(imu) and block_end <= t:
+            end = int(np.searchsorted(imu[:, 0], block_end, side="right"))
+            rows = imu[position:end]
+            engine.update_block(ImuBlock(rows[:, 0], rows[:, 1:4], rows[:, 4:7], None))
+            position, block_end = end, block_end + imu_block_s
+        if math.isnan(ear):
+            snapshots.append(engine.no_face(timestamp=t))
+        else:
+            snapshots.append(engine.update_features(
+                FaceFeatures(ear, ear, ear, 0.0, lip, roll, pitch, yaw, None), timestamp=t))
+    return engine, snapshots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a paired IMU / face-feature recording through FusionEngine")
+    parser.add_argument("--imu", help="IMU trace (CSV or NPZ: t, ax, ay, az in g, gx, gy, gz in deg/s)")
+    parser.add_argument("--features", help="face features (CSV or NPZ: t, ear, lip_distance, roll, pitch, yaw)")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated drive with weaving and a crash")
+    args = parser.parse_args(argv)
+    if args.synthetic:
+        imu, features = synthetic_pair()
+    elif args.imu and args.features:
+        imu, features = load_trace(args.imu), load_features(args.features)
+    else:
+        parser.error("pass --imu and --features, or --synthetic")
+
+    engine, snapshots = replay(imu, features)
+    drowsy, episodes, events = False, [], []
+    for t, s in zip(features[:, 0].tolist(), snapshots):
+        if s.drowsy and not drowsy:
+            episodes.append({"t": round(t, 2), "reason": s.reason})
+        drowsy = s.drowsy
+        events.extend({"t": round(event_t, 2), "kind": kind, "value": round(value, 2)}
+                      for kind, event_t, value in s.events)
+    print(json.dumps({"drowsy_episodes": episodes, "events": events, "summary": engine.summary()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
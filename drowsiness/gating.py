@@ -0,0 +1,163 @@
+"""
+Gate MediaPipe Hands so it does not run on every frame
+
+Fist / peace gestures are rare, so `hands.process` only runs when:
+    - cheap motion or a change in skin-coloured area shows up in the
+      hand regions (bottom strip and left / right sides of the frame),
+    - or every `idle_interval` frames as a low duty-cycle fallback,
+    - or during `hot_window` seconds after hands were last seen (full rate).
+
+The checks run on a heavily downscaled copy of the frame (shared through a
+frame.FrameContext when the caller passes one). The fallback duty
+cycle bounds the added gesture latency to `idle_interval` frames; the
+measured worst case is reported by summary().
+
+    hand_landmarks_list = hand_gate.process(hands, frame, image_rgb)  # None when gated
+    if hand_landmarks_list:
+        for hand_landmarks in hand_landmarks_list:
+            ... is_fist(hand_landmarks) / is_peace_sign(hand_landmarks) as before
+"""
+import time
+
+import cv2
+import numpy as np
+
+from drowsiness.frame import as_context
+
+# Hand regions as (x0, y0, x1, y1) fractions of the frame
+DEFAULT_REGIONS = (
+    (0.0, 0.6, 1.0, 1.0),   # bottom strip (steering wheel / lap)
+    (0.0, 0.0, 0.25, 0.6),  # left side
+    (0.75, 0.0, 1.0, 0.6),  # right side
+)
+
+# Loose YCrCb skin range
+SKIN_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+
+class HandGate:
+    """
+    Args:
+        idle_interval: run Hands at least every N frames even without a trigger
+        hot_window: seconds of full-rate Hands after a frame with hands
+        motion_threshold: fraction of region pixels whose grey level changed by more
+                          than `pixel_delta` that counts as motion
+        pixel_delta: per-pixel grey-level change treated as "changed"
+        skin_threshold: change in skin-pixel fraction that counts as a trigger
+        scale: downscale factor for the cheap checks
+        regions: hand regions as (x0, y0, x1, y1) frame fractions
+    """
+
+    def __init__(self, idle_interval=6, hot_window=1.5, motion_threshold=0.01, pixel_delta=20,
+                 skin_threshold=0.02, scale=0.125, regions=DEFAULT_REGIONS):
+        self.idle_interval = max(1, int(idle_interval))
+        self.hot_window = hot_window
+        self.motion_threshold = motion_threshold
+        self.pixel_delta = pixel_delta
+        self.skin_threshold = skin_threshold
+        self.scale = scale
+        self.regions = regions
+
+        self._mask = None
+        self._prev_gray = None
+        self._gray_pool = None
+        self._prev_skin = None
+        self._hot_until = 0.0
+        self._since_run = 0
+        self._last_run = None
+
+        self.frames = 0
+        self.runs = 0
+        self.triggers = {"motion": 0, "skin": 0, "hot": 0, "idle": 0}
+        self.max_gap_frames = 0
+        self.max_gap_s = 0.0
+
+    def _region_mask(self, shape):
+        height, width = shape
+        mask = np.zeros(shape, dtype=bool)
+        for x0, y0, x1, y1 in self.regions:
+            mask[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)] = True
+        return mask
+
+    def _keep_gray(self, ctx, gray):
+        # _prev_gray may be a pooled buffer: held until the next frame is compared against it
+        if self._gray_pool is not None:
+            self._gray_pool.release(self._prev_gray)
+        self._prev_gray = gray if ctx is None else ctx.keep(gray)
+        self._gray_pool = None if ctx is None else ctx.pool
+
+    def _cheap_trigger(self, frame):
+        ctx = as_context(frame)
+        small = ctx.resized(self.scale)
+        gray = ctx.convert(small, cv2.COLOR_BGR2GRAY, "gate_gray")
+        skin = cv2.inRange(ctx.convert(small, cv2.COLOR_BGR2YCrCb, "gate_skin"), SKIN_LOWER, SKIN_UPPER)
+        if self._mask is None or self._mask.shape != gray.shape:
+            self._mask = self._region_mask(gray.shape)
+            self._keep_gray(None, None)
+
+        skin_fraction = float(np.count_nonzero(skin[self._mask])) / max(1, int(self._mask.sum()))
+        trigger = None
+        if self._prev_gray is not None:
+            changed = cv2.absdiff(gray, self._prev_gray)[self._mask] > self.pixel_delta
+            motion = float(np.count_nonzero(changed)) / changed.size
+            if motion > self.motion_threshold:
+                trigger = "motion"
+            elif abs(skin_fraction - self._prev_skin) > self.skin_threshold:
+                trigger = "skin"
+        self._keep_gray(ctx, gray)
+        self._prev_skin = skin_fraction
+        return trigger
+
+    def should_run(self, frame):
+        """Decide whether Hands should process this BGR frame (or frame.FrameContext)"""
+        self.frames += 1
+        now = time.monotonic()
+        trigger = self._cheap_trigger(frame)
+        if trigger is None and now < self._hot_until:
+            trigger = "hot"
+        if trigger is None and self._since_run + 1 >= self.idle_interval:
+            trigger = "idle"
+
+        if trigger is None:
+            self._since_run += 1
+            return False
+
+        self.triggers[trigger] += 1
+        self.runs += 1
+        self.max_gap_frames = max(self.max_gap_frames, self._since_run + 1)
+        if self._last_run is not None:
+            self.max_gap_s = max(self.max_gap_s, now - self._last_run)
+        self._last_run = now
+        self._since_run = 0
+        return True
+
+    def report(self, hands_found):
+        """Feed back whether Hands found anything; a hit keeps the gate open for hot_window seconds"""
+        if hands_found:
+            self._hot_until = time.monotonic() + self.hot_window
+
+    def process(self, hands, frame, image_rgb, due=None):
+        """
+        hands.process(image_rgb) behind the gate; returns multi_hand_landmarks or None
+
+        `due` is a should_run() answer the caller already has for this frame
+        (the worker mode decides before it submits the frame).
+        """
+        if not (self.should_run(frame) if due is None else due):
+            return None
+        multi_hand_landmarks = hands.process(image_rgb).multi_hand_landmarks
+        self.report(bool(multi_hand_landmarks))
+        return multi_hand_landmarks
+
+    def summary(self):
+        skipped = self.frames - self.runs
+        return {
+            "frames": self.frames,
+            "hands_runs": self.runs,
+            "skipped_pct": round(100.0 * skipped / self.frames, 1) if self.frames else 0.0,
+            "triggers": dict(self.triggers),
+            "latency_bound_frames": self.idle_interval,
+            "max_gap_frames": self.max_gap_frames,
+            "max_gap_s": round(self.max_gap_s, 3),
+        }
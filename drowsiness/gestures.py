@@ -0,0 +1,64 @@
+"""
+Hand gestures and MediaPipe box helpers shared by the detectors
+
+Finger states compare a fingertip with its PIP joint two landmarks below it
+(image y grows downwards), as every detector script did:
+
+    is_fist(hand)         three of the finger tips folded
+    is_peace_sign(hand)   index and middle extended, ring and pinky folded
+    hand_box(hand, w, h)  landmark bounding box plus a margin, clamped to the frame
+    detection_box(d, w, h) MediaPipe FaceDetection relative box in pixels
+"""
+FIST_TIPS = (8, 12, 16, 20)             # index to pinky
+FIST_TIPS_WITH_THUMB = (4, 8, 12, 16, 20)  # Mediapipe/drowsy.py also counted the thumb
+HAND_MARGIN = 20
+
+
+def is_folded(hand_landmarks, tip_id):
+    landmark = hand_landmarks.landmark
+    return landmark[tip_id].y > landmark[tip_id - 2].y
+
+
+def is_extended(hand_landmarks, tip_id):
+    landmark = hand_landmarks.landmark
+    return landmark[tip_id].y < landmark[tip_id - 2].y
+
+
+def is_fist(hand_landmarks, tips=FIST_TIPS):
+    return sum(is_folded(hand_landmarks, tip_id) for tip_id in tips) >= 3
+
+
+def is_peace_sign(hand_landmarks):
+    return (is_extended(hand_landmarks, 8) and is_extended(hand_landmarks, 12) and
+            is_folded(hand_landmarks, 16) and is_folded(hand_landmarks, 20))
+
+
+def gesture_name(hand_landmarks, fist_tips=FIST_TIPS):
+    """"Fist", "Peace" or None; a fist wins when both match"""
+    if is_fist(hand_landmarks, fist_tips):
+        return "Fist"
+    if is_peace_sign(hand_landmarks):
+        return "Peace"
+    return None
+
+
+def clamp_box(x_min, y_min, x_max, y_max, width, height):
+    return max(0, x_min), max(0, y_min), min(width, x_max), min(height, y_max)
+
+
+def hand_box(hand_landmarks, width, height, margin=HAND_MARGIN):
+    x_vals = [lm.x for lm in hand_landmarks.landmark]
+    y_vals = [lm.y for lm in hand_landmarks.landmark]
+    return clamp_box(int(min(x_vals) * width) - margin, int(min(y_vals) * height) - margin,
+                     int(max(x_vals) * width) + margin, int(max(y_vals) * height) + margin, width, height)
+
+
+def detection_box(detection, width, height):
+    """(x_min, y_min, x_max, y_max) of a FaceDetection result; only the top-left corner is clamped"""
+    bbox = detection.location_data.relative_bounding_box
+    x = int(bbox.xmin * width)
+    y = int(bbox.ymin * height)
+    w_box = int(bbox.width * width)
+    h_box = int(bbox.height * height)
+    x, y = max(0, x), max(0, y)
+    return x, y, x + w_box, y + h_box
@@ -0,0 +1,90 @@
+"""
+GPIO backends for the buzzer and LED
+
+    rpi   RPi.GPIO on the Raspberry Pi (BCM numbering)
+    fake  in-memory pins that record every level change, for running and
+          testing the alert code off-device
+
+Both expose setup(pin), output(pin, level) and cleanup(). The backend comes
+from the DROWSINESS_GPIO environment variable and defaults to RPi.GPIO. The
+fake backend is opt-in only (DROWSINESS_GPIO=fake or backend="fake"): a Pi
+with a broken RPi.GPIO install fails at start-up instead of silently never
+sounding the buzzer.
+
+Actuator patterns are (level, seconds) steps played by play(), which stops
+early when its cancel event is set and always leaves the pin low.
+"""
+import collections
+import os
+import threading
+import time
+
+GPIO_BACKENDS = ("rpi", "fake")
+
+# Buzzer patterns as (level, seconds) steps
+DROWSY_PATTERN = ((True, 1.5),)
+EMERGENCY_PATTERN = ((True, 0.2), (False, 0.3)) * 6
+
+
+class RPiGPIO:
+    def __init__(self):
+        import RPi.GPIO as GPIO
+
+        self.GPIO = GPIO
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+
+    def setup(self, pin):
+        self.GPIO.setup(pin, self.GPIO.OUT)
+
+    def output(self, pin, level):
+        self.GPIO.output(pin, self.GPIO.HIGH if level else self.GPIO.LOW)
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+
+class FakeGPIO:
+    """Records (timestamp, pin, level) for every output call"""
+
+    def __init__(self, history=1000):
+        self.levels = {}
+        self.events = collections.deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def setup(self, pin):
+        self.levels[pin] = False
+
+    def output(self, pin, level):
+        with self._lock:
+            self.levels[pin] = bool(level)
+            self.events.append((time.monotonic(), pin, bool(level)))
+
+    def cleanup(self):
+        self.levels.clear()
+
+
+def open_gpio(backend=None):
+    """GPIO backend by name or $DROWSINESS_GPIO, RPi.GPIO by default; the fake backend is never a fallback"""
+    backend = backend or os.environ.get("DROWSINESS_GPIO", "rpi")
+    if backend not in GPIO_BACKENDS:
+        raise ValueError(f"Unknown GPIO backend '{backend}', expected one of {', '.join(GPIO_BACKENDS)}")
+    if backend == "fake":
+        return FakeGPIO()
+    try:
+        return RPiGPIO()
+    except ImportError as e:
+        raise ImportError(f"RPi.GPIO is not available ({e}); set DROWSINESS_GPIO=fake to run off-device") from e
+
+
+def play(gpio, pin, pattern, cancelled=None):
+    """Play (level, seconds) steps on `pin`; returns False if `cancelled` was set"""
+    cancelled = cancelled or threading.Event()
+    try:
+        for level, seconds in pattern:
+            gpio.output(pin, level)
+            if cancelled.wait(seconds):
+                return False
+        return True
+    finally:
+        gpio.output(pin, False)
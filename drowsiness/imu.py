@@ -0,0 +1,465 @@
+"""
+MPU-6050 driver shared by Sensor/mpu6060.py and the Pi motion sensor
+
+The old drivers read every axis with two read_byte_data calls and re-read
+ACCEL_CONFIG / GYRO_CONFIG for every sample (17 I2C transactions for one
+accel + gyro reading). Here one sample is a single 14-byte
+read_i2c_block_data burst starting at ACCEL_XOUT_H (accel xyz, temperature,
+gyro xyz, big-endian int16), decoded with struct. The configured ranges are
+written once and their scale factors cached.
+
+    imu = MPU6050(accel_range=2, gyro_range=250)
+    sample = imu.read()             # ImuSample(ax, ay, az [g], temp [C], gx, gy, gz [deg/s])
+    imu.get_accel_data()            # old dict API, still one burst
+
+Buses: smbus2 (or smbus) on the Pi, or FakeBus, a simulated register map
+that counts transactions, selected with DROWSINESS_IMU=fake or bus=FakeBus().
+decode() turns any number of 14-byte records into an (N, 7) NumPy array for
+bulk reads.
+
+ImuStream is the high-rate mode: sample-rate divider + DLPF + on-chip FIFO,
+drained in bulk on a background thread into timestamped NumPy blocks.
+
+    stream = ImuStream(imu, rate_hz=500).start()
+    block = stream.get(timeout=0.5)  # ImuBlock(timestamps, accel, gyro, temp)
+"""
+import collections
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+GRAVITY_MS2 = 9.80665
+
+# Registers
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+GYRO_CONFIG = 0x1B
+ACCEL_CONFIG = 0x1C
+FIFO_EN = 0x23
+INT_ENABLE = 0x38
+INT_STATUS = 0x3A
+ACCEL_XOUT_H = 0x3B
+TEMP_OUT_H = 0x41
+GYRO_XOUT_H = 0x43
+USER_CTRL = 0x6A
+PWR_MGMT_1 = 0x6B
+PWR_MGMT_2 = 0x6C
+FIFO_COUNTH = 0x72
+FIFO_R_W = 0x74
+WHO_AM_I = 0x75
+
+# FIFO_EN: temperature, gyro xyz and accel -> 14-byte records in data-register order
+FIFO_SAMPLE_SOURCES = 0xF8
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+INT_FIFO_OFLOW = 0x10
+FIFO_SIZE = 1024
+
+SAMPLE_BYTES = 14
+SAMPLE_FORMAT = ">7h"
+
+# Range register value -> LSB per unit
+ACCEL_SCALES = {0x00: 16384.0, 0x08: 8192.0, 0x10: 4096.0, 0x18: 2048.0}
+GYRO_SCALES = {0x00: 131.0, 0x08: 65.5, 0x10: 32.8, 0x18: 16.4}
+ACCEL_RANGES = {2: 0x00, 4: 0x08, 8: 0x10, 16: 0x18}
+GYRO_RANGES = {250: 0x00, 500: 0x08, 1000: 0x10, 2000: 0x18}
+
+TEMP_SCALE = 340.0
+TEMP_OFFSET = 36.53
+
+ImuSample = collections.namedtuple("ImuSample", "ax ay az temp gx gy gz")
+
+
+def decode(data, accel_scale=ACCEL_SCALES[0x00], gyro_scale=GYRO_SCALES[0x00]):
+    """N * 14 raw bytes -> (N, 7) float32 array of g, degrees C and deg/s"""
+    raw = np.frombuffer(bytes(data), dtype=">i2").reshape(-1, 7).astype(np.float32)
+    scale = np.array([accel_scale] * 3 + [TEMP_SCALE] + [gyro_scale] * 3, dtype=np.float32)
+    values = raw / scale
+    values[:, 3] += TEMP_OFFSET
+    return values
+
+
+class FakeBus:
+    """
+    Simulated MPU-6050 register map with the smbus2 subset the driver uses
+
+    set_sample() writes accel / temp / gyro values into the data registers
+    using the currently configured ranges; `transactions` counts bus calls.
+    Once the FIFO is enabled, records are generated at the rate set by
+    SMPLRT_DIV / CONFIG from `signal(t) -> (accel_g, gyro_dps, temp_c)`
+    (or the current data registers), with the 1024-byte limit and the
+    overflow flag of the real chip.
+    """
+
+    def __init__(self, address=0x68, signal=None, clock=time.monotonic):
+        self.address = address
+        self.registers = bytearray(128)
+        self.registers[WHO_AM_I] = 0x68
+        self.registers[PWR_MGMT_1] = 0x40  # sleep bit set at power-on
+        self.transactions = 0
+        self.signal = signal
+        self.clock = clock
+        self.fifo = bytearray()
+        self._fifo_time = None
+
+    def _check(self, address):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+        self.transactions += 1
+
+    # ---------------- FIFO simulation ----------------
+    def sample_rate(self):
+        dlpf = self.registers[CONFIG] & 0x07
+        gyro_rate = 8000.0 if dlpf in (0, 7) else 1000.0
+        return gyro_rate / (1 + self.registers[SMPLRT_DIV])
+
+    def _fifo_enabled(self):
+        return bool(self.registers[USER_CTRL] & USER_CTRL_FIFO_EN) and self.registers[FIFO_EN] == FIFO_SAMPLE_SOURCES
+
+    def _fill_fifo(self):
+        if not self._fifo_enabled():
+            self._fifo_time = None
+            return
+        now = self.clock()
+        if self._fifo_time is None:
+            self._fifo_time = now
+            return
+        period = 1.0 / self.sample_rate()
+        due = int((now - self._fifo_time) / period + 1e-6)  # float steps of the clock
+        capacity = FIFO_SIZE // SAMPLE_BYTES
+        for i in range(max(0, due - capacity - 1), due):
+            t = self._fifo_time + (i + 1) * period
+            if self.signal is not None:
+                record = self.encode(*self.signal(t))
+            else:
+                record = bytes(self.registers[ACCEL_XOUT_H:ACCEL_XOUT_H + SAMPLE_BYTES])
+            if len(self.fifo) + SAMPLE_BYTES > FIFO_SIZE:
+                del self.fifo[:SAMPLE_BYTES]
+                self.registers[INT_STATUS] |= INT_FIFO_OFLOW
+            self.fifo += record
+        self._fifo_time += due * period
+
+    # ---------------- smbus2 subset ----------------
+    def read_byte_data(self, address, register):
+        self._check(address)
+        self._fill_fifo()
+        value = self.registers[register]
+        if register == INT_STATUS:
+            self.registers[INT_STATUS] = 0  # cleared on read
+        return value
+
+    def write_byte_data(self, address, register, value):
+        self._check(address)
+        self._fill_fifo()
+        if register == USER_CTRL and value & USER_CTRL_FIFO_RESET:
+            self.fifo.clear()
+            value &= ~USER_CTRL_FIFO_RESET  # self-clearing bit
+        self.registers[register] = value & 0xFF
+        if self._fifo_time is None and self._fifo_enabled():
+            # The chip starts queueing records as soon as the FIFO is enabled
+            self._fifo_time = self.clock()
+
+    def read_i2c_block_data(self, address, register, length):
+        self._check(address)
+        self._fill_fifo()
+        if register == FIFO_COUNTH:
+            return list(len(self.fifo).to_bytes(2, "big"))[:length]
+        if register == FIFO_R_W:
+            data = bytes(self.fifo[:length])
+            del self.fifo[:length]
+            return list(data.ljust(length, b"\x00"))
+        return list(self.registers[register:register + length])
+
+    def write_i2c_block_data(self, address, register, data):
+        self._check(address)
+        self.registers[register:register + len(data)] = bytes(data)
+
+    def encode(self, accel_g=(0.0, 0.0, 1.0), gyro_dps=(0.0, 0.0, 0.0), temp_c=25.0):
+        """14 data-register bytes for one sample at the configured ranges"""
+        accel_scale = ACCEL_SCALES[self.registers[ACCEL_CONFIG] & 0x18]
+        gyro_scale = GYRO_SCALES[self.registers[GYRO_CONFIG] & 0x18]
+        values = [v * accel_scale for v in accel_g] + [(temp_c - TEMP_OFFSET) * TEMP_SCALE]
+        values += [v * gyro_scale for v in gyro_dps]
+        return struct.pack(SAMPLE_FORMAT, *(int(max(-32768, min(32767, round(v)))) for v in values))
+
+    def set_sample(self, accel_g=(0.0, 0.0, 1.0), gyro_dps=(0.0, 0.0, 0.0), temp_c=25.0):
+        self.registers[ACCEL_XOUT_H:ACCEL_XOUT_H + SAMPLE_BYTES] = self.encode(accel_g, gyro_dps, temp_c)
+
+    def close(self):
+        pass
+
+
+def open_bus(bus_number=1, backend=None):
+    """smbus2 / smbus bus number `bus_number`, or a FakeBus with backend="fake" / $DROWSINESS_IMU=fake"""
+    backend = backend or os.environ.get("DROWSINESS_IMU", "smbus")
+    if backend == "fake":
+        return FakeBus()
+    if backend != "smbus":
+        raise ValueError(f"Unknown IMU backend '{backend}', expected smbus or fake")
+    try:
+        import smbus2 as smbus
+    except ImportError:
+        import smbus
+    return smbus.SMBus(bus_number)
+
+
+class MPU6050:
+    """
+    Args:
+        address: I2C address (0x68, or 0x69 with AD0 high)
+        bus: smbus-like object; opened with open_bus(bus_number) when None
+        bus_number: I2C bus of the Pi header
+        accel_range: +-2, 4, 8 or 16 g
+        gyro_range: +-250, 500, 1000 or 2000 deg/s
+    """
+
+    GRAVITY_MS2 = GRAVITY_MS2
+
+    # Register values of the ranges, as in the old Sensor/mpu6060.py
+    ACCEL_RANGE_2G, ACCEL_RANGE_4G, ACCEL_RANGE_8G, ACCEL_RANGE_16G = 0x00, 0x08, 0x10, 0x18
+    GYRO_RANGE_250DEG, GYRO_RANGE_500DEG, GYRO_RANGE_1000DEG, GYRO_RANGE_2000DEG = 0x00, 0x08, 0x10, 0x18
+
+    def __init__(self, address=0x68, bus=None, bus_number=1, accel_range=2, gyro_range=250):
+        self.address = address
+        self.bus = bus if bus is not None else open_bus(bus_number)
+        # Wake up the MPU-6050 since it starts in sleep mode
+        self.bus.write_byte_data(self.address, PWR_MGMT_1, 0x00)
+        self.set_accel_range(ACCEL_RANGES[accel_range])
+        self.set_gyro_range(GYRO_RANGES[gyro_range])
+
+    # ---------------- Configuration (cached) ----------------
+    def set_accel_range(self, accel_range):
+        """Write a raw ACCEL_CONFIG range value (ACCEL_RANGE_*) and cache its scale"""
+        self.bus.write_byte_data(self.address, ACCEL_CONFIG, accel_range)
+        self._accel_raw = accel_range
+        self.accel_scale = ACCEL_SCALES[accel_range]
+
+    def set_gyro_range(self, gyro_range):
+        """Write a raw GYRO_CONFIG range value (GYRO_RANGE_*) and cache its scale"""
+        self.bus.write_byte_data(self.address, GYRO_CONFIG, gyro_range)
+        self._gyro_raw = gyro_range
+        self.gyro_scale = GYRO_SCALES[gyro_range]
+
+    def read_accel_range(self, raw=False):
+        if raw:
+            return self._accel_raw
+        return {v: k for k, v in ACCEL_RANGES.items()}[self._accel_raw]
+
+    def read_gyro_range(self, raw=False):
+        if raw:
+            return self._gyro_raw
+        return {v: k for k, v in GYRO_RANGES.items()}[self._gyro_raw]
+
+    # ---------------- Samples ----------------
+    def read_raw(self):
+        """One 14-byte burst -> 7 signed ints (ax, ay, az, temp, gx, gy, gz)"""
+        block = self.bus.read_i2c_block_data(self.address, ACCEL_XOUT_H, SAMPLE_BYTES)
+        return struct.unpack(SAMPLE_FORMAT, bytes(block))
+
+    def read(self):
+        """One burst -> ImuSample in g, degrees C and deg/s"""
+        ax, ay, az, temp, gx, gy, gz = self.read_raw()
+        a, g = self.accel_scale, self.gyro_scale
+        return ImuSample(ax / a, ay / a, az / a, temp / TEMP_SCALE + TEMP_OFFSET, gx / g, gy / g, gz / g)
+
+    def read_array(self):
+        """One burst -> (7,) float32 array, same layout as decode()"""
+        block = self.bus.read_i2c_block_data(self.address, ACCEL_XOUT_H, SAMPLE_BYTES)
+        return decode(block, self.accel_scale, self.gyro_scale)[0]
+
+    def read_i2c_word(self, register):
+        """Signed 16-bit register pair in one block read"""
+        high, low = self.bus.read_i2c_block_data(self.address, register, 2)
+        value = (high << 8) | low
+        return value - 0x10000 if value >= 0x8000 else value
+
+    # ---------------- Dict API of the old drivers ----------------
+    @staticmethod
+    def _accel_dict(sample, g):
+        factor = 1.0 if g else GRAVITY_MS2
+        return {'x': sample.ax * factor, 'y': sample.ay * factor, 'z': sample.az * factor}
+
+    @staticmethod
+    def _gyro_dict(sample):
+        return {'x': sample.gx, 'y': sample.gy, 'z': sample.gz}
+
+    def get_accel_data(self, g=False):
+        return self._accel_dict(self.read(), g)
+
+    def get_gyro_data(self):
+        return self._gyro_dict(self.read())
+
+    def get_temp(self):
+        return self.read().temp
+
+    def get_all_data(self):
+        """[accel m/s^2, gyro deg/s, temperature C] from a single burst"""
+        sample = self.read()
+        return [self._accel_dict(sample, False), self._gyro_dict(sample), sample.temp]
+
+
+# ---------------- FIFO streaming ----------------
+ImuBlock = collections.namedtuple("ImuBlock", "timestamps accel gyro temp")
+
+
+class ImuStream:
+    """
+    High-rate acquisition through the on-chip FIFO
+
+    Configures the sample-rate divider and DLPF, lets the MPU-6050 queue
+    14-byte records in its 1 KiB FIFO, and drains it in bulk from a
+    background thread. The MPU-6050 has no FIFO watermark interrupt, so the
+    thread wakes on a timer sized to half the FIFO fill time (one wakeup per
+    many samples instead of one per sample); INT_STATUS is checked for
+    overflow and the FIFO is reset when records were lost. An I2C error
+    during a drain is counted in `errors` and the FIFO is reset; the thread
+    keeps draining.
+
+    Each drain becomes an ImuBlock of NumPy arrays: timestamps (N,) on the
+    host monotonic clock, accel (N, 3) in g, gyro (N, 3) in deg/s, temp (N,).
+
+    Args:
+        imu: MPU6050
+        rate_hz: output rate, 4-1000 Hz (1 kHz / (1 + SMPLRT_DIV) with the DLPF on)
+        dlpf: DLPF_CFG 1-6, e.g. 3 = 44 Hz accel bandwidth
+        drain_interval: seconds between drains, default half the FIFO fill time capped at 0.1 s
+        max_blocks: blocks kept for get() before the oldest are dropped; 0 keeps none
+            (blocks only go to on_block)
+        on_block: optional callable(ImuBlock), called on the drain thread
+    """
+
+    def __init__(self, imu, rate_hz=200, dlpf=3, drain_interval=None, max_blocks=64, on_block=None,
+                 clock=time.monotonic):
+        if not 1 <= dlpf <= 6:
+            raise ValueError("dlpf must be 1-6, the sample-rate formula assumes a 1 kHz gyro output rate")
+        self.imu = imu
+        self.divider = max(0, min(255, int(round(1000.0 / rate_hz)) - 1))
+        self.rate_hz = 1000.0 / (1 + self.divider)
+        self.dlpf = dlpf
+        fill_time = (FIFO_SIZE // SAMPLE_BYTES) / self.rate_hz
+        self.drain_interval = drain_interval or min(0.1, fill_time / 2.0)
+        self.on_block = on_block
+        self.clock = clock
+
+        self.blocks = queue.Queue(maxsize=max_blocks) if max_blocks else None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.drains = 0
+        self.samples = 0
+        self.overflows = 0
+        self.dropped_blocks = 0
+        self.errors = 0
+
+    def _write(self, register, value):
+        self.imu.bus.write_byte_data(self.imu.address, register, value)
+
+    def _reset_fifo(self):
+        self._write(USER_CTRL, USER_CTRL_FIFO_EN | USER_CTRL_FIFO_RESET)
+
+    def _read_fifo(self, length):
+        bus, address = self.imu.bus, self.imu.address
+        if hasattr(bus, "i2c_rdwr"):
+            # smbus2: the whole FIFO in one I2C transaction
+            from smbus2 import i2c_msg
+
+            read = i2c_msg.read(address, length)
+            bus.i2c_rdwr(i2c_msg.write(address, [FIFO_R_W]), read)
+            return bytes(read)
+        data = bytearray()
+        while len(data) < length:
+            # SMBus block reads are limited to 32 bytes
+            data += bytes(bus.read_i2c_block_data(address, FIFO_R_W, min(32, length - len(data))))
+        return bytes(data)
+
+    def drain(self):
+        """Read every complete record in the FIFO; returns an ImuBlock or None"""
+        bus, address = self.imu.bus, self.imu.address
+        self.drains += 1
+        if bus.read_byte_data(address, INT_STATUS) & INT_FIFO_OFLOW:
+            # Records were overwritten, the byte stream may no longer be aligned
+            self.overflows += 1
+            self._reset_fifo()
+            return None
+        high, low = bus.read_i2c_block_data(address, FIFO_COUNTH, 2)
+        count = ((high << 8) | low) // SAMPLE_BYTES
+        if not count:
+            return None
+        now = self.clock()
+        values = decode(self._read_fifo(count * SAMPLE_BYTES), self.imu.accel_scale, self.imu.gyro_scale)
+        # The newest record was sampled just before the drain
+        timestamps = now - np.arange(count - 1, -1, -1) / self.rate_hz
+        self.samples += count
+        return ImuBlock(timestamps, values[:, 0:3], values[:, 4:7], values[:, 3])
+
+    def _recover(self, error):
+        # A transient I2C error must not end the stream: the FIFO may be misaligned, start it over
+        self.errors += 1
+        print(f"[ImuStream] I2C error during drain ({error}), resetting the FIFO")
+        try:
+            self._reset_fifo()
+        except OSError:
+            pass  # bus still down, the next drain retries
+
+    def _run(self):
+        while not self._stop.wait(self.drain_interval):
+            try:
+                block = self.drain()
+            except OSError as e:
+                self._recover(e)
+                continue
+            if block is None:
+                continue
+            if self.on_block is not None:
+                self.on_block(block)
+            if self.blocks is None:
+                continue
+            try:
+                self.blocks.put_nowait(block)
+            except queue.Full:
+                self.blocks.get_nowait()
+                self.blocks.put_nowait(block)
+                self.dropped_blocks += 1
+
+    def start(self):
+        self._write(SMPLRT_DIV, self.divider)
+        self._write(CONFIG, self.dlpf)
+        self._write(USER_CTRL, 0x00)
+        self._write(FIFO_EN, FIFO_SAMPLE_SOURCES)
+        self._write(INT_ENABLE, INT_FIFO_OFLOW)
+        self._reset_fifo()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="imu-fifo", daemon=True)
+        self._thread.start()
+        return self
+
+    def get(self, timeout=0):
+        """Next ImuBlock, or None when none arrived within `timeout` (0 = don't wait, None = wait forever)"""
+        if self.blocks is None:
+            raise RuntimeError("ImuStream was created with max_blocks=0, blocks only go to on_block")
+        try:
+            return self.blocks.get_nowait() if timeout == 0 else self.blocks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._write(USER_CTRL, 0x00)
+        self._write(FIFO_EN, 0x00)
+
+    def summary(self):
+        return {
+            "rate_hz": round(self.rate_hz, 1),
+            "drains": self.drains,
+            "samples": self.samples,
+            "samples_per_drain": round(self.samples / self.drains, 1) if self.drains else 0.0,
+            "overflows": self.overflows,
+            "dropped_blocks": self.dropped_blocks,
+            "errors": self.errors,
+        }
@@ -0,0 +1,92 @@
+"""
+Vectorized FaceMesh landmark features
+
+The FaceMesh result is converted once into a (468, 3) float32 array, then
+eye aspect ratio (both eyes), mouth aspect ratio, the lip distance used by
+the yawn threshold, head roll / pitch / yaw and the face bbox all come from
+a handful of NumPy ops on index arrays. The same code works on a (T, 468, 3)
+stack of frames for offline scoring.
+
+Coordinates follow FaceMesh: x and y are normalized by image width / height,
+z is depth on roughly the same scale as x. Everything is converted to pixels
+first, so EAR / lip distance match the old per-point implementation.
+"""
+import collections
+
+import numpy as np
+
+NUM_LANDMARKS = 468
+
+# p1..p6 per eye, same order as the scripts' LEFT_EYE / RIGHT_EYE
+EYES = np.array([
+    [33, 160, 158, 133, 153, 144],
+    [362, 385, 387, 263, 373, 380],
+])
+# Vertical lip pairs (outer-left, center, outer-right) and the mouth corners
+MOUTH_VERTICAL = np.array([[82, 87], [13, 14], [312, 317]])
+MOUTH_CORNERS = np.array([78, 308])
+LIP_TOP, LIP_BOTTOM = 13, 14
+EYE_OUTER = np.array([33, 263])
+FOREHEAD, CHIN = 10, 152
+
+FaceFeatures = collections.namedtuple(
+    "FaceFeatures", "left_ear right_ear ear mar lip_distance roll pitch yaw bbox")
+
+
+def landmarks_to_array(face_landmarks, out=None):
+    """FaceMesh NormalizedLandmarkList (or its .landmark list) -> (468, 3) float32 array"""
+    landmarks = getattr(face_landmarks, "landmark", face_landmarks)
+    flat = np.fromiter((v for lm in landmarks for v in (lm.x, lm.y, lm.z)),
+                       dtype=np.float32, count=3 * len(landmarks))
+    if out is None:
+        return flat.reshape(-1, 3)
+    out[:] = flat.reshape(-1, 3)
+    return out
+
+
+def _distance(a, b):
+    return np.sqrt(((a - b) ** 2).sum(axis=-1))
+
+
+def _features(points, width, height):
+    """Core computation on (..., 468, 3) arrays; every output has the leading shape"""
+    scale = np.array([width, height, width], dtype=np.float32)
+    pts = points * scale
+
+    eyes = pts[..., EYES, :2]                                      # (..., 2, 6, 2)
+    vertical = _distance(eyes[..., 1, :], eyes[..., 5, :]) + _distance(eyes[..., 2, :], eyes[..., 4, :])
+    horizontal = _distance(eyes[..., 0, :], eyes[..., 3, :])
+    ears = vertical / (2.0 * np.maximum(horizontal, 1e-6))          # (..., 2)
+
+    mouth = pts[..., MOUTH_VERTICAL, :2]                            # (..., 3, 2, 2)
+    mouth_open = _distance(mouth[..., 0, :], mouth[..., 1, :]).mean(axis=-1)
+    corners = pts[..., MOUTH_CORNERS, :2]
+    mar = mouth_open / np.maximum(_distance(corners[..., 0, :], corners[..., 1, :]), 1e-6)
+    lip_distance = _distance(pts[..., LIP_TOP, :2], pts[..., LIP_BOTTOM, :2])
+
+    # Roll from the eye line in the image plane (same as the old get_head_tilt_angle),
+    # yaw from the depth difference across the eyes, pitch from forehead -> chin depth
+    delta = pts[..., EYE_OUTER[1], :] - pts[..., EYE_OUTER[0], :]
+    roll = np.degrees(np.arctan2(delta[..., 1], delta[..., 0]))
+    yaw = np.degrees(np.arctan2(delta[..., 2], np.hypot(delta[..., 0], delta[..., 1])))
+    vertical_axis = pts[..., CHIN, :] - pts[..., FOREHEAD, :]
+    pitch = np.degrees(np.arctan2(vertical_axis[..., 2], vertical_axis[..., 1]))
+
+    xy = pts[..., :2]
+    bbox = np.concatenate([xy.min(axis=-2), xy.max(axis=-2)], axis=-1).astype(np.int32)
+    return ears, mar, lip_distance, roll, pitch, yaw, bbox
+
+
+def face_features(points, width, height):
+    """Features of one face: (468, 3) normalized landmarks -> FaceFeatures of Python scalars"""
+    ears, mar, lip_distance, roll, pitch, yaw, bbox = _features(points, width, height)
+    left, right = float(ears[0]), float(ears[1])
+    return FaceFeatures(left, right, (left + right) / 2.0, float(mar), float(lip_distance),
+                        float(roll), float(pitch), float(yaw), tuple(int(v) for v in bbox))
+
+
+def face_features_batch(points, width, height):
+    """Features of T faces / frames: (T, 468, 3) -> FaceFeatures of (T,) arrays, bbox (T, 4)"""
+    ears, mar, lip_distance, roll, pitch, yaw, bbox = _features(points, width, height)
+    return FaceFeatures(ears[:, 0], ears[:, 1], ears.mean(axis=-1), mar, lip_distance,
+                        roll, pitch, yaw, bbox)
@@ -0,0 +1,409 @@
+"""
+Per-stage timers and a metrics surface for the live loop
+
+The pipeline's StageStats only split a frame into capture / infer / render.
+Metrics breaks it down further (colour conversion, Hands, FaceDetection /
+FaceMesh, crop transform, forward pass, drawing, imshow) with one timer per
+stage:
+
+    metrics = Metrics()
+    with metrics.stage("hands"):
+        hands.process(image_rgb)
+    metrics.observe("latency", seconds)
+
+A timer costs about 2 us; each stage keeps cumulative histogram
+buckets (Prometheus style) plus a rolling window for p50 / p95. A stage is
+meant to be timed from one thread at a time, which is how the pipeline
+threads use them. Metrics(enabled=False) hands out no-op timers.
+
+Export, both optional:
+
+    MetricsServer(metrics, port=9108)        GET /metrics (Prometheus text), /metrics.json
+    JsonExporter(metrics, "metrics.json")    rewritten every few seconds
+
+PiThermals adds CPU temperature and `vcgencmd get_throttled` flags as gauges;
+off the Pi they are simply missing.
+
+SamplingProfiler samples every thread's Python stack with
+sys._current_frames() and writes folded stacks ("a;b;c count", the format of
+`py-spy record --format raw`, readable by flamegraph.pl and speedscope). It is
+toggled at runtime with SIGUSR1 or GET /profile/start and /profile/stop:
+
+    kill -USR1 <pid>        # start; again to stop and write profile-<pid>-1.folded
+"""
+import bisect
+import collections
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from drowsiness.pipeline import StageStats
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+BUCKETS_MS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+PREFIX = "drowsiness"
+
+
+# ---------------- Timers ----------------
+class StageTimer:
+    """Histogram and rolling window for one stage; also a context manager timing its block"""
+
+    __slots__ = ("name", "buckets", "counts", "total", "count", "window", "_start")
+
+    def __init__(self, name, buckets=BUCKETS_MS, window=240):
+        self.name = name
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.window = StageStats(window)
+        self._start = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, 1000.0 * seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.window.add(seconds)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.observe(time.perf_counter() - self._start)
+        return False
+
+    def summary(self):
+        return {
+            "mean_ms": round(self.window.mean_ms(), 3),
+            "p50_ms": round(self.window.percentile_ms(50), 3),
+            "p95_ms": round(self.window.percentile_ms(95), 3),
+            "count": self.count,
+        }
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Args:
+        enabled: False makes stage() / observe() no-ops
+        buckets: histogram upper bounds in milliseconds
+        window: samples kept per stage for the rolling percentiles
+    """
+
+    def __init__(self, enabled=True, buckets=BUCKETS_MS, window=240):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.window = window
+        self.stages = collections.OrderedDict()
+        self.gauges = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Timer for `name`, created on first use"""
+        if not self.enabled:
+            return NULL_TIMER
+        timer = self.stages.get(name)
+        if timer is None:
+            with self._lock:
+                timer = self.stages.setdefault(name, StageTimer(name, self.buckets, self.window))
+        return timer
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self.stage(name).observe(seconds)
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def add_collector(self, collect):
+        """collect() -> {gauge name: value}, called on every export"""
+        self.collectors.append(collect)
+
+    def collect_gauges(self):
+        gauges = dict(self.gauges)
+        for collect in self.collectors:
+            gauges.update(collect())
+        return {name: value for name, value in gauges.items() if value is not None}
+
+    def summary(self):
+        return collections.OrderedDict((name, timer.summary()) for name, timer in list(self.stages.items()))
+
+    def snapshot(self):
+        """Stages, histogram buckets and gauges as one JSON-friendly dict"""
+        stages = collections.OrderedDict()
+        for name, timer in list(self.stages.items()):
+            stages[name] = dict(timer.summary(), total_s=round(timer.total, 4),
+                                buckets_ms=dict(zip([str(b) for b in self.buckets] + ["+Inf"],
+                                                    _cumulative(timer.counts))))
+        return {"time": time.time(), "pid": os.getpid(), "stages": stages, "gauges": self.collect_gauges()}
+
+    def prometheus(self):
+        """Prometheus text exposition format"""
+        name = f"{PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per frame in each pipeline stage", f"# TYPE {name} histogram"]
+        for stage, timer in list(self.stages.items()):
+            counts = _cumulative(timer.counts)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound / 1000.0:g}"}} {count}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {counts[-1]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {timer.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {timer.count}')
+        for gauge, value in sorted(self.collect_gauges().items()):
+            lines.append(f"# TYPE {PREFIX}_{gauge} gauge")
+            lines.append(f"{PREFIX}_{gauge} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative(counts):
+    total, out = 0, []
+    for count in counts:
+        total += count
+        out.append(total)
+    return out
+
+
+# ---------------- Raspberry Pi Thermals ----------------
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+# `vcgencmd get_throttled` bits; the same flag 16 bits up means "has occurred since boot"
+THROTTLE_BITS = {0: "under_voltage", 1: "freq_capped", 2: "throttled", 3: "soft_temp_limit"}
+
+
+def read_cpu_temp(path=THERMAL_ZONE):
+    """CPU temperature in degrees C, or None"""
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def read_throttled():
+    """`vcgencmd get_throttled` bit field, or None when vcgencmd is missing"""
+    try:
+        output = subprocess.run(["vcgencmd", "get_throttled"], capture_output=True, text=True, timeout=1.0)
+        return int(output.stdout.strip().split("=")[1], 16)
+    except (OSError, IndexError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class PiThermals:
+    """Metrics collector for CPU temperature and throttling, re-read at most every `interval` seconds"""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._read_at = None
+        self._gauges = {}
+        # Off the Pi vcgencmd does not exist; stop forking for it
+        self._has_vcgencmd = True
+
+    def __call__(self):
+        now = time.monotonic()
+        if self._read_at is not None and now - self._read_at < self.interval:
+            return self._gauges
+        self._read_at = now
+        gauges = {"cpu_temp_celsius": read_cpu_temp()}
+        throttled = read_throttled() if self._has_vcgencmd else None
+        self._has_vcgencmd = throttled is not None
+        if throttled is not None:
+            gauges["throttled_bits"] = throttled
+            for bit, flag in THROTTLE_BITS.items():
+                gauges[f"{flag}_now"] = (throttled >> bit) & 1
+                gauges[f"{flag}_occurred"] = (throttled >> (bit + 16)) & 1
+        self._gauges = gauges
+        return gauges
+
+
+# ---------------- Sampling Profiler ----------------
+class SamplingProfiler:
+    """
+    Statistical profiler over every thread, switchable while the loop runs
+
+    Args:
+        interval: seconds between stack samples
+        output_dir: where stop() writes profile-<pid>-<n>.folded
+        max_depth: innermost frames kept per stack
+    """
+
+    def __init__(self, interval=0.01, output_dir=".", max_depth=64):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.runs = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.stacks.clear()
+            self.samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+            self._thread.start()
+        print(f"[Profiler] sampling every {1000 * self.interval:.0f} ms")
+
+    def stop(self):
+        """Stop sampling and write the folded stacks; returns the file path or None"""
+        with self._lock:
+            if not self.running:
+                return None
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.runs += 1
+            path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{self.runs}.folded")
+            with open(path, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        print(f"[Profiler] {self.samples} samples -> {path}")
+        return path
+
+    def toggle(self):
+        return self.stop() if self.running else self.start()
+
+    def install_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        """Toggle on `signum` (main thread only); returns False where the signal does not exist"""
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_: threading.Thread(target=self.toggle, daemon=True).start())
+        return True
+
+
+# ---------------- Exporters ----------------
+class MetricsServer:
+    """
+    Local HTTP endpoint: /metrics (Prometheus text), /metrics.json, /profile/start, /profile/stop
+
+    Args:
+        metrics: Metrics to expose
+        port: TCP port, 0 picks a free one (see .port)
+        host: bind address, loopback by default
+        profiler: optional SamplingProfiler controlled through /profile/*
+    """
+
+    def __init__(self, metrics, port=9108, host="127.0.0.1", profiler=None):
+        self.metrics = metrics
+        self.profiler = profiler
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, content_type, status = server.respond(self.path)
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+
+    def respond(self, path):
+        path = path.split("?")[0]
+        if path == "/metrics":
+            return self.metrics.prometheus(), "text/plain; version=0.0.4", 200
+        if path == "/metrics.json":
+            return json.dumps(self.metrics.snapshot()), "application/json", 200
+        if self.profiler is not None and path in ("/profile/start", "/profile/stop"):
+            if path == "/profile/start":
+                self.profiler.start()
+                return "profiling\n", "text/plain", 200
+            written = self.profiler.stop()
+            return f"{written or 'not running'}\n", "text/plain", 200
+        return "not found\n", "text/plain", 404
+
+    def start(self):
+        self._thread.start()
+        print(f"[Metrics] http://{self.httpd.server_address[0]}:{self.port}/metrics (pid {os.getpid()})")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class JsonExporter:
+    """Rewrites `path` with Metrics.snapshot() every `interval` seconds (atomic replace)"""
+
+    def __init__(self, metrics, path, interval=5.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.writes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="metrics-json", daemon=True)
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.metrics.snapshot(), f, indent=2)
+        os.replace(tmp, self.path)
+        self.writes += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop and write a final snapshot"""
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.write()
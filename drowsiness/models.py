@@ -0,0 +1,139 @@
+"""
+Model definitions and checkpoints used by the detectors
+
+    drowsy     binary MobileNetV3-small (1 logit), Drowsyness Detection/drowsy.py
+    drowsy-mt  4-class MobileNetV3-small, Drowsyness Detection/dorwsy-mt.py
+    mtl        MultiTaskMobileNet (drowsy + yawn heads), MTL (drowsy & yawn)
+
+torchvision is only imported when an architecture is built, so loading an
+exported TorchScript file (backends.py) never pays for it. load_model()
+memory-maps the checkpoint and builds the model without random init, and
+nothing downloads ImageNet weights when a checkpoint is loaded over them.
+"""
+import collections
+import os
+
+import torch
+from torch import nn
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+# ---------------- MultiTask Model Definition ----------------
+class MultiTaskMobileNet(nn.Module):
+    """
+    Args:
+        pretrained: start from ImageNet weights (downloaded), for training only;
+                    a loaded checkpoint replaces every weight anyway
+    """
+
+    def __init__(self, num_drowsy_classes, num_yawn_classes, pretrained=False):
+        super().__init__()
+        from torchvision.models import mobilenet_v3_small
+
+        base_model = mobilenet_v3_small(weights="DEFAULT" if pretrained else None)
+
+        # Modify the first conv layer to accept grayscale input
+        first_conv = base_model.features[0][0]
+        new_conv = nn.Conv2d(1, first_conv.out_channels,
+                             kernel_size=first_conv.kernel_size,
+                             stride=first_conv.stride,
+                             padding=first_conv.padding,
+                             bias=False)
+        with torch.no_grad():
+            new_conv.weight[:] = first_conv.weight.mean(dim=1, keepdim=True)
+        base_model.features[0][0] = new_conv
+
+        self.features = base_model.features
+        self.pool = nn.AdaptiveAvgPool2d((1, 1))
+        self.dropout = nn.Dropout(0.2)
+        in_features = base_model.classifier[0].in_features
+
+        self.drowsy_head = nn.Linear(in_features, num_drowsy_classes)
+        self.yawn_head = nn.Linear(in_features, num_yawn_classes)
+
+    def extract_features(self, x):
+        x = self.features(x)
+        x = self.pool(x).squeeze(-1).squeeze(-1)
+        x = self.dropout(x)
+        return x
+
+    def forward(self, x):
+        x = self.extract_features(x)
+        return self.drowsy_head(x), self.yawn_head(x)
+
+
+# ---------------- Single-head MobileNetV3 ----------------
+def grayscale_mobilenet_v3(num_outputs):
+    """MobileNetV3-small with a 1-channel stem and `num_outputs` logits, as trained in the notebooks"""
+    from torchvision import models
+
+    model = models.mobilenet_v3_small(weights=None)
+    model.features[0][0] = torch.nn.Conv2d(1, 16, kernel_size=3, stride=2, padding=1, bias=False)
+    model.classifier[3] = torch.nn.Linear(model.classifier[3].in_features, num_outputs)
+    return model
+
+
+# ---------------- Model Registry ----------------
+ModelSpec = collections.namedtuple("ModelSpec", "build checkpoint preprocess output_names")
+
+MODEL_SPECS = {
+    "drowsy": ModelSpec(
+        build=lambda: grayscale_mobilenet_v3(1),
+        checkpoint="Drowsyness Detection/models/Drowsiness-MobileNetV3.pth",
+        preprocess={"size": (128, 128)},
+        output_names=("logit",),
+    ),
+    "drowsy-mt": ModelSpec(
+        build=lambda: grayscale_mobilenet_v3(4),
+        checkpoint="Drowsyness Detection/models/Drowsiness-MobileNetV3-MultiTask.pth",
+        preprocess={"size": (96, 96), "center_crop": 84, "mean": 0.5, "std": 0.5},
+        output_names=("logits",),
+    ),
+    "mtl": ModelSpec(
+        build=lambda: MultiTaskMobileNet(num_drowsy_classes=2, num_yawn_classes=2),
+        checkpoint="MTL (drowsy & yawn)/models/model1_W.pth",
+        preprocess={"size": (128, 128)},
+        output_names=("drowsy", "yawn"),
+    ),
+}
+
+
+def checkpoint_path(name, suffix=".pth"):
+    """Absolute path of a model's checkpoint, or of an exported sibling with another suffix"""
+    path = os.path.join(REPO_ROOT, MODEL_SPECS[name].checkpoint)
+    return path[:-len(".pth")] + suffix
+
+
+def input_shape(name, batch_size=1):
+    preprocess = MODEL_SPECS[name].preprocess
+    side = preprocess.get("center_crop")
+    height, width = (side, side) if side else preprocess["size"]
+    return (batch_size, 1, height, width)
+
+
+def load_state_dict(path, device="cpu"):
+    """Checkpoint tensors, memory-mapped instead of read into memory where torch supports it"""
+    try:
+        return torch.load(path, map_location=device, mmap=True, weights_only=True)
+    except (TypeError, RuntimeError):
+        # Older torch, or a legacy (non-zip) checkpoint that cannot be mapped
+        return torch.load(path, map_location=device)
+
+
+def load_model(name, checkpoint=None, device="cpu"):
+    """Build the eager fp32 model and load its checkpoint, in eval mode"""
+    state_dict = load_state_dict(checkpoint or checkpoint_path(name), device)
+    try:
+        # Parameters on the meta device take no memory and skip random init;
+        # the checkpoint tensors are assigned in their place
+        with torch.device("meta"):
+            model = MODEL_SPECS[name].build()
+        model.load_state_dict(state_dict, assign=True)
+    except (AttributeError, TypeError):
+        # torch < 2.1: no device context manager / assign
+        model = MODEL_SPECS[name].build()
+        model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    return model
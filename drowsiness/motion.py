@@ -0,0 +1,259 @@
+"""
+Vehicle motion state from the IMU sample stream
+
+Replaces the raw per-axis delta of MPU6050.detect_motion(), which either
+tripped on road vibration or missed smooth driving. Every accel / gyro
+sample goes through constant-time filters:
+
+    gravity     first-order low-pass of accel; accel - gravity is the
+                linear (high-passed) acceleration
+    energy      RMS of linear accel and of gyro rate over `window_s`
+                (fatigue.RollingWindow running sums)
+    gyro bias   zero-rate offset, averaged over the first `bias_calib_s`
+                and then tracked by a slow EMA while not DRIVING; it is
+                removed before the gyro energy and the tilt integration
+    tilt        complementary filter of gyro-integrated and accel pitch / roll
+
+and the energies decide PARKED, IDLE (engine running, not moving) or
+DRIVING with enter / exit thresholds (hysteresis) and a dwell time per
+state: a new state has to hold for its dwell time before it is reported.
+
+    engine = VehicleStateEngine()
+    for block in stream:             # imu.ImuBlock from ImuStream
+        status = engine.update_block(block)
+
+Recorded traces (CSV or NPZ with t, ax..az in g, gx..gz in deg/s) can be
+replayed offline:
+
+    python -m drowsiness.motion trace.csv
+    python -m drowsiness.motion --synthetic
+"""
+import argparse
+import collections
+import json
+import math
+
+import numpy as np
+
+from drowsiness.fatigue import RollingWindow
+
+PARKED = "parked"
+IDLE = "idle"
+DRIVING = "driving"
+
+MotionStatus = collections.namedtuple("MotionStatus", "state changed accel_rms gyro_rms pitch roll")
+
+
+class VehicleStateEngine:
+    """
+    Args:
+        gravity_tau: seconds, time constant of the gravity low-pass
+        window_s: RMS window length
+        tilt_alpha: complementary filter weight of the gyro path
+        idle_enter / idle_exit: linear-accel RMS (g) entering / leaving IDLE
+        drive_enter / drive_exit: linear-accel RMS (g) entering / leaving DRIVING
+        turn_enter: gyro RMS (deg/s), bias removed, that also counts as DRIVING
+        bias_calib_s: seconds at start-up averaged into the gyro bias
+        bias_tau: seconds, time constant of the bias EMA while PARKED / IDLE
+        dwell_s: seconds a new state must hold, per state
+        on_transition: optional callable(old_state, new_state, status)
+    """
+
+    def __init__(self, gravity_tau=1.0, window_s=1.0, tilt_alpha=0.98,
+                 idle_enter=0.006, idle_exit=0.004, drive_enter=0.04, drive_exit=0.025, turn_enter=3.0,
+                 bias_calib_s=2.0, bias_tau=30.0, dwell_s=None, on_transition=None):
+        self.gravity_tau = gravity_tau
+        self.tilt_alpha = tilt_alpha
+        self.idle_enter, self.idle_exit = idle_enter, idle_exit
+        self.drive_enter, self.drive_exit = drive_enter, drive_exit
+        self.turn_enter = turn_enter
+        self.bias_calib_s = bias_calib_s
+        self.bias_tau = bias_tau
+        self.dwell_s = dwell_s or {PARKED: 10.0, IDLE: 3.0, DRIVING: 2.0}
+        self.on_transition = on_transition
+
+        self.accel_energy = RollingWindow(window_s, resolution=0.01)
+        self.gyro_energy = RollingWindow(window_s, resolution=0.01)
+
+        self.state = PARKED
+        self.transitions = 0
+        self.time_in_state = {PARKED: 0.0, IDLE: 0.0, DRIVING: 0.0}
+        self.samples = 0
+        self._gravity = None
+        self._gyro_bias = [0.0, 0.0, 0.0]
+        self._bias_samples = 0
+        self._first_time = None
+        self._pitch = self._roll = 0.0
+        self._last_time = None
+        self._pending = None
+        self._pending_since = None
+        self.last = MotionStatus(PARKED, False, 0.0, 0.0, 0.0, 0.0)
+
+    def _candidate(self, accel_rms, gyro_rms):
+        drive_threshold = self.drive_exit if self.state == DRIVING else self.drive_enter
+        if accel_rms >= drive_threshold or gyro_rms >= self.turn_enter:
+            return DRIVING
+        idle_threshold = self.idle_enter if self.state == PARKED else self.idle_exit
+        if accel_rms >= idle_threshold:
+            return IDLE
+        return PARKED
+
+    def update(self, t, ax, ay, az, gx, gy, gz):
+        """One sample: time in seconds, accel in g, gyro in deg/s; returns MotionStatus"""
+        dt = 0.0 if self._last_time is None else max(0.0, t - self._last_time)
+        self._last_time = t
+        if self._first_time is None:
+            self._first_time = t
+        self.samples += 1
+        self.time_in_state[self.state] += dt
+
+        # Gravity low-pass / linear-accel high-pass
+        if self._gravity is None:
+            self._gravity = [ax, ay, az]
+        else:
+            k = dt / (self.gravity_tau + dt)
+            gravity = self._gravity
+            gravity[0] += k * (ax - gravity[0])
+            gravity[1] += k * (ay - gravity[1])
+            gravity[2] += k * (az - gravity[2])
+        lx, ly, lz = ax - self._gravity[0], ay - self._gravity[1], az - self._gravity[2]
+        self.accel_energy.push(t, lx * lx + ly * ly + lz * lz)
+
+        # Gyro zero-rate bias: calibration mean, then a slow EMA while the car is still.
+        # The MPU-6050 offset (up to ~20 deg/s) is well above turn_enter.
+        bias = self._gyro_bias
+        if t - self._first_time < self.bias_calib_s:
+            self._bias_samples += 1
+            k = 1.0 / self._bias_samples
+        elif self.state != DRIVING and self._pending != DRIVING:
+            k = dt / (self.bias_tau + dt)
+        else:
+            k = 0.0
+        if k:
+            bias[0] += k * (gx - bias[0])
+            bias[1] += k * (gy - bias[1])
+            bias[2] += k * (gz - bias[2])
+        gx, gy, gz = gx - bias[0], gy - bias[1], gz - bias[2]
+        self.gyro_energy.push(t, gx * gx + gy * gy + gz * gz)
+
+        # Complementary tilt filter
+        accel_pitch = math.degrees(math.atan2(-ax, math.hypot(ay, az)))
+        accel_roll = math.degrees(math.atan2(ay, az))
+        if self.samples == 1:
+            self._pitch, self._roll = accel_pitch, accel_roll
+        else:
+            a = self.tilt_alpha
+            self._pitch = a * (self._pitch + gy * dt) + (1.0 - a) * accel_pitch
+            self._roll = a * (self._roll + gx * dt) + (1.0 - a) * accel_roll
+
+        accel_rms = math.sqrt(max(0.0, self.accel_energy.mean()))
+        gyro_rms = math.sqrt(max(0.0, self.gyro_energy.mean()))
+        candidate = self._candidate(accel_rms, gyro_rms)
+
+        changed = False
+        if candidate == self.state:
+            self._pending = None
+        else:
+            if candidate != self._pending:
+                self._pending, self._pending_since = candidate, t
+            if t - self._pending_since >= self.dwell_s[candidate]:
+                old, self.state = self.state, candidate
+                self._pending = None
+                self.transitions += 1
+                changed = True
+
+        self.last = MotionStatus(self.state, changed, accel_rms, gyro_rms, self._pitch, self._roll)
+        if changed and self.on_transition is not None:
+            self.on_transition(old, self.state, self.last)
+        return self.last
+
+    def update_block(self, block):
+        """Feed an imu.ImuBlock; returns the status after its last sample"""
+        status = self.last
+        for t, (ax, ay, az), (gx, gy, gz) in zip(block.timestamps.tolist(), block.accel.tolist(),
+                                                  block.gyro.tolist()):
+            status = self.update(t, ax, ay, az, gx, gy, gz)
+        return status
+
+    def summary(self):
+        return {
+            "state": self.state,
+            "samples": self.samples,
+            "transitions": self.transitions,
+            "gyro_bias_dps": [round(b, 2) for b in self._gyro_bias],
+            "time_in_state_s": {state: round(seconds, 1) for state, seconds in self.time_in_state.items()},
+        }
+
+
+# ---------------- Traces ----------------
+TRACE_COLUMNS = ("t", "ax", "ay", "az", "gx", "gy", "gz")
+
+
+def load_trace(path):
+    """(N, 7) array [t, ax, ay, az, gx, gy, gz] from a CSV (header optional) or NPZ file"""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return np.column_stack([data[column] for column in TRACE_COLUMNS])
+    with open(path) as f:
+        has_header = not f.readline().lstrip()[:1].isdigit()
+    return np.loadtxt(path, delimiter=",", skiprows=int(has_header), ndmin=2)[:, :7]
+
+
+def synthetic_trace(rate_hz=200, seed=0, gyro_bias=(3.0, -5.0, 7.0)):
+    """Parked -> engine idle -> driving (with bumps and a turn) -> idle -> parked, in g and deg/s;
+    `gyro_bias` is a constant zero-rate offset like an uncalibrated MPU-6050's"""
+    rng = np.random.RandomState(seed)
+    segments = [(PARKED, 20.0), (IDLE, 15.0), (DRIVING, 40.0), (IDLE, 15.0), (PARKED, 20.0)]
+    rows, start = [], 0.0
+    for state, seconds in segments:
+        t = start + np.arange(int(seconds * rate_hz)) / rate_hz
+        accel = np.zeros((len(t), 3))
+        accel[:, 2] = 1.0
+        gyro = np.zeros((len(t), 3))
+        noise = {PARKED: 0.001, IDLE: 0.004, DRIVING: 0.03}[state]
+        accel += rng.normal(0.0, noise, accel.shape) + rng.normal(0.0, 0.0005, accel.shape)
+        if state == IDLE:
+            accel[:, 2] += 0.01 * np.sin(2 * np.pi * 30.0 * t)   # engine vibration
+        if state == DRIVING:
+            accel[:, 0] += 0.05 * np.sin(2 * np.pi * 0.2 * t)    # speeding up / braking
+            accel[rng.rand(len(t)) < 0.01, 2] += 0.3             # road bumps
+            gyro[:, 2] = 8.0 * np.sin(2 * np.pi * 0.05 * t)      # turns
+        gyro += rng.normal(0.0, 0.2, gyro.shape) + gyro_bias
+        rows.append(np.column_stack([t, accel, gyro]))
+        start += seconds
+    return np.concatenate(rows)
+
+
+def replay(trace, engine=None):
+    """Run a trace through an engine; returns (engine, [(t, old, new), ...])"""
+    transitions = []
+    engine = engine or VehicleStateEngine()
+    callback = engine.on_transition
+
+    def record(old, new, status):
+        transitions.append((round(engine._last_time, 2), old, new))
+        if callback is not None:
+            callback(old, new, status)
+
+    engine.on_transition = record
+    for t, ax, ay, az, gx, gy, gz in trace.tolist():
+        engine.update(t, ax, ay, az, gx, gy, gz)
+    engine.on_transition = callback
+    return engine, transitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay an IMU trace through the vehicle state engine")
+    parser.add_argument("trace", nargs="?", help="CSV or NPZ trace with t, ax, ay, az (g), gx, gy, gz (deg/s)")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated parked/idle/driving trace")
+    args = parser.parse_args(argv)
+    if not args.trace and not args.synthetic:
+        parser.error("pass a trace file or --synthetic")
+
+    trace = synthetic_trace() if args.synthetic else load_trace(args.trace)
+    engine, transitions = replay(trace)
+    print(json.dumps({"transitions": transitions, "summary": engine.summary()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Threaded capture -> inference -> render pipeline for the webcam loops.
+
+The camera is read on its own thread and only the newest frame is kept, so
+camera I/O no longer adds to the model time of every frame. Frames flow
+through bounded drop-oldest queues:
+
+    capture thread -> [queue] -> inference thread -> [queue] -> render (main thread)
+
+`infer(frame)` runs MediaPipe / the model and returns any result object,
+`render(frame, result)` draws on the frame and fires alerts. Rendering stays
+on the main thread because cv2.imshow / cv2.waitKey must run there.
+
+Replay sources (video files, image folders, synthetic frames) are not live,
+so their queues block instead of dropping and every frame is processed.
+
+pause() puts a running pipeline in standby: the source stays open and is
+read at `standby_fps`, frames go straight to the sink without infer/render,
+and the models stay loaded. resume() switches back, and the time until the
+first processed frame is recorded as a warm resume in summary().
+"""
+import collections
+import threading
+import time
+
+from drowsiness.sources import WindowSink, open_source
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self._items = collections.deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item, block=False):
+        """Append item; when full, drop the oldest or (block=True) wait for room"""
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: len(self._items) < self._items.maxlen or self._closed)
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None on timeout or once the queue is closed and empty"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if self._items:
+                item = self._items.popleft()
+                self._cond.notify_all()
+                return item
+            return None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """Rolling latency window (in seconds) for one pipeline stage"""
+
+    def __init__(self, window=120):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def mean_ms(self):
+        if not self.samples:
+            return 0.0
+        return 1000.0 * sum(self.samples) / len(self.samples)
+
+    def percentile_ms(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+        return 1000.0 * ordered[index]
+
+
+class Packet:
+    """A captured frame travelling through the pipeline"""
+
+    __slots__ = ("index", "timestamp", "frame", "result", "standby")
+
+    def __init__(self, index, timestamp, frame, standby=False):
+        self.index = index
+        self.timestamp = timestamp
+        self.frame = frame
+        self.result = None
+        self.standby = standby
+
+
+class Pipeline:
+    """
+    Run `infer` and `render` over a camera stream on separate stages
+
+    Args:
+        infer: callable(frame) -> result, runs on the inference thread
+        render: callable(frame, result), draws / alerts on the main thread
+        source: FrameSource or spec accepted by sources.open_source()
+        window_name: title of the preview window
+        sink: object with show(frame) -> keep_running and close(),
+              defaults to a WindowSink
+        queue_size: capacity of each inter-stage queue (1 = newest frame only)
+        report_every: seconds between latency reports, 0 to disable
+        standby_fps: source read rate while paused
+        metrics: optional metrics.Metrics; capture / infer / render / show / latency
+                 are observed there too, plus fps and drop gauges
+        controller: optional adaptive.AdaptiveController; frames it does not want
+                    inferred are rendered with the previous result
+    """
+
+    STAGES = ("capture", "infer", "render", "latency")
+
+    def __init__(self, infer, render, source=0, window_name="Driver Monitor",
+                 sink=None, queue_size=1, report_every=5.0, standby_fps=2.0, metrics=None,
+                 controller=None):
+        self.infer = infer
+        self.render = render
+        self.source = source
+        self.sink = sink if sink is not None else WindowSink(window_name)
+        self.report_every = report_every
+        self.standby_fps = standby_fps
+        self._block = False
+
+        self.frames = DropOldestQueue(queue_size)
+        self.results = DropOldestQueue(queue_size)
+        self.stats = {name: StageStats() for name in self.STAGES}
+        self._stop = threading.Event()
+        self._started = None
+        self._rendered = 0
+        self._active = threading.Event()
+        self._active.set()
+        self.run_started = None
+        self._resume_at = None
+        self.cold_start_ms = None
+        self.resume_ms = []
+        self.standby_frames = 0
+        self.controller = controller
+        self._last_result = None
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.add_collector(self._gauges)
+
+    # ---------------- Stages ----------------
+    def _capture_loop(self, cap):
+        index = 0
+        standby = False
+        try:
+            while not self._stop.is_set():
+                if standby and self._active.is_set() and cap.live:
+                    cap.read()  # drop the frame buffered during standby
+                standby = not self._active.is_set()
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if not standby:
+                    self._observe("capture", time.perf_counter() - start)
+                self.frames.put(Packet(index, start, frame, standby), block=self._block)
+                index += 1
+                if standby:
+                    # Trickle rate; resume() wakes this early
+                    self._active.wait(1.0 / self.standby_fps)
+        finally:
+            self.frames.close()
+
+    def _infer_loop(self):
+        try:
+            while not self._stop.is_set():
+                packet = self.frames.get(timeout=0.1)
+                if packet is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                if packet.standby:
+                    pass
+                elif self.controller is not None and not self.controller.due(packet.timestamp):
+                    packet.result = self._last_result
+                else:
+                    start = time.perf_counter()
+                    packet.result = self._last_result = self.infer(packet.frame)
+                    now = time.perf_counter()
+                    self._observe("infer", now - start)
+                    if self.controller is not None:
+                        self.controller.observe(now - start, now)
+                self.results.put(packet, block=self._block)
+        finally:
+            self.results.close()
+
+    def _render_one(self, packet):
+        if self.cold_start_ms is None:
+            # run() -> first frame out, standby or not: source open and first read done
+            self.cold_start_ms = 1000.0 * (time.perf_counter() - self.run_started)
+        if packet.standby:
+            self.standby_frames += 1
+            return self.sink.show(packet.frame)
+        start = time.perf_counter()
+        self.render(packet.frame, packet.result)
+        drawn = time.perf_counter()
+        keep_running = self.sink.show(packet.frame)
+        now = time.perf_counter()
+        self._observe("render", now - start)
+        self._observe("latency", now - packet.timestamp)
+        if self.metrics is not None:
+            self.metrics.observe("show", now - drawn)
+        self._rendered += 1
+        resume_at = self._resume_at
+        if resume_at is not None and packet.timestamp >= resume_at:
+            self.resume_ms.append(1000.0 * (now - resume_at))
+            self._resume_at = None
+        return keep_running
+
+    def _observe(self, stage, seconds):
+        self.stats[stage].add(seconds)
+        if self.metrics is not None:
+            self.metrics.observe(stage, seconds)
+
+    def _gauges(self):
+        return {"fps": self.fps(), "active": int(self.active),
+                "dropped_capture": self.frames.dropped, "dropped_infer": self.results.dropped}
+
+    # ---------------- Control ----------------
+    @property
+    def active(self):
+        return self._active.is_set()
+
+    def pause(self):
+        """Standby: keep the source open at standby_fps and skip infer / render"""
+        self._active.clear()
+
+    def resume(self):
+        if not self._active.is_set():
+            self._resume_at = time.perf_counter()
+            self._active.set()
+
+    def stop(self):
+        self._stop.set()
+        self._active.set()
+        self.frames.close()
+        self.results.close()
+
+    def fps(self):
+        if not self._started:
+            return 0.0
+        elapsed = time.perf_counter() - self._started
+        return self._rendered / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        parts = [f"{name} {self.stats[name].mean_ms():.1f} ms" for name in self.STAGES]
+        print(f"[Pipeline] {' | '.join(parts)} | {self.fps():.1f} fps"
+              f" | dropped {self.frames.dropped}/{self.results.dropped}")
+
+    def summary(self):
+        """Per-stage latency and throughput as a plain dict"""
+        summary = {
+            name: {
+                "mean_ms": round(stats.mean_ms(), 2),
+                "p95_ms": round(stats.percentile_ms(95), 2),
+                "count": stats.count,
+            }
+            for name, stats in self.stats.items()
+        }
+        summary["fps"] = round(self.fps(), 2)
+        summary["dropped"] = {"capture": self.frames.dropped, "infer": self.results.dropped}
+        if self.cold_start_ms is not None:
+            summary["cold_start_ms"] = round(self.cold_start_ms, 1)
+        if self.resume_ms:
+            ordered = sorted(self.resume_ms)
+            summary["resume_ms"] = {"count": len(ordered), "p50": round(ordered[len(ordered) // 2], 1),
+                                    "max": round(ordered[-1], 1)}
+        summary["standby_frames"] = self.standby_frames
+        return summary
+
+    def run(self):
+        """Block until the sink asks to stop or the source runs out, then return summary()"""
+        self.run_started = time.perf_counter()
+        cap = open_source(self.source)
+        if not cap.isOpened():
+            print("Camera couldn't be opened.")
+            return self.summary()
+        self._block = not cap.live
+        if self.controller is not None:
+            self.controller.start(cap)
+
+        capture = threading.Thread(target=self._capture_loop, args=(cap,), daemon=True)
+        inference = threading.Thread(target=self._infer_loop, daemon=True)
+        self._started = time.perf_counter()
+        capture.start()
+        inference.start()
+
+        last_report = self._started
+        try:
+            while not self._stop.is_set():
+                packet = self.results.get(timeout=0.1)
+                if packet is None:
+                    if self.results.closed:
+                        break
+                    continue
+                if not self._render_one(packet):
+                    break
+                if self.report_every and time.perf_counter() - last_report >= self.report_every:
+                    self.report()
+                    last_report = time.perf_counter()
+        finally:
+            self.stop()
+            capture.join(timeout=1.0)
+            inference.join(timeout=1.0)
+            cap.release()
+            self.sink.close()
+
+        if self.report_every:
+            self.report()
+        return self.summary()
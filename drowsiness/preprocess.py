@@ -0,0 +1,175 @@
+"""
+OpenCV / NumPy preprocessing for face and hand crops
+
+Replaces the per-frame torchvision chain
+
+    ToPILImage -> Grayscale -> Resize -> [CenterCrop] -> ToTensor -> [Normalize]
+
+with cv2 calls that write straight into reused buffers. Grayscale conversion
+runs on the BGR slice of the frame (no copy of the crop), resize writes into
+a preallocated uint8 image, and scaling / normalization write into a
+preallocated float32 tensor that the model reads directly.
+
+Note: ToPILImage() treats the BGR array it gets from OpenCV as RGB, so the
+trained models have always seen RGB-weighted grayscale of BGR data. The
+COLOR_RGB2GRAY conversion below keeps that behaviour on purpose.
+
+Run `python -m drowsiness.preprocess` for the parity check against the
+torchvision pipelines and a per-frame microbenchmark.
+"""
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+import torch
+
+
+class CropPreprocessor:
+    """
+    Grayscale + resize (+ center crop) + scale / normalize into a (1, H, W) float32 tensor
+
+    Args:
+        size: (height, width) the crop is resized to
+        center_crop: optional square side cropped from the resized image
+        mean, std: optional normalization applied after scaling to [0, 1]
+        max_batch_size: initial capacity of the batch buffer used by batch()
+    """
+
+    def __init__(self, size=(128, 128), center_crop=None, mean=None, std=None, max_batch_size=4):
+        self.size = tuple(size)
+        self.center_crop = center_crop
+        mean = 0.0 if mean is None else float(mean)
+        std = 1.0 if std is None else float(std)
+        # (x / 255 - mean) / std == x * scale + offset
+        self.scale = np.float32(1.0 / (255.0 * std))
+        self.offset = np.float32(-mean / std)
+
+        height, width = self.size
+        self._gray = None
+        self._resized = np.empty((height, width), dtype=np.uint8)
+        if center_crop:
+            top = int(round((height - center_crop) / 2.0))
+            left = int(round((width - center_crop) / 2.0))
+            self._window = (slice(top, top + center_crop), slice(left, left + center_crop))
+            self.output_shape = (1, center_crop, center_crop)
+        else:
+            self._window = (slice(None), slice(None))
+            self.output_shape = (1, height, width)
+        self._batch = torch.empty((max_batch_size,) + self.output_shape, dtype=torch.float32)
+
+    def _gray_view(self, crop):
+        if crop.ndim == 2:
+            return crop
+        # Reuse the grayscale scratch buffer while crops keep the same size
+        if self._gray is None or self._gray.shape != crop.shape[:2]:
+            self._gray = np.empty(crop.shape[:2], dtype=np.uint8)
+        return cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY, dst=self._gray)
+
+    def preprocess_into(self, crop, out):
+        """Write the preprocessed crop into `out`, a (1, H, W) float32 tensor"""
+        gray = self._gray_view(crop)
+        height, width = self.size
+        interpolation = cv2.INTER_AREA if gray.shape[0] > height else cv2.INTER_LINEAR
+        cv2.resize(gray, (width, height), dst=self._resized, interpolation=interpolation)
+        target = out.numpy()[0]
+        np.multiply(self._resized[self._window], self.scale, out=target, casting="unsafe")
+        if self.offset:
+            np.add(target, self.offset, out=target)
+        return out
+
+    def __call__(self, crop):
+        """Drop-in for the torchvision transform: returns a new (1, H, W) tensor"""
+        return self.preprocess_into(crop, torch.empty(self.output_shape, dtype=torch.float32))
+
+    def batch(self, crops):
+        """Preprocess crops into the shared batch buffer and return a (N, 1, H, W) view of it"""
+        if len(crops) > self._batch.shape[0]:
+            self._batch = torch.empty((len(crops),) + self.output_shape, dtype=torch.float32)
+        for row, crop in enumerate(crops):
+            self.preprocess_into(crop, self._batch[row])
+        return self._batch[:len(crops)]
+
+
+# ---------------- Parity check + microbenchmark ----------------
+def _torchvision_pipelines():
+    import torchvision.transforms as transforms
+
+    return {
+        # drowsy.py / MTL detector
+        "128": (
+            transforms.Compose([
+                transforms.ToPILImage(),
+                transforms.Grayscale(num_output_channels=1),
+                transforms.Resize((128, 128)),
+                transforms.ToTensor(),
+            ]),
+            CropPreprocessor((128, 128)),
+        ),
+        # dorwsy-mt.py
+        "96-84-norm": (
+            transforms.Compose([
+                transforms.ToPILImage(),
+                transforms.Grayscale(num_output_channels=1),
+                transforms.Resize((96, 96)),
+                transforms.CenterCrop(84),
+                transforms.ToTensor(),
+                transforms.Normalize(mean=[0.5], std=[0.5]),
+            ]),
+            CropPreprocessor((96, 96), center_crop=84, mean=0.5, std=0.5),
+        ),
+    }
+
+
+def _sample_crops(count, seed=0):
+    """Face-sized crops sliced out of synthetic frames, like the live loops do"""
+    from drowsiness.sources import SyntheticSource
+
+    rng = np.random.RandomState(seed)
+    crops = []
+    for frame in SyntheticSource(count, seed=seed):
+        h = rng.randint(90, 260)
+        w = rng.randint(80, 220)
+        y = rng.randint(0, frame.shape[0] - h)
+        x = rng.randint(0, frame.shape[1] - w)
+        crops.append(frame[y:y + h, x:x + w])
+    return crops
+
+
+def _time_per_crop(fn, crops, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for crop in crops:
+            fn(crop)
+    return (time.perf_counter() - start) / (repeat * len(crops))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parity check and microbenchmark for CropPreprocessor")
+    parser.add_argument("--crops", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.03,
+                        help="max allowed mean absolute difference (in [0, 1] pixel units)")
+    args = parser.parse_args(argv)
+
+    crops = _sample_crops(args.crops)
+    ok = True
+    for name, (reference, fast) in _torchvision_pipelines().items():
+        diffs = [torch.abs(reference(crop) - fast(crop)) for crop in crops]
+        mean_diff = float(sum(d.mean() for d in diffs) / len(diffs))
+        max_diff = float(max(d.max() for d in diffs))
+        ok = ok and mean_diff <= args.tolerance
+
+        buffer = torch.empty(fast.output_shape, dtype=torch.float32)
+        ref_ms = 1000.0 * _time_per_crop(reference, crops, args.repeat)
+        fast_ms = 1000.0 * _time_per_crop(lambda crop: fast.preprocess_into(crop, buffer), crops, args.repeat)
+        print(f"[{name}] mean |diff| {mean_diff:.4f}  max |diff| {max_diff:.4f}  "
+              f"torchvision {ref_ms:.3f} ms  cv2 {fast_ms:.3f} ms  speedup x{ref_ms / fast_ms:.1f}")
+
+    print("parity OK" if ok else "parity FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Event recorder: pre / post-event clips from an in-memory ring
+
+When a drowsy or emergency event fired, nothing but a print was kept.
+gesture_log.txt only holds a timestamp, a label and a confidence.
+EventRecorder keeps the last `pre_s` seconds of JPEG-compressed frames and
+their feature vectors in memory. When an event triggers, it writes them to
+disk together with the `post_s` seconds that follow:
+
+    recorder = EventRecorder("events", pre_s=10, post_s=5, max_disk_mb=500).start()
+    recorder.add(frame, {"ear": 0.21, "state": "drowsy"})   # every frame, never blocks
+    recorder.trigger("drowsy", {"perclos": 0.4})             # when the event fires
+    recorder.close()                                          # finishes open clips
+
+The work is split over three threads, so the camera loop only pays for a
+frame copy:
+
+    caller    add() copies (and downsizes) the frame into a drop-oldest queue
+    encoder   JPEG-encodes into the ring and closes clips whose post window ended
+    writer    writes finished clips to disk and evicts old ones
+
+If the encoder falls behind, the oldest queued frames are dropped (counted
+in summary()) rather than delaying the caller. A trigger while a clip is
+still collecting extends that clip instead of starting an overlapping one.
+
+Each clip is a directory events/<date>-<time>-<kind>/ holding
+frame-NNNNN.jpg, features.npz (t_s relative to the first event plus the
+feature columns) and event.json. It is written under a .tmp name and
+renamed, so `python -m drowsiness --source events/<clip>` replays it. Disk
+use stays under `max_disk_mb`: the least recently used clips go first, and
+touch(name) marks a clip as used (e.g. after it was uploaded or reviewed).
+"""
+import collections
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+
+from drowsiness.pipeline import DropOldestQueue
+
+RingFrame = collections.namedtuple("RingFrame", "timestamp jpeg features")
+
+
+class Clip:
+    """Frames of one event window while it is being collected"""
+
+    def __init__(self, kind, timestamp, info, pre_s, post_s, ring):
+        self.kind = kind
+        self.events = [(kind, timestamp, info)]
+        self.wall_time = time.time()
+        self.start = timestamp - pre_s
+        self.end = timestamp + post_s
+        self.post_s = post_s
+        self.frames = [frame for frame in ring if frame.timestamp >= self.start]
+
+    def extend(self, kind, timestamp, info):
+        self.events.append((kind, timestamp, info))
+        self.end = max(self.end, timestamp + self.post_s)
+
+
+class EventRecorder:
+    """
+    Args:
+        directory: where clip directories are written
+        pre_s: seconds of frames kept in memory and written before an event
+        post_s: seconds recorded after the (last) event of a clip
+        max_disk_mb: budget for all clips in `directory`; least recently used are evicted
+        max_width: frames wider than this are downsized before encoding, None keeps them
+        quality: JPEG quality
+        max_ring_mb: memory bound of the ring on top of pre_s
+        queue_size: frames waiting for the encoder before the oldest is dropped
+        clock: time source for add() / trigger() timestamps
+    """
+
+    def __init__(self, directory="events", pre_s=10.0, post_s=5.0, max_disk_mb=500.0, max_width=640,
+                 quality=80, max_ring_mb=64.0, queue_size=8, clock=time.monotonic):
+        self.directory = directory
+        self.pre_s = pre_s
+        self.post_s = post_s
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.max_width = max_width
+        self.quality = int(quality)
+        self.max_ring_bytes = int(max_ring_mb * 1024 * 1024)
+        self.clock = clock
+
+        self._frames = DropOldestQueue(queue_size)
+        self._triggers = collections.deque()
+        self._clips_out = queue.Queue()
+        self._ring = collections.deque()
+        self._ring_bytes = 0
+        self._open = []
+        self._index = collections.OrderedDict()  # clip name -> bytes, least recently used first
+        self._index_lock = threading.Lock()
+        self._disk_bytes = 0
+        self._threads = []
+
+        self.frames = 0
+        self.encoded = 0
+        self.triggers = 0
+        self.clips = 0
+        self.evicted = 0
+        self.write_errors = 0
+        self.last_clip = None
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+        for name, target in (("recorder-encode", self._encode_loop), ("recorder-write", self._write_loop)):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self, timeout=5.0):
+        """Stop taking frames, finish open clips with what was recorded and wait for the writes"""
+        self._frames.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ---------------- Caller Side ----------------
+    def add(self, frame, features=None, timestamp=None):
+        """Queue one BGR frame (copied) and its feature dict; drops the oldest queued frame when busy"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        height, width = frame.shape[:2]
+        if self.max_width and width > self.max_width:
+            size = (self.max_width, max(1, round(height * self.max_width / width)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            # The caller draws on its frame right after
+            frame = frame.copy()
+        self.frames += 1
+        self._frames.put((timestamp, frame, dict(features or {})))
+
+    def trigger(self, kind, info=None, timestamp=None):
+        """Record an event: the clip covers pre_s before and post_s after `timestamp`"""
+        self.triggers += 1
+        self._triggers.append((kind, self.clock() if timestamp is None else timestamp, dict(info or {})))
+
+    def touch(self, name):
+        """Mark clip `name` as used so eviction takes older ones first"""
+        path = os.path.join(self.directory, name)
+        with self._index_lock:
+            if name in self._index:
+                self._index.move_to_end(name)
+                os.utime(os.path.join(path, "event.json"))
+
+    # ---------------- Encoder Thread ----------------
+    def _take_triggers(self):
+        while self._triggers:
+            kind, timestamp, info = self._triggers.popleft()
+            clip = next((clip for clip in self._open if clip.start <= timestamp <= clip.end), None)
+            if clip is not None:
+                clip.extend(kind, timestamp, info)
+            else:
+                self._open.append(Clip(kind, timestamp, info, self.pre_s, self.post_s, self._ring))
+
+    def _push(self, timestamp, frame, features):
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        entry = RingFrame(timestamp, jpeg.tobytes(), features)
+        self.encoded += 1
+        self._ring.append(entry)
+        self._ring_bytes += len(entry.jpeg)
+        while self._ring and (self._ring[0].timestamp < timestamp - self.pre_s
+                              or self._ring_bytes > self.max_ring_bytes):
+            self._ring_bytes -= len(self._ring.popleft().jpeg)
+        for clip in self._open:
+            if clip.start <= timestamp <= clip.end:
+                clip.frames.append(entry)
+
+    def _close_clips(self, latest, final=False):
+        still_open = []
+        for clip in self._open:
+            # Past the post window in frames, or frames stopped coming
+            if final or (latest is not None and latest >= clip.end) or self.clock() >= clip.end + 1.0:
+                self._clips_out.put(clip)
+            else:
+                still_open.append(clip)
+        self._open = still_open
+
+    def _encode_loop(self):
+        latest = None
+        try:
+            while True:
+                item = self._frames.get(timeout=0.1)
+                self._take_triggers()
+                if item is not None:
+                    self._push(*item)
+                    latest = item[0]
+                elif self._frames.closed:
+                    break
+                self._close_clips(latest)
+        finally:
+            self._take_triggers()
+            self._close_clips(latest, final=True)
+            self._clips_out.put(None)
+
+    # ---------------- Writer Thread ----------------
+    def _write_loop(self):
+        while True:
+            clip = self._clips_out.get()
+            if clip is None:
+                break
+            try:
+                self._write(clip)
+            except OSError as exc:
+                self.write_errors += 1
+                print(f"[Recorder] Could not write {clip.kind} clip: {exc}")
+
+    def _clip_name(self, clip):
+        base = time.strftime("%Y%m%d-%H%M%S", time.localtime(clip.wall_time)) + f"-{clip.kind}"
+        name, suffix = base, 1
+        while os.path.exists(os.path.join(self.directory, name)):
+            suffix += 1
+            name = f"{base}-{suffix}"
+        return name
+
+    def _write(self, clip):
+        from drowsiness.score import save_npz, to_columns
+
+        name = self._clip_name(clip)
+        final = os.path.join(self.directory, name)
+        tmp = final + ".tmp"
+        os.makedirs(tmp, exist_ok=True)
+        origin = clip.events[0][1]
+        for number, frame in enumerate(clip.frames):
+            with open(os.path.join(tmp, f"frame-{number:05d}.jpg"), "wb") as f:
+                f.write(frame.jpeg)
+        rows = [dict(t_s=frame.timestamp - origin, **frame.features) for frame in clip.frames]
+        save_npz(os.path.join(tmp, "features.npz"), to_columns(rows))
+        span = clip.frames[-1].timestamp - clip.frames[0].timestamp if len(clip.frames) > 1 else 0.0
+        event = {
+            "events": [{"kind": kind, "t_s": round(timestamp - origin, 3), "info": info}
+                       for kind, timestamp, info in clip.events],
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(clip.wall_time)),
+            "pre_s": self.pre_s,
+            "post_s": self.post_s,
+            "frames": len(clip.frames),
+            "fps": round((len(clip.frames) - 1) / span, 1) if span > 0 else None,
+        }
+        with open(os.path.join(tmp, "event.json"), "w") as f:
+            json.dump(event, f, indent=2, default=str)
+        os.rename(tmp, final)
+
+        size = _dir_bytes(final)
+        with self._index_lock:
+            self._index[name] = size
+            self._disk_bytes += size
+            self._evict(keep=name)
+        self.clips += 1
+        self.last_clip = name
+        print(f"[Recorder] {name}: {len(clip.frames)} frames, {size / 1024.0:.0f} KB")
+
+    # ---------------- Disk Budget ----------------
+    def _load_index(self):
+        """Index existing clips by last use; leftovers of interrupted writes are removed"""
+        clips = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            if name.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            marker = os.path.join(path, "event.json")
+            if os.path.exists(marker):
+                clips.append((os.path.getmtime(marker), name, _dir_bytes(path)))
+        with self._index_lock:
+            for _, name, size in sorted(clips):
+                self._index[name] = size
+                self._disk_bytes += size
+            self._evict()
+
+    def _evict(self, keep=None):
+        while self._disk_bytes > self.max_disk_bytes and self._index:
+            name = next(iter(self._index))
+            if name == keep:
+                # A single clip over budget is still kept
+                break
+            self._disk_bytes -= self._index.pop(name)
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self.evicted += 1
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "encoded": self.encoded,
+            "dropped": self._frames.dropped,
+            "ring_s": round(self._ring[-1].timestamp - self._ring[0].timestamp, 1) if self._ring else 0.0,
+            "ring_kb": round(self._ring_bytes / 1024.0, 1),
+            "triggers": self.triggers,
+            "clips": self.clips,
+            "evicted": self.evicted,
+            "disk_mb": round(self._disk_bytes / (1024.0 * 1024.0), 2),
+            "write_errors": self.write_errors,
+        }
+
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+class RecordingRender:
+    """
+    Pipeline render callable that feeds an EventRecorder, then draws
+
+    The raw frame and Result.features are recorded before drawing. The onset
+    of a drowsy state and a fist gesture trigger clips.
+
+    Args:
+        recorder: started EventRecorder
+        draw: callable(frame, result), e.g. Detector.draw
+        fist_cooldown_s: minimum seconds between two fist triggers
+    """
+
+    def __init__(self, recorder, draw, fist_cooldown_s=10.0):
+        self.recorder = recorder
+        self.draw = draw
+        self.fist_cooldown_s = fist_cooldown_s
+        self._was_drowsy = False
+        self._last_fist = None
+
+    def __call__(self, frame, result):
+        hand = next((region.label for region in result.regions if region.kind == "hand"), "")
+        features = dict(result.features or {}, state=result.state or "", drowsy=bool(result.drowsy), hand=hand)
+        now = self.recorder.clock()
+        self.recorder.add(frame, features, now)
+        if result.drowsy and not self._was_drowsy:
+            self.recorder.trigger("drowsy", {"state": result.state}, now)
+        self._was_drowsy = bool(result.drowsy)
+        if hand == "Fist" and (self._last_fist is None or now - self._last_fist >= self.fist_cooldown_s):
+            self.recorder.trigger("fist", timestamp=now)
+            self._last_fist = now
+        self.draw(frame, result)
@@ -0,0 +1,374 @@
+"""
+Offline batch scoring of recorded cabin video
+
+Scores recordings with the same detectors that run live
+(drowsiness/detectors.py: "mtl" for MTL (drowsy & yawn)/drowsy_detection.py,
+"ear" for Mediapipe/drowsy.py, ...). Work is spread over a process pool, so
+backfills run faster than real time on multi-core servers:
+
+    python -m drowsiness.score recordings/ --detector mtl --out scores/ --jobs 8
+    python -m drowsiness.score a.mp4 b.mp4 --detector ear --format parquet
+
+Each video is cut into `--segment-s` second segments, which the pool scores
+independently. Frames are decoded one at a time and never loaded whole.
+Every frame gives one row: frame, time_s, state, drowsy, face, hand (gesture
+label), the FatigueMonitor window metrics (perclos, blink_rate, ...) and the
+detector's Result.features (ear / mar / head pose, or head probabilities).
+The rows of a video are written as columns to <out>/<name>.npz, or to
+<name>.parquet with pyarrow, next to a <name>.json report.
+
+Checkpoints: a finished segment is written atomically to
+<out>/.parts/<name>-<id>/ and a rerun skips the segments already there, so
+an interrupted backfill resumes where it stopped. <id> hashes the video's
+path, size and mtime and the scoring options, so a changed file or
+detector starts over.
+
+A segment first replays `--warmup-s` seconds before its start without
+writing them, so the rolling fatigue windows are filled at its first row.
+Time is video time (frame index / fps), not the wall clock. Hands run on
+every frame rather than behind the HandGate, whose hot window is wall-clock
+based, so scores do not depend on how fast the machine is.
+"""
+import argparse
+import collections
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from drowsiness.benchmark import DETECTORS
+from drowsiness.sources import VideoFileSource
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+FORMATS = ("npz", "parquet")
+# FatigueSnapshot fields written with every row
+FATIGUE_COLUMNS = ("perclos", "blink_rate", "blink_ms", "yawn_rate", "microsleeps", "mean_ear",
+                   "mean_head_angle", "eyes_closed_s")
+
+Segment = collections.namedtuple("Segment", "video name index count start end fps")
+
+
+# ---------------- Planning ----------------
+def find_videos(paths):
+    """Video files in `paths`; directories are searched recursively"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                videos.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            videos.append(path)
+    return [os.path.abspath(video) for video in videos]
+
+
+def video_id(path, options):
+    stat = os.stat(path)
+    identity = json.dumps([path, stat.st_size, int(stat.st_mtime), options], sort_keys=True)
+    return hashlib.sha1(identity.encode()).hexdigest()[:12]
+
+
+def plan_segments(path, segment_s):
+    """Segments of one video; a single open-ended one when the frame count is unknown"""
+    source = VideoFileSource(path)
+    try:
+        if not source.isOpened():
+            raise ValueError(f"Cannot open video '{path}'")
+        fps, count = source.fps(), source.frame_count()
+    finally:
+        source.release()
+    name = os.path.splitext(os.path.basename(path))[0]
+    length = max(1, int(round(segment_s * fps)))
+    starts = list(range(0, count, length)) if count else [0]
+    # The header count can be off by a few frames: the last segment reads to the end
+    return [Segment(path, name, i, len(starts), start, starts[i + 1] if i + 1 < len(starts) else None, fps)
+            for i, start in enumerate(starts)]
+
+
+# ---------------- Columns ----------------
+def to_columns(rows):
+    """Row dicts -> {name: array}; missing values are "" for text and NaN for numbers"""
+    names = []
+    for row in rows:
+        names.extend(name for name in row if name not in names)
+    columns = collections.OrderedDict()
+    for name in names:
+        values = [row.get(name) for row in rows]
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, str) for v in present):
+            columns[name] = np.array([v or "" for v in values], dtype=str)
+        elif len(present) == len(values) and all(isinstance(v, (bool, np.bool_)) for v in present):
+            columns[name] = np.array(values, dtype=bool)
+        elif len(present) == len(values) and all(isinstance(v, (int, np.integer)) for v in present):
+            columns[name] = np.array(values, dtype=np.int64)
+        else:
+            columns[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    return columns
+
+
+def concat_columns(parts):
+    """Concatenate per-segment columns; a column missing from a part is filled like to_columns does"""
+    names = []
+    for part in parts:
+        names.extend(name for name in part if name not in names)
+    columns = collections.OrderedDict()
+    for name in names:
+        text = any(part[name].dtype.kind == "U" for part in parts if name in part)
+        complete = all(name in part for part in parts)
+        chunks = []
+        for part in parts:
+            rows = len(next(iter(part.values()))) if part else 0
+            if name in part:
+                chunks.append(part[name] if text or complete else part[name].astype(np.float64))
+            else:
+                chunks.append(np.full(rows, "" if text else np.nan, dtype=str if text else np.float64))
+        columns[name] = np.concatenate(chunks) if chunks else np.array([])
+    return columns
+
+
+def save_npz(path, columns, compressed=False):
+    """Write atomically: a checkpoint is either complete or absent"""
+    tmp = path + ".tmp.npz"
+    (np.savez_compressed if compressed else np.savez)(tmp, **columns)
+    os.replace(tmp, path)
+
+
+def load_npz(path):
+    with np.load(path) as data:
+        return collections.OrderedDict((name, data[name]) for name in data.files)
+
+
+def require_parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("--format parquet needs pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def save_parquet(path, columns):
+    pa, pq = require_parquet()
+    tmp = path + ".tmp"
+    pq.write_table(pa.table({name: pa.array(values) for name, values in columns.items()}), tmp)
+    os.replace(tmp, path)
+
+
+# ---------------- Worker Process ----------------
+_detector = None
+_fatigue = None
+
+
+class VideoClock:
+    """FatigueMonitor clock reading the current frame's video time"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _init_worker(detector, backend, threads):
+    """Load the detector once per pool process"""
+    global _detector, _fatigue
+    import cv2
+    from drowsiness.detectors import create
+
+    cv2.setNumThreads(threads)
+    _detector = create(detector, backend=backend, gate_hands=False)
+    if "torch" in sys.modules:
+        # One process per core: intra-op threads would only contend
+        sys.modules["torch"].set_num_threads(threads)
+    # Pristine monitor, copied for every segment
+    _fatigue = copy.deepcopy(_detector.fatigue)
+
+
+def frame_row(index, timestamp, result, fatigue):
+    row = {
+        "frame": index,
+        "time_s": timestamp,
+        "state": result.state or "",
+        "drowsy": bool(result.drowsy),
+        "face": any(region.kind == "face" for region in result.regions),
+        "hand": next((region.label for region in result.regions if region.kind == "hand"), ""),
+    }
+    if fatigue is not None:
+        row.update((name, getattr(fatigue.last, name)) for name in FATIGUE_COLUMNS)
+    row.update(result.features or {})
+    return row
+
+
+def score_segment(segment, warmup_s, part_path):
+    """Score one segment in a pool process and write its checkpoint; returns (segment, rows, seconds)"""
+    detector = _detector
+    detector.reset()
+    clock = VideoClock()
+    if _fatigue is not None:
+        detector.fatigue = copy.deepcopy(_fatigue)
+        detector.fatigue.clock = clock
+
+    first = max(0, segment.start - int(round(warmup_s * segment.fps)))
+    source = VideoFileSource(segment.video)
+    rows = []
+    start = time.perf_counter()
+    try:
+        if first:
+            source.seek(first)
+        index = first
+        for frame in source:
+            if segment.end is not None and index >= segment.end:
+                break
+            clock.now = index / segment.fps
+            result = detector.process(frame)
+            if index >= segment.start:
+                rows.append(frame_row(index, clock.now, result, detector.fatigue))
+            index += 1
+    finally:
+        source.release()
+    save_npz(part_path, to_columns(rows))
+    return segment, len(rows), time.perf_counter() - start
+
+
+# ---------------- Orchestration ----------------
+class VideoJob:
+    """Segments, checkpoint directory and outputs of one video"""
+
+    def __init__(self, path, out_dir, fmt, options, segment_s):
+        self.path = path
+        self.segments = plan_segments(path, segment_s)
+        self.name = self.segments[0].name
+        self.id = video_id(path, options)
+        self.options = options
+        self.output = os.path.join(out_dir, f"{self.name}.{fmt}")
+        self.report_path = os.path.join(out_dir, f"{self.name}.json")
+        self.parts_dir = os.path.join(out_dir, ".parts", f"{self.name}-{self.id}")
+        self.format = fmt
+        self.score_s = 0.0
+
+    def part_path(self, segment):
+        return os.path.join(self.parts_dir, f"seg-{segment.index:05d}.npz")
+
+    def finished(self):
+        """Scored by an earlier run with the same video and options"""
+        if not os.path.exists(self.output) or not os.path.exists(self.report_path):
+            return False
+        with open(self.report_path) as f:
+            return json.load(f).get("id") == self.id
+
+    def pending(self):
+        os.makedirs(self.parts_dir, exist_ok=True)
+        return [segment for segment in self.segments if not os.path.exists(self.part_path(segment))]
+
+    def complete(self):
+        return all(os.path.exists(self.part_path(segment)) for segment in self.segments)
+
+    def finalize(self):
+        """Merge the checkpoints into the output file, write the report, drop the checkpoints"""
+        columns = concat_columns([load_npz(self.part_path(segment)) for segment in self.segments])
+        if self.format == "parquet":
+            save_parquet(self.output, columns)
+        else:
+            save_npz(self.output, columns, compressed=True)
+        frames = len(columns["frame"]) if "frame" in columns else 0
+        fps = self.segments[0].fps
+        report = {
+            "id": self.id,
+            "video": self.path,
+            "output": self.output,
+            "options": self.options,
+            "frames": frames,
+            "video_s": round(frames / fps, 2),
+            "segments": len(self.segments),
+            "worker_s": round(self.score_s, 2),
+            "drowsy_pct": round(100.0 * float(np.mean(columns["drowsy"])), 2) if frames else 0.0,
+        }
+        tmp = self.report_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp, self.report_path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(self.parts_dir))
+        except OSError:
+            pass  # other videos still have checkpoints
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m drowsiness.score",
+                                     description="Score recorded videos with a detector, in parallel and resumably")
+    parser.add_argument("inputs", nargs="+", help="video files or directories (searched recursively)")
+    parser.add_argument("--detector", default="mtl", choices=sorted(DETECTORS))
+    parser.add_argument("--backend", help="model backend for the CNN detectors, as for python -m drowsiness")
+    parser.add_argument("--out", default="scores", help="output directory")
+    parser.add_argument("--format", default="npz", choices=FORMATS, help="parquet needs pyarrow")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="pool processes")
+    parser.add_argument("--threads", type=int, default=1, help="OpenCV / torch threads per process")
+    parser.add_argument("--segment-s", type=float, default=600.0, help="seconds of video per work unit / checkpoint")
+    parser.add_argument("--warmup-s", type=float, default=60.0,
+                        help="seconds replayed before each segment to fill the fatigue windows")
+    args = parser.parse_args(argv)
+    if args.format == "parquet":
+        # Fail now, not after hours of scoring
+        require_parquet()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error("no video files found")
+    names = collections.Counter(os.path.splitext(os.path.basename(video))[0] for video in videos)
+    clashes = sorted(name for name, count in names.items() if count > 1)
+    if clashes:
+        parser.error(f"several inputs would write the same output: {', '.join(clashes)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    options = {"detector": args.detector, "backend": args.backend, "segment_s": args.segment_s,
+               "warmup_s": args.warmup_s}
+    jobs = [VideoJob(video, args.out, args.format, options, args.segment_s) for video in videos]
+    todo = [job for job in jobs if not job.finished()]
+    work = [(job, segment) for job in todo for segment in job.pending()]
+    print(f"[Score] {len(videos)} videos, {len(jobs) - len(todo)} already scored, "
+          f"{len(work)} segments to run on {args.jobs} processes")
+
+    started = time.perf_counter()
+    frames, video_s, failures = 0, 0.0, 0
+    if work:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs), mp_context=context, initializer=_init_worker,
+                                 initargs=(args.detector, args.backend, args.threads)) as pool:
+            futures = {pool.submit(score_segment, segment, args.warmup_s, job.part_path(segment)): (job, segment)
+                       for job, segment in work}
+            for future in as_completed(futures):
+                job, segment = futures[future]
+                try:
+                    _, rows, seconds = future.result()
+                except Exception as exc:
+                    failures += 1
+                    print(f"[Score] {job.name} segment {segment.index + 1}/{segment.count} failed: {exc!r}", flush=True)
+                    continue
+                frames += rows
+                video_s += rows / segment.fps
+                job.score_s += seconds
+                print(f"[Score] {job.name} segment {segment.index + 1}/{segment.count}: {rows} frames, "
+                      f"{rows / seconds if seconds else 0.0:.1f} fps in one process", flush=True)
+    for job in todo:
+        if job.complete():
+            report = job.finalize()
+            print(f"[Score] {job.name} -> {job.output} ({report['frames']} frames, {report['drowsy_pct']}% drowsy)")
+
+    elapsed = time.perf_counter() - started
+    fps = frames / elapsed if elapsed else 0.0
+    speed = video_s / elapsed if elapsed else 0.0
+    print(f"[Score] {frames} frames in {elapsed:.1f} s: {fps:.1f} fps overall, {speed:.1f}x real time"
+          + (f", {failures} segments failed (rerun to retry)" if failures else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Pluggable frame sources and sinks
+
+Every source exposes the cv2.VideoCapture subset the loops use
+(`isOpened()`, `read()`, `release()`), so a detector can run against a
+webcam, a recorded clip, a folder of images or generated frames without
+code changes. `live` tells the pipeline whether frames may be dropped
+(webcam) or must all be processed in order (replay).
+"""
+import glob
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """Base class: iterate to get frames until the source runs out"""
+
+    live = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def configure(self, width=None, height=None, fps=None):
+        """Request a capture mode; returns the (width, height, fps) in effect, None if not settable"""
+        return None
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+
+class CaptureSource(FrameSource):
+    """Thin wrapper over cv2.VideoCapture for webcams and video files"""
+
+    def __init__(self, target, live):
+        self.cap = cv2.VideoCapture(target)
+        self.live = live
+        if live and self.cap.isOpened():
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+    def configure(self, width=None, height=None, fps=None):
+        # Drivers silently pick the nearest supported mode, so read back what was applied
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                round(self.cap.get(cv2.CAP_PROP_FPS), 1))
+
+
+class WebcamSource(CaptureSource):
+    def __init__(self, index=0):
+        super().__init__(index, live=True)
+
+
+class VideoFileSource(CaptureSource):
+    def __init__(self, path):
+        super().__init__(path, live=False)
+
+    def fps(self, default=30.0):
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        return fps if fps and fps > 0 else default
+
+    def frame_count(self):
+        """Frame count from the container header, None when unknown (it can be approximate)"""
+        count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return count if count > 0 else None
+
+    def seek(self, index):
+        """Position the next read() at frame `index`"""
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+
+class ImageDirSource(FrameSource):
+    """Frames from the images in a directory, in sorted file-name order"""
+
+    def __init__(self, path):
+        self.files = sorted(f for f in glob.glob(os.path.join(path, "*"))
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.position = 0
+
+    def isOpened(self):
+        return self.position < len(self.files)
+
+    def read(self):
+        while self.position < len(self.files):
+            frame = cv2.imread(self.files[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+
+class SyntheticSource(FrameSource):
+    """
+    Deterministic generated frames for camera-less machines
+
+    A bright ellipse ("face") drifts over a noisy background; the same seed
+    always produces the same sequence.
+    """
+
+    def __init__(self, count=300, width=640, height=480, seed=0):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.rng = np.random.RandomState(seed)
+        self.position = 0
+
+    def read(self):
+        if self.position >= self.count:
+            return False, None
+        frame = self.rng.randint(0, 40, (self.height, self.width, 3), dtype=np.uint8)
+        t = self.position / 30.0
+        center = (int(self.width * (0.5 + 0.1 * np.sin(t))), int(self.height * 0.45))
+        axes = (self.width // 8, self.height // 5)
+        cv2.ellipse(frame, center, axes, 0, 0, 360, (150, 170, 200), -1)
+        self.position += 1
+        return True, frame
+
+
+def open_source(spec=0):
+    """
+    Build a FrameSource from a short spec
+
+    Args:
+        spec: an existing FrameSource, a webcam index (int or digit string),
+              "synthetic" / "synthetic:<frames>", an image directory or a
+              video file path
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return WebcamSource(int(spec))
+    if spec.startswith("synthetic"):
+        _, _, count = spec.partition(":")
+        return SyntheticSource(int(count) if count else 300)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec)
+    return VideoFileSource(spec)
+
+
+class WindowSink:
+    """Shows frames with cv2.imshow; show() returns False once 'q' is pressed"""
+
+    def __init__(self, window_name="Driver Monitor"):
+        self.window_name = window_name
+
+    def show(self, frame):
+        cv2.imshow(self.window_name, frame)
+        return cv2.waitKey(1) & 0xFF != ord('q')
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class HeadlessSink:
+    """Discards frames, for CI boxes and benchmarks without a display"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def show(self, frame):
+        self.frames += 1
+        return True
+
+    def close(self):
+        pass
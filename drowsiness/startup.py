@@ -0,0 +1,126 @@
+"""
+Startup timing for the detector scripts
+
+Cold start on the Pi is dominated by imports (torch, torchvision,
+mediapipe), building / loading the model, and the first forward pass, which
+initializes the CPU kernels. StartupTimer splits a script's start into
+those phases:
+
+    STARTUP = StartupTimer()              # first line, before heavy imports
+    import torch, mediapipe ...
+    STARTUP.mark("import")
+    model = load_backend("mtl")
+    STARTUP.mark("model_load")
+    classifier = STARTUP.first_call(classifier)   # times the first inference
+    ...
+    print("[Startup]", STARTUP.summary())
+
+Each backend can be measured in a fresh interpreter, so nothing is already
+imported or cached:
+
+    python -m drowsiness.startup --model mtl --backend eager torchscript
+"""
+import argparse
+import collections
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+class StartupTimer:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self._last = self.started
+        self.phases = collections.OrderedDict()
+        self.first_result_ms = None
+
+    def mark(self, name):
+        """Record the time since the previous mark (or start) as phase `name`"""
+        now = self.clock()
+        self.phases[name] = 1000.0 * (now - self._last)
+        self._last = now
+
+    def first_call(self, fn, name="first_inference"):
+        """Wrap fn so its first call is recorded as phase `name`, plus time from start to its result"""
+        pending = [True]
+
+        def wrapper(*args, **kwargs):
+            if not pending:
+                return fn(*args, **kwargs)
+            pending.clear()
+            start = self.clock()
+            result = fn(*args, **kwargs)
+            end = self.clock()
+            self.phases[name] = 1000.0 * (end - start)
+            self.first_result_ms = 1000.0 * (end - self.started)
+            return result
+
+        return wrapper
+
+    def summary(self):
+        summary = {f"{name}_ms": round(ms, 1) for name, ms in self.phases.items()}
+        if self.first_result_ms is not None:
+            summary["start_to_first_result_ms"] = round(self.first_result_ms, 1)
+        return summary
+
+
+# ---------------- Fresh-process measurement ----------------
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import torch
+import_torch = time.perf_counter()
+from drowsiness.backends import load_backend
+from drowsiness.models import input_shape
+model = load_backend({name!r}, backend={backend!r})
+loaded = time.perf_counter()
+with torch.no_grad():
+    model(torch.zeros(input_shape({name!r})))
+first = time.perf_counter()
+steady = []
+with torch.no_grad():
+    # TorchScript compiles its graph over the first couple of calls
+    for _ in range(3):
+        tick = time.perf_counter()
+        model(torch.zeros(input_shape({name!r})))
+        steady.append(time.perf_counter() - tick)
+print(json.dumps({{
+    "import_ms": 1000 * (import_torch - start),
+    "model_load_ms": 1000 * (loaded - import_torch),
+    "first_inference_ms": 1000 * (first - loaded),
+    "steady_inference_ms": 1000 * steady[-1],
+    "torchvision_imported": "torchvision" in sys.modules,
+}}))
+"""
+
+
+def measure(name, backend):
+    """Import / model-load / first-inference timings of one backend in a new interpreter"""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(name=name, backend=backend)],
+                            cwd=root, capture_output=True, text=True)
+    if output.returncode != 0:
+        return {"error": output.stderr.strip().splitlines()[-1] if output.stderr.strip() else "failed"}
+    report = {key: round(value, 1) if isinstance(value, float) else value
+              for key, value in json.loads(output.stdout.strip().splitlines()[-1]).items()}
+    report["process_ms"] = round(1000.0 * (time.perf_counter() - started), 1)
+    return report
+
+
+def main(argv=None):
+    from drowsiness.backends import BACKENDS
+    from drowsiness.models import MODEL_SPECS
+
+    parser = argparse.ArgumentParser(description="Cold-start timings per backend, each in a fresh process")
+    parser.add_argument("--model", default="mtl", choices=sorted(MODEL_SPECS))
+    parser.add_argument("--backend", nargs="+", default=["eager", "auto"], choices=BACKENDS)
+    args = parser.parse_args(argv)
+    print(json.dumps({backend: measure(args.model, backend) for backend in args.backend}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
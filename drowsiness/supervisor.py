@@ -0,0 +1,110 @@
+"""
+Motion-driven supervisor that keeps the vision pipeline warm
+
+The Pi main loop used to call run_detection_loop() from inside motion
+polling: polling stopped until 'q' was pressed, and every wakeup paid for
+opening the camera and loading MediaPipe / the models again. Supervisor runs
+both as concurrent workers instead:
+
+    motion thread   polls the vehicle state (drowsiness/motion.py)
+    main thread     the vision Pipeline, which must own cv2.imshow
+
+The pipeline is opened once. While the vehicle is parked it sits in standby
+(camera open at a trickle, detectors loaded but not run); when the vehicle
+idles or drives it resumes within a frame or two.
+
+    supervisor = Supervisor(pipeline, motion_sensor.vehicle_state, on_active=led_on, on_standby=led_off)
+    print(supervisor.run())
+
+summary() reports the cold start (from `started`, e.g. process start, to the
+first frame) next to the warm resume times measured by the pipeline.
+"""
+import threading
+import time
+
+from drowsiness.motion import PARKED
+
+
+class Supervisor:
+    """
+    Args:
+        pipeline: drowsiness.pipeline.Pipeline to keep warm
+        vehicle_state: callable() -> "parked" / "idle" / "driving", polled on the motion thread
+        poll_interval: seconds between motion polls
+        on_active / on_standby: optional callables run on the motion thread after a switch
+        started: perf_counter() time the cold start is measured from, defaults to run()
+    """
+
+    def __init__(self, pipeline, vehicle_state, poll_interval=0.1, on_active=None, on_standby=None,
+                 started=None):
+        self.pipeline = pipeline
+        self.vehicle_state = vehicle_state
+        self.poll_interval = poll_interval
+        self.on_active = on_active
+        self.on_standby = on_standby
+        self.started = started
+        self.state = PARKED
+        self.switches = 0
+        self.poll_errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _switch(self, active):
+        if active:
+            self.pipeline.resume()
+            callback, label = self.on_active, "active"
+        else:
+            self.pipeline.pause()
+            callback, label = self.on_standby, "standby"
+        self.switches += 1
+        print(f"[Supervisor] Vehicle {self.state} -> vision {label}")
+        if callback is not None:
+            callback()
+
+    def _motion_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                state = self.vehicle_state()
+            except OSError as e:
+                # I2C glitches should not take the camera down with them
+                self.poll_errors += 1
+                print(f"[Supervisor] Motion poll failed: {e}")
+                continue
+            if state == self.state:
+                continue
+            was_parked, self.state = self.state == PARKED, state
+            if was_parked != (state == PARKED):
+                self._switch(active=was_parked)
+
+    def run(self):
+        """Block on the vision pipeline (main thread) until it stops, then return summary()"""
+        if self.started is None:
+            self.started = time.perf_counter()
+        self.pipeline.pause()
+        self._thread = threading.Thread(target=self._motion_loop, name="supervisor-motion", daemon=True)
+        self._thread.start()
+        try:
+            self.pipeline.run()
+        finally:
+            self._stop.set()
+            self._thread.join(timeout=2.0)
+        return self.summary()
+
+    def stop(self):
+        self._stop.set()
+        self.pipeline.stop()
+
+    def summary(self):
+        pipeline = self.pipeline.summary()
+        summary = {
+            "state": self.state,
+            "switches": self.switches,
+            "poll_errors": self.poll_errors,
+            "resume_ms": pipeline.get("resume_ms"),
+            "standby_frames": pipeline["standby_frames"],
+        }
+        if self.pipeline.cold_start_ms is not None:
+            # Pipeline run() started after `started`; add the model / import time before it
+            before_run = 1000.0 * (self.pipeline.run_started - self.started)
+            summary["cold_start_ms"] = round(before_run + self.pipeline.cold_start_ms, 1)
+        return summary
@@ -0,0 +1,186 @@
+"""
+Face box tracking between detector keyframes
+
+The driver's face barely moves between frames, so the MediaPipe face
+detector only needs to run on keyframes: every `keyframe_interval` frames,
+or as soon as tracking confidence drops. In between, each box is moved with
+sparse Lucas-Kanade optical flow on corners picked inside it at the last
+keyframe (median translation + spread-ratio scale). The points of all faces
+go through a single calcOpticalFlowPyrLK call, so both image pyramids are
+built once per frame rather than once per face.
+
+TrackerStats records how many detector calls were saved and, at every
+keyframe, how far the tracked box had drifted from the fresh detection.
+"""
+import cv2
+import numpy as np
+
+from drowsiness.frame import as_context
+
+
+def iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def center_distance(a, b):
+    return float(np.hypot((a[0] + a[2] - b[0] - b[2]) / 2.0, (a[1] + a[3] - b[1] - b[3]) / 2.0))
+
+
+class TrackerStats:
+    def __init__(self):
+        self.frames = 0
+        self.detector_calls = 0
+        self.low_confidence = 0
+        self.drift_px = []
+        self.drift_iou = []
+
+    def summary(self):
+        saved = self.frames - self.detector_calls
+        return {
+            "frames": self.frames,
+            "detector_calls": self.detector_calls,
+            "calls_saved": saved,
+            "saved_pct": round(100.0 * saved / self.frames, 1) if self.frames else 0.0,
+            "low_confidence_redetects": self.low_confidence,
+            "mean_drift_px": round(float(np.mean(self.drift_px)), 2) if self.drift_px else 0.0,
+            "mean_drift_iou": round(float(np.mean(self.drift_iou)), 3) if self.drift_iou else 1.0,
+        }
+
+
+class Track:
+    __slots__ = ("box", "points")
+
+    def __init__(self, box, points):
+        self.box = box
+        self.points = points
+
+
+class FaceTracker:
+    """
+    Run `detect` on keyframes only and propagate its boxes in between
+
+    Args:
+        detect: callable(*detect_args) -> list of (x_min, y_min, x_max, y_max) pixel boxes
+        keyframe_interval: frames between scheduled detector runs (1 = every frame)
+        min_confidence: fraction of flow points that must survive, below it the
+                        detector runs on this frame
+        min_points: tracks with fewer surviving points count as lost
+        max_corners: corners picked per box at a keyframe
+    """
+
+    def __init__(self, detect, keyframe_interval=5, min_confidence=0.6, min_points=6, max_corners=40):
+        self.detect = detect
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.min_confidence = min_confidence
+        self.min_points = min_points
+        self.max_corners = max_corners
+        self.stats = TrackerStats()
+        self.prev_gray = None
+        self._gray_pool = None
+        self.reset()
+
+    def reset(self):
+        """Forget all tracks, e.g. when frames were skipped and flow would be meaningless"""
+        self.tracks = []
+        self._keep_gray(None)
+        self.since_keyframe = 0
+
+    def _keep_gray(self, ctx, gray=None):
+        # prev_gray may be a pooled buffer: held until the next frame's flow is computed
+        if self._gray_pool is not None:
+            self._gray_pool.release(self.prev_gray)
+        self.prev_gray = gray if ctx is None else ctx.keep(gray)
+        self._gray_pool = None if ctx is None else ctx.pool
+
+    # ---------------- Internals ----------------
+    def _start_track(self, gray, box):
+        height, width = gray.shape
+        x_min, y_min = max(0, int(box[0])), max(0, int(box[1]))
+        x_max, y_max = min(width, int(box[2])), min(height, int(box[3]))
+        points = None
+        if x_max - x_min > 4 and y_max - y_min > 4:
+            points = cv2.goodFeaturesToTrack(gray[y_min:y_max, x_min:x_max], self.max_corners, 0.01, 5)
+        if points is not None:
+            points = points + np.array([x_min, y_min], dtype=np.float32)
+        return Track(tuple(float(v) for v in box), points)
+
+    def _propagate(self, gray):
+        """Move every track from prev_gray to gray; returns (tracks, min confidence)"""
+        moved = []
+        confidence = 1.0
+        height, width = gray.shape
+        if any(track.points is None or len(track.points) < self.min_points for track in self.tracks):
+            return [], 0.0
+        all_new, all_status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, np.concatenate([track.points for track in self.tracks]), None,
+            winSize=(15, 15), maxLevel=2)
+        start = 0
+        for track in self.tracks:
+            end = start + len(track.points)
+            new_points, status = all_new[start:end], all_status[start:end]
+            start = end
+            good = status.reshape(-1) == 1
+            confidence = min(confidence, float(good.mean()))
+            if good.sum() < self.min_points:
+                return [], 0.0
+
+            old = track.points[good].reshape(-1, 2)
+            new = new_points[good].reshape(-1, 2)
+            shift = np.median(new - old, axis=0)
+            old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+            new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+            scale = new_spread / old_spread if old_spread > 1e-3 else 1.0
+
+            x_min, y_min, x_max, y_max = track.box
+            cx = (x_min + x_max) / 2.0 + shift[0]
+            cy = (y_min + y_max) / 2.0 + shift[1]
+            half_w = (x_max - x_min) * scale / 2.0
+            half_h = (y_max - y_min) * scale / 2.0
+            box = (max(0.0, cx - half_w), max(0.0, cy - half_h),
+                   min(float(width), cx + half_w), min(float(height), cy + half_h))
+            moved.append(Track(box, new.reshape(-1, 1, 2)))
+        return moved, confidence
+
+    def _record_drift(self, predicted, detected):
+        for box in detected:
+            if not predicted:
+                break
+            best = max(predicted, key=lambda p: iou(p, box))
+            self.stats.drift_iou.append(iou(best, box))
+            self.stats.drift_px.append(center_distance(best, box))
+
+    # ---------------- Public API ----------------
+    def keyframe_due(self):
+        """True if the next update() runs the detector on schedule (a low-confidence redetect is not known yet)"""
+        return not self.tracks or self.prev_gray is None or self.since_keyframe + 1 >= self.keyframe_interval
+
+    def update(self, frame, *detect_args):
+        """Return the face boxes for this BGR frame (or frame.FrameContext) as integer (x_min, y_min, x_max, y_max)"""
+        ctx = as_context(frame)
+        gray = ctx.gray()
+        self.stats.frames += 1
+
+        tracked, confidence = [], 0.0
+        if self.tracks and self.prev_gray is not None and self.prev_gray.shape == gray.shape:
+            tracked, confidence = self._propagate(gray)
+
+        keyframe = (not tracked or self.since_keyframe + 1 >= self.keyframe_interval
+                    or confidence < self.min_confidence)
+        if keyframe:
+            if self.tracks and confidence < self.min_confidence:
+                self.stats.low_confidence += 1
+            boxes = self.detect(*detect_args)
+            self.stats.detector_calls += 1
+            self._record_drift([t.box for t in tracked], boxes)
+            self.tracks = [self._start_track(gray, box) for box in boxes]
+            self.since_keyframe = 0
+        else:
+            self.tracks = tracked
+            self.since_keyframe += 1
+
+        self._keep_gray(ctx, gray)
+        return [tuple(int(round(v)) for v in track.box) for track in self.tracks]
@@ -0,0 +1,333 @@
+"""
+MediaPipe hands and face in parallel worker processes
+
+Hands and the face model (FaceDetection or FaceMesh) used to run one after
+the other on the capture thread, so a frame cost their sum while the other
+cores of the Pi idled. MediaPipeWorkers runs each solution in its own
+process. The RGB frame is copied once into a slot of a
+multiprocessing.shared_memory ring. Only (sequence, slot, shape) goes
+through the job queues, and results come back as small landmark arrays.
+Frames are never pickled.
+
+    workers = MediaPipeWorkers({"hands": {"max_num_hands": 1}, "face_mesh": {"max_num_faces": 1}}).start()
+    workers.prefetch(image_rgb, ("hands", "face_mesh"))      # both start on this frame
+    hands = workers.solution("hands")                        # drop-in for mp.solutions.hands.Hands(...)
+    hands.process(image_rgb).multi_hand_landmarks            # waits for the prefetched result only
+
+A stage asks for its result exactly where it used to call `.process()`, so
+the detectors keep their order: hands first, and a hand gesture still wins
+over the face. Once a gesture wins, the face result for that frame is never
+waited for. It is dropped when it arrives. Each worker answers its queue in
+order, and results older than the one asked for are discarded, so outputs
+always match their frame.
+
+`python -m drowsiness --detector ear --workers` turns it on (see detectors.Detector).
+"""
+import collections
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Task name -> the mp.solutions factory it runs in the worker
+TASKS = {
+    "hands": ("hands", "Hands"),
+    "face_detection": ("face_detection", "FaceDetection"),
+    "face_mesh": ("face_mesh", "FaceMesh"),
+}
+
+# MediaPipe-shaped results, so gestures.py / landmarks.py work on them unchanged
+Landmark = collections.namedtuple("Landmark", "x y z")
+RelativeBox = collections.namedtuple("RelativeBox", "xmin ymin width height")
+LocationData = collections.namedtuple("LocationData", "relative_bounding_box")
+Detection = collections.namedtuple("Detection", "location_data")
+HandsResult = collections.namedtuple("HandsResult", "multi_hand_landmarks")
+FaceDetectionResult = collections.namedtuple("FaceDetectionResult", "detections")
+FaceMeshResult = collections.namedtuple("FaceMeshResult", "multi_face_landmarks")
+
+
+class LandmarkList:
+    """Stands in for a NormalizedLandmarkList: `.landmark[i].x / .y / .z` over an (N, 3) array"""
+
+    __slots__ = ("points", "landmark")
+
+    def __init__(self, points):
+        self.points = points
+        self.landmark = [Landmark(*point) for point in points.tolist()]
+
+
+# ---------------- Worker Process ----------------
+def _landmark_array(landmark_list):
+    landmarks = landmark_list.landmark
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+
+
+def _run_task(task, solution, image):
+    """Plain, picklable output of one MediaPipe call"""
+    results = solution.process(image)
+    if task == "hands":
+        return [_landmark_array(hand) for hand in results.multi_hand_landmarks or ()]
+    if task == "face_mesh":
+        return [_landmark_array(face) for face in results.multi_face_landmarks or ()]
+    return [tuple(float(v) for v in (box.xmin, box.ymin, box.width, box.height))
+            for box in (detection.location_data.relative_bounding_box for detection in results.detections or ())]
+
+
+def _worker(task, options, jobs, results):
+    import mediapipe as mp
+
+    module, factory = TASKS[task]
+    try:
+        solution = getattr(getattr(mp.solutions, module), factory)(**options)
+    except Exception as exc:
+        results.put(("error", None, 0.0, repr(exc)))
+        return
+    results.put(("ready", None, 0.0, None))
+
+    shm = None
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            seq, name, offset, shape = job
+            if shm is None or shm.name != name:
+                # The parent grew the ring for a larger frame
+                if shm is not None:
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=name)
+            image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            start = time.perf_counter()
+            try:
+                output, error = _run_task(task, solution, image), None
+            except Exception as exc:
+                output, error = None, repr(exc)
+            # The view must go before shm.close()
+            del image
+            results.put((seq, output, time.perf_counter() - start, error))
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+# ---------------- Parent Side ----------------
+class WorkerSolution:
+    """Drop-in for a MediaPipe solution object whose process() runs in a worker"""
+
+    def __init__(self, workers, task):
+        self.workers = workers
+        self.task = task
+
+    def process(self, image_rgb):
+        return self.workers.process(self.task, image_rgb)
+
+
+class MediaPipeWorkers:
+    """
+    One worker process per MediaPipe task, fed through a shared-memory frame ring
+
+    Args:
+        tasks: {task: solution kwargs}, task one of TASKS
+        slots: frames that may be in flight (a dropped face job keeps its slot until it finishes)
+        start_method: "spawn" keeps the parent's threads, camera and torch state out of the workers
+        timeout: seconds to wait for a worker before treating it as dead
+    """
+
+    def __init__(self, tasks, slots=3, start_method="spawn", timeout=10.0):
+        unknown = set(tasks) - set(TASKS)
+        if unknown:
+            raise ValueError(f"Unknown MediaPipe task(s) {', '.join(sorted(unknown))}, "
+                             f"expected {', '.join(TASKS)}")
+        self.tasks = dict(tasks)
+        self.slots = max(1, int(slots))
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._processes = {}
+        self._jobs = {}
+        self._results = {}
+        self._shm = None
+        self._slot_bytes = 0
+        self._slot_pending = []
+        self._next_slot = 0
+        self._seq = 0
+        self._current = None        # (image, seq, tasks) of the last prefetch
+        self._done = {task: {} for task in self.tasks}
+        self._wanted = {task: set() for task in self.tasks}
+        self._busy_s = {task: 0.0 for task in self.tasks}
+        self._jobs_done = {task: 0 for task in self.tasks}
+        self._dropped = {task: 0 for task in self.tasks}
+        self._wait_s = {task: 0.0 for task in self.tasks}
+        self._waits = {task: 0 for task in self.tasks}
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        """Spawn the workers and wait until each has built its MediaPipe solution"""
+        for task, options in self.tasks.items():
+            self._jobs[task] = self._context.Queue()
+            self._results[task] = self._context.Queue()
+            process = self._context.Process(target=_worker, name=f"mediapipe-{task}", daemon=True,
+                                            args=(task, options, self._jobs[task], self._results[task]))
+            process.start()
+            self._processes[task] = process
+        for task in self.tasks:
+            # Spawning re-imports mediapipe, which is slow on a Pi
+            status, _, _, error = self._get(task, timeout=max(self.timeout, 60.0))
+            if status != "ready":
+                self.close()
+                raise RuntimeError(f"[Workers] {task} worker failed to start: {error}")
+        return self
+
+    def close(self):
+        for task, jobs in self._jobs.items():
+            if self._processes[task].is_alive():
+                jobs.put(None)
+        for process in self._processes.values():
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        self._jobs.clear()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def solution(self, task):
+        return WorkerSolution(self, task)
+
+    # ---------------- Frame Ring ----------------
+    def _slot_for(self, nbytes):
+        """Index of a slot no worker is reading, growing the ring when the frame does not fit"""
+        if nbytes > self._slot_bytes:
+            self._drain_all()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes * self.slots)
+            self._slot_bytes = nbytes
+            self._slot_pending = [set() for _ in range(self.slots)]
+        for _ in range(self.slots):
+            slot = self._next_slot
+            self._next_slot = (self._next_slot + 1) % self.slots
+            self._collect_ready()
+            if not self._slot_pending[slot]:
+                return slot
+        # Every slot still has a job in flight: wait for the oldest
+        slot = self._next_slot
+        while self._slot_pending[slot]:
+            self._collect(next(iter(self._slot_pending[slot]))[0])
+        self._next_slot = (slot + 1) % self.slots
+        return slot
+
+    def submit(self, image_rgb, tasks):
+        """Copy `image_rgb` into the ring once and queue it for `tasks`; returns its sequence number"""
+        image = np.ascontiguousarray(image_rgb, dtype=np.uint8)
+        slot = self._slot_for(image.nbytes)
+        offset = slot * self._slot_bytes
+        np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=self._shm.buf, offset=offset), image)
+        self._seq += 1
+        for task in tasks:
+            self._slot_pending[slot].add((task, self._seq))
+            self._wanted[task].add(self._seq)
+            self._jobs[task].put((self._seq, self._shm.name, offset, image.shape))
+        return self._seq
+
+    # ---------------- Results ----------------
+    def _get(self, task, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._results[task].get(timeout=min(1.0, timeout))
+            except queue.Empty:
+                if not self._processes[task].is_alive():
+                    raise RuntimeError(f"[Workers] {task} worker exited "
+                                       f"(code {self._processes[task].exitcode})")
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"[Workers] {task} worker gave no result in {timeout:.0f} s")
+
+    def _store(self, task, message):
+        seq, output, seconds, error = message
+        self._busy_s[task] += seconds
+        self._jobs_done[task] += 1
+        for pending in self._slot_pending:
+            pending.discard((task, seq))
+        if seq in self._wanted[task]:
+            self._wanted[task].discard(seq)
+            self._done[task][seq] = (output, error)
+        else:
+            self._dropped[task] += 1
+
+    def _collect(self, task):
+        self._store(task, self._get(task, self.timeout))
+
+    def _collect_ready(self):
+        for task in self.tasks:
+            while True:
+                try:
+                    message = self._results[task].get_nowait()
+                except queue.Empty:
+                    break
+                self._store(task, message)
+
+    def _drain_all(self):
+        for pending in self._slot_pending:
+            while pending:
+                self._collect(next(iter(pending))[0])
+
+    def drop(self, seq):
+        """Nobody will ask for `seq` any more; its results are discarded on arrival"""
+        for task in self.tasks:
+            self._wanted[task].discard(seq)
+            self._done[task].pop(seq, None)
+
+    def result(self, seq, task):
+        """Wait for `task`'s output of frame `seq`; older outputs of that worker are discarded"""
+        start = time.perf_counter()
+        while seq not in self._done[task]:
+            self._collect(task)
+        self._wait_s[task] += time.perf_counter() - start
+        self._waits[task] += 1
+        # Anything older for this task is stale now
+        for old in [s for s in self._done[task] if s < seq]:
+            del self._done[task][old]
+        output, error = self._done[task].pop(seq)
+        if error is not None:
+            raise RuntimeError(f"[Workers] {task} failed: {error}")
+        return output
+
+    # ---------------- Solution API ----------------
+    def prefetch(self, image_rgb, tasks):
+        """Start `tasks` on this frame together; the previous frame's unclaimed results are dropped"""
+        if self._current is not None:
+            self.drop(self._current[1])
+        tasks = tuple(task for task in tasks if task in self.tasks)
+        self._current = (image_rgb, self.submit(image_rgb, tasks), tasks) if tasks else None
+
+    def process(self, task, image_rgb):
+        """MediaPipe-shaped result of `task` on `image_rgb`, from the prefetch when it covered it"""
+        if self._current is not None and self._current[0] is image_rgb and task in self._current[2]:
+            seq = self._current[1]
+        else:
+            # Not prefetched (e.g. a low-confidence tracker keyframe): run it now
+            seq = self.submit(image_rgb, (task,))
+        output = self.result(seq, task)
+        if task == "hands":
+            return HandsResult([LandmarkList(points) for points in output] or None)
+        if task == "face_mesh":
+            return FaceMeshResult([LandmarkList(points) for points in output] or None)
+        return FaceDetectionResult([Detection(LocationData(RelativeBox(*box))) for box in output] or None)
+
+    def summary(self):
+        report = {}
+        for task in self.tasks:
+            jobs, waits = self._jobs_done[task], self._waits[task]
+            report[task] = {
+                "jobs": jobs,
+                "busy_ms": round(1000.0 * self._busy_s[task] / jobs, 2) if jobs else 0.0,
+                "wait_ms": round(1000.0 * self._wait_s[task] / waits, 2) if waits else 0.0,
+                "dropped": self._dropped[task],
+            }
+        report["slot_kb"] = round(self._slot_bytes / 1024.0, 1)
+        return report
@@ -0,0 +1,217 @@
+"""
+Optimize the drowsiness models for Raspberry Pi CPU inference
+
+For one model (see drowsiness/models.py) this:
+    1. loads the eager fp32 checkpoint
+    2. fuses Conv-BN for fp32 inference
+    3. applies dynamic int8 quantization (Linear layers)
+    4. applies static int8 quantization (FX graph mode, Conv-BN-ReLU fused)
+       calibrated on a set of crops
+    5. exports TorchScript (fp32 and int8) and ONNX next to the checkpoint
+    6. prints / saves a report comparing accuracy drift against fp32,
+       serialized model size and CPU latency
+
+The exported files are what the TorchScript / ONNX backends in
+drowsiness/backends.py load.
+
+Usage:
+    python optimize_model.py --model mtl --calibration path/to/face_crops
+    python optimize_model.py --model drowsy-mt --report report.json
+"""
+import argparse
+import copy
+import io
+import json
+import os
+import platform
+import time
+
+import torch
+from torch import nn
+
+from drowsiness.backends import OnnxBackend, exported_path
+from drowsiness.models import MODEL_SPECS, checkpoint_path, input_shape, load_model
+from drowsiness.preprocess import CropPreprocessor
+from drowsiness.sources import open_source
+
+
+def calibration_batches(name, source, count, batch_size=8):
+    """Preprocessed (N, 1, H, W) batches from a crop folder, video or synthetic source"""
+    preprocess = CropPreprocessor(**MODEL_SPECS[name].preprocess)
+    crops = []
+    frames = open_source(source)
+    try:
+        for frame in frames:
+            crops.append(preprocess(frame))
+            if len(crops) >= count:
+                break
+    finally:
+        frames.release()
+    if not crops:
+        raise ValueError(f"No calibration images found in {source}")
+    return [torch.stack(crops[i:i + batch_size]) for i in range(0, len(crops), batch_size)]
+
+
+# ---------------- Optimizations ----------------
+def fuse_fp32(model):
+    """Fold BatchNorm into the preceding Conv (inference-only, fp32)"""
+    from torch.fx.experimental.optimization import fuse
+
+    return fuse(copy.deepcopy(model))
+
+
+def quantize_dynamic(model):
+    return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static(model, batches, engine):
+    """FX graph mode post-training quantization; prepare_fx fuses Conv-BN(-ReLU) itself"""
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = engine
+    prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(engine), (batches[0],))
+    with torch.no_grad():
+        for batch in batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def quantized_engine():
+    engines = torch.backends.quantized.supported_engines
+    if platform.machine().lower().startswith(("arm", "aarch64")) and "qnnpack" in engines:
+        return "qnnpack"
+    return "x86" if "x86" in engines else "fbgemm"
+
+
+# ---------------- Export ----------------
+def export_torchscript(model, example, path):
+    with torch.no_grad():
+        scripted = torch.jit.trace(model, example)
+    scripted = torch.jit.freeze(scripted.eval())
+    scripted.save(path)
+    return scripted
+
+
+def export_onnx(model, example, path, output_names):
+    kwargs = dict(input_names=["input"], output_names=list(output_names),
+                  dynamic_axes={"input": {0: "batch"}}, opset_version=17)
+    try:
+        torch.onnx.export(model, (example,), path, dynamo=False, **kwargs)
+    except TypeError:
+        # Older torch without the dynamo switch
+        torch.onnx.export(model, (example,), path, **kwargs)
+
+
+# ---------------- Report ----------------
+def as_tuple(outputs):
+    return outputs if isinstance(outputs, (tuple, list)) else (outputs,)
+
+
+def serialized_size_mb(model, path=None):
+    if path and os.path.exists(path):
+        return os.path.getsize(path) / 1e6
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+
+def latency_ms(model, example, runs, warmup=5):
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(example)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(example)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return 1000.0 * sum(timings) / len(timings), 1000.0 * timings[len(timings) // 2]
+
+
+def drift(reference, model, batches):
+    """Max abs output difference and top-1 agreement (per head) against the fp32 model"""
+    max_diff = 0.0
+    agree = total = 0
+    with torch.no_grad():
+        for batch in batches:
+            for ref, out in zip(as_tuple(reference(batch)), as_tuple(model(batch))):
+                max_diff = max(max_diff, float((ref - out).abs().max()))
+                if ref.shape[1] > 1:
+                    agree += int((ref.argmax(1) == out.argmax(1)).sum())
+                else:
+                    agree += int(((ref > 0) == (out > 0)).sum())
+                total += ref.shape[0]
+    return max_diff, 100.0 * agree / total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuse, quantize and export a drowsiness model")
+    parser.add_argument("--model", choices=sorted(MODEL_SPECS), default="mtl")
+    parser.add_argument("--checkpoint", help="override the .pth path")
+    parser.add_argument("--calibration", default="synthetic:64",
+                        help="folder of face crops, video file or synthetic[:frames]")
+    parser.add_argument("--calibration-size", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per variant")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (Pi 4: 4)")
+    parser.add_argument("--no-onnx", action="store_true", help="skip the ONNX export")
+    parser.add_argument("--report", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.calibration.startswith("synthetic"):
+        print("[Optimize] Calibrating on synthetic frames; pass --calibration with real crops for deployment")
+
+    name = args.model
+    spec = MODEL_SPECS[name]
+    engine = quantized_engine()
+    fp32 = load_model(name, checkpoint=args.checkpoint)
+    batches = calibration_batches(name, args.calibration, args.calibration_size)
+    example = torch.zeros(input_shape(name))
+
+    variants = {"eager-fp32": (fp32, args.checkpoint or checkpoint_path(name))}
+    variants["fused-fp32"] = (fuse_fp32(fp32), None)
+    variants["dynamic-int8"] = (quantize_dynamic(fp32), None)
+    static = quantize_static(fp32, batches, engine)
+    variants["static-int8"] = (static, None)
+
+    path = exported_path(name, "torchscript")
+    variants["torchscript-fp32"] = (export_torchscript(variants["fused-fp32"][0], example, path), path)
+    path = exported_path(name, "torchscript-int8")
+    variants["torchscript-int8"] = (export_torchscript(static, example, path), path)
+    print(f"[Optimize] TorchScript saved next to {spec.checkpoint}")
+
+    if not args.no_onnx:
+        path = exported_path(name, "onnx")
+        export_onnx(fp32, example, path, spec.output_names)
+        try:
+            variants["onnx-fp32"] = (OnnxBackend(path, threads=args.threads), path)
+        except ImportError as e:
+            print(f"[Optimize] ONNX exported to {path}, not benchmarked: {e}")
+
+    report = {"model": name, "engine": engine, "threads": torch.get_num_threads(),
+              "calibration": args.calibration, "variants": {}}
+    for label, (model, path) in variants.items():
+        mean, p50 = latency_ms(model, example, args.runs)
+        max_diff, agreement = drift(fp32, model, batches)
+        size = serialized_size_mb(model, path)
+        report["variants"][label] = {
+            "size_mb": round(size, 2),
+            "latency_ms": round(mean, 2),
+            "latency_p50_ms": round(p50, 2),
+            "max_abs_diff": round(max_diff, 4),
+            "top1_agreement_pct": round(agreement, 1),
+        }
+
+    print(f"{'variant':<18}{'size MB':>9}{'mean ms':>9}{'p50 ms':>9}{'max diff':>10}{'agree %':>9}")
+    for label, row in report["variants"].items():
+        print(f"{label:<18}{row['size_mb']:>9.2f}{row['latency_ms']:>9.2f}{row['latency_p50_ms']:>9.2f}"
+              f"{row['max_abs_diff']:>10.4f}{row['top1_agreement_pct']:>9.1f}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from collections import deque
 import mediapipe as mp
 import time
 
+from drowsiness.frame import BufferPool, FrameContext
+
 # Load your trained modelq
 model = load_model("gesture_model.h5")
 labels = ['closed_palm', 'open_palm']  # Index 0 = closed, Index 1 = open
@@ -18,6 +20,9 @@ mp_drawing = mp.solutions.drawing_utils
 BUFFER_SIZE = 5
 prediction_buffer = deque(maxlen=BUFFER_SIZE)
 
+# Mirrored frame and its RGB view are written into reused buffers
+pool = BufferPool()
+
 # Start webcam
 cap = cv2.VideoCapture(0)
 print("\n📸 Camera started — show gestures. Press 'q' to quit.\n")
@@ -27,8 +32,9 @@ while cap.isOpened():
     if not ret:
         break
 
-    image = cv2.flip(frame, 1)
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    ctx = FrameContext(frame, pool, mirror=True)
+    image = ctx.bgr
+    image_rgb = ctx.rgb()
     result = hands.process(image_rgb)
 
     gesture = "No Hand Detected"
@@ -0,0 +1,47 @@
+"""AlertClient against the local dd-api stub"""
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from drowsiness.alert_client import AlertClient, check
+from drowsiness.alert_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def client_for(stub, spool_dir, **kwargs):
+    return AlertClient(stub.url, "key-001", str(spool_dir), timeout=(0.5, 1.0), retries=0, backoff=0.01,
+                       **kwargs)
+
+
+def test_only_device_key_is_sent_by_default(stub, tmp_path):
+    client = client_for(stub, tmp_path)
+    assert client.send()
+    client.close()
+    assert stub.received == [{"deviceKey": "key-001"}]
+
+
+def test_spooled_alerts_are_replayed_in_order():
+    report = check(count=10, offline=(2, 6), latency_ms=0.0)
+    assert report["all_delivered"] and report["in_order"]
+    assert report["client"]["spooled"] == 4 and report["client"]["pending"] == 0
+
+
+def test_stale_spooled_alerts_are_dropped(stub, tmp_path):
+    client = client_for(stub, tmp_path, max_age_s=60.0, debug=True)
+    client.spool.append({"kind": "emergency", "device_key": "key-001", "created": time.time() - 3600.0})
+    fresh = time.time() - 10.0
+    client.spool.append({"kind": "emergency", "device_key": "key-001", "created": fresh})
+
+    assert client.send()
+    client.close()
+    assert client.stats["expired"] == 1 and client.stats["replayed"] == 1
+    assert len(client.spool) == 0
+    assert [float(params["createdAt"]) for params in stub.received][0] == fresh
+    assert len(stub.received) == 2
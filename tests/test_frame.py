@@ -0,0 +1,93 @@
+"""BufferPool ownership and FrameContext caching"""
+import cv2
+import numpy as np
+
+from drowsiness.frame import BufferPool, FrameContext
+from drowsiness.gating import HandGate
+from drowsiness.tracking import FaceTracker
+
+
+def frames(count, shape=(120, 160, 3), seed=0):
+    rng = np.random.RandomState(seed)
+    return [rng.randint(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def test_buffers_are_reused_on_the_next_frame():
+    pool = BufferPool()
+    first, second = frames(2)
+    gray = FrameContext(first, pool).gray()
+    assert FrameContext(second, pool).gray() is gray
+    assert pool.allocations == 1 and pool.reuses == 1
+
+
+def test_views_of_one_frame_never_share_a_buffer():
+    pool = BufferPool()
+    ctx = FrameContext(frames(1)[0], pool)
+    a = ctx.convert(ctx.bgr, cv2.COLOR_BGR2RGB, "a")
+    b = ctx.convert(ctx.bgr, cv2.COLOR_BGR2RGB, "b")
+    assert a is not b
+    assert not np.shares_memory(a, b)
+
+
+def test_held_buffer_survives_later_frames_until_released():
+    pool = BufferPool()
+    first, second, third = frames(3)
+    ctx = FrameContext(first, pool)
+    kept = ctx.keep(ctx.gray())
+    expected = kept.copy()
+
+    for frame in (second, third):
+        gray = FrameContext(frame, pool).gray()
+        assert gray is not kept
+    np.testing.assert_array_equal(kept, expected)
+
+    pool.release(kept)
+    assert pool.summary()["held"] == 0
+    # Back on the free list: two grey views of the next frame use both buffers
+    ctx = FrameContext(first, pool)
+    views = [ctx.gray(), ctx.convert(second, cv2.COLOR_BGR2GRAY)]
+    assert any(view is kept for view in views)
+    assert pool.allocations == 2
+
+
+def test_hold_ignores_arrays_from_elsewhere():
+    pool = BufferPool()
+    outside = np.zeros((4, 4), dtype=np.uint8)
+    assert pool.hold(outside) is outside
+    pool.release(outside)
+    pool.release(None)
+    assert pool.summary()["held"] == 0
+
+
+def test_unnamed_convert_is_cached_per_source_image():
+    first, second = frames(2)
+    ctx = FrameContext(first, BufferPool())
+    a = ctx.convert(first, cv2.COLOR_BGR2GRAY)
+    b = ctx.convert(second, cv2.COLOR_BGR2GRAY)
+    np.testing.assert_array_equal(a, cv2.cvtColor(first, cv2.COLOR_BGR2GRAY))
+    np.testing.assert_array_equal(b, cv2.cvtColor(second, cv2.COLOR_BGR2GRAY))
+    assert ctx.convert(first, cv2.COLOR_BGR2GRAY) is a
+
+
+def test_tracker_previous_frame_is_not_overwritten():
+    pool = BufferPool()
+    tracker = FaceTracker(lambda: [(40, 30, 110, 100)], keyframe_interval=100)
+    video = frames(4)
+    for index, frame in enumerate(video):
+        tracker.update(FrameContext(frame, pool))
+        np.testing.assert_array_equal(tracker.prev_gray, cv2.cvtColor(video[index], cv2.COLOR_BGR2GRAY))
+    held = pool.summary()["held"]
+    tracker.reset()
+    assert held == 1 and pool.summary()["held"] == 0
+
+
+def test_gate_previous_frame_is_not_overwritten():
+    pool = BufferPool()
+    gate = HandGate()
+    video = frames(4)
+    for frame in video:
+        ctx = FrameContext(frame, pool)
+        gate.should_run(ctx)
+        small = cv2.resize(frame, None, fx=gate.scale, fy=gate.scale, interpolation=cv2.INTER_AREA)
+        np.testing.assert_array_equal(gate._prev_gray, cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+    assert pool.summary()["held"] == 1
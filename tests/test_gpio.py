@@ -0,0 +1,35 @@
+"""GPIO backend selection"""
+import importlib.util
+
+import pytest
+
+from drowsiness.gpio import FakeGPIO, open_gpio, play
+
+
+def test_fake_backend_is_opt_in(monkeypatch):
+    monkeypatch.delenv("DROWSINESS_GPIO", raising=False)
+    assert isinstance(open_gpio("fake"), FakeGPIO)
+    monkeypatch.setenv("DROWSINESS_GPIO", "fake")
+    assert isinstance(open_gpio(), FakeGPIO)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("RPi") is not None, reason="RPi.GPIO is installed")
+@pytest.mark.parametrize("backend", [None, "rpi"])
+def test_missing_rpi_gpio_raises(monkeypatch, backend):
+    monkeypatch.delenv("DROWSINESS_GPIO", raising=False)
+    with pytest.raises(ImportError, match="DROWSINESS_GPIO=fake"):
+        open_gpio(backend)
+
+
+def test_unknown_backend(monkeypatch):
+    monkeypatch.setenv("DROWSINESS_GPIO", "pigpio")
+    with pytest.raises(ValueError):
+        open_gpio()
+
+
+def test_play_leaves_pin_low():
+    gpio = FakeGPIO()
+    gpio.setup(17)
+    assert play(gpio, 17, ((True, 0.0), (False, 0.0), (True, 0.0)))
+    assert [level for _, _, level in gpio.events] == [True, False, True, False]
+    assert gpio.levels[17] is False
@@ -0,0 +1,180 @@
+"""MPU-6050 burst reads against the simulated register map"""
+import time
+
+import numpy as np
+import pytest
+
+from drowsiness import imu
+
+
+class RecordingBus(imu.FakeBus):
+    """FakeBus that also logs every block read"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.block_reads = []
+
+    def read_i2c_block_data(self, address, register, length):
+        self.block_reads.append((register, length))
+        return super().read_i2c_block_data(address, register, length)
+
+
+@pytest.mark.parametrize("accel_range, gyro_range", [(2, 250), (8, 1000)])
+def test_burst_read_is_one_transaction(accel_range, gyro_range):
+    bus = RecordingBus()
+    sensor = imu.MPU6050(bus=bus, accel_range=accel_range, gyro_range=gyro_range)
+    bus.set_sample(accel_g=(0.25, -0.5, 1.0), gyro_dps=(12.0, -30.0, 45.5), temp_c=31.0)
+    bus.transactions = 0
+
+    sample = sensor.read()
+
+    assert bus.transactions == 1
+    assert bus.block_reads == [(imu.ACCEL_XOUT_H, imu.SAMPLE_BYTES)]
+    accel_lsb, gyro_lsb = 1.0 / sensor.accel_scale, 1.0 / sensor.gyro_scale
+    assert sample.ax == pytest.approx(0.25, abs=accel_lsb)
+    assert sample.ay == pytest.approx(-0.5, abs=accel_lsb)
+    assert sample.az == pytest.approx(1.0, abs=accel_lsb)
+    assert sample.gx == pytest.approx(12.0, abs=gyro_lsb)
+    assert sample.gy == pytest.approx(-30.0, abs=gyro_lsb)
+    assert sample.gz == pytest.approx(45.5, abs=gyro_lsb)
+    assert sample.temp == pytest.approx(31.0, abs=1.0 / imu.TEMP_SCALE)
+
+
+def test_decode_matches_register_values():
+    bus = imu.FakeBus()
+    sensor = imu.MPU6050(bus=bus)
+    bus.set_sample(accel_g=(0.1, 0.2, 0.9), gyro_dps=(-5.0, 0.0, 5.0), temp_c=40.0)
+    raw = bytes(bus.registers[imu.ACCEL_XOUT_H:imu.ACCEL_XOUT_H + imu.SAMPLE_BYTES])
+
+    values = imu.decode(raw * 3, sensor.accel_scale, sensor.gyro_scale)
+
+    assert values.shape == (3, 7)
+    np.testing.assert_allclose(values[1], sensor.read_array(), rtol=0, atol=0)
+    np.testing.assert_allclose(values[0], [0.1, 0.2, 0.9, 40.0, -5.0, 0.0, 5.0], atol=0.01)
+
+
+def test_old_dict_api_is_one_burst_per_call():
+    bus = imu.FakeBus()
+    sensor = imu.MPU6050(bus=bus)
+    bus.set_sample(accel_g=(0.0, 0.0, 1.0))
+    bus.transactions = 0
+    accel, gyro, temp = sensor.get_all_data()
+    assert bus.transactions == 1
+    assert accel["z"] == pytest.approx(imu.GRAVITY_MS2, rel=1e-3)
+    assert gyro == {"x": 0.0, "y": 0.0, "z": 0.0}
+
+
+# ---------------- FIFO streaming ----------------
+class FakeClock:
+    def __init__(self, t=100.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def ramp(t):
+    """FakeBus signal whose gyro z encodes the sample time"""
+    return (0.0, 0.0, 1.0), (0.0, 0.0, (t % 10.0) * 20.0), 25.0
+
+
+@pytest.fixture
+def fifo():
+    clock = FakeClock()
+    bus = imu.FakeBus(signal=ramp, clock=clock)
+    sensor = imu.MPU6050(bus=bus)
+    # No background drains during the test, drain() is called directly
+    stream = imu.ImuStream(sensor, rate_hz=200, drain_interval=3600, clock=clock).start()
+    yield clock, bus, stream
+    stream.stop()
+
+
+def test_drain_returns_timestamped_block(fifo):
+    clock, bus, stream = fifo
+    clock.t += 0.1
+    block = stream.drain()
+
+    assert len(block.timestamps) == 20
+    np.testing.assert_allclose(np.diff(block.timestamps), 1.0 / stream.rate_hz)
+    assert block.timestamps[-1] == clock.t
+    np.testing.assert_allclose(block.accel[:, 2], 1.0, atol=1e-3)
+    # Records come out oldest first
+    assert np.all(np.diff(block.gyro[:, 2]) > 0)
+    assert stream.drain() is None
+
+
+def test_drain_leaves_partial_record_for_next_drain(fifo):
+    clock, bus, stream = fifo
+    record = bus.encode(gyro_dps=(0.0, 0.0, 50.0))
+    bus.fifo += record * 3 + record[:6]
+
+    block = stream.drain()
+    assert len(block.timestamps) == 3
+    assert bytes(bus.fifo) == record[:6]
+
+    # The chip finishes writing the record; the stream is still aligned
+    bus.fifo += record[6:] + record
+    block = stream.drain()
+    assert len(block.timestamps) == 2
+    np.testing.assert_allclose(block.gyro[:, 2], 50.0, atol=0.01)
+    assert stream.samples == 5
+    assert stream.overflows == 0
+
+
+def test_drain_resets_fifo_after_overflow(fifo):
+    clock, bus, stream = fifo
+    # 2 s at 200 Hz is far more than the 73 records the 1 KiB FIFO holds
+    clock.t += 2.0
+    assert len(bus.fifo) <= imu.FIFO_SIZE
+
+    assert stream.drain() is None
+    assert stream.overflows == 1
+    assert len(bus.fifo) == 0
+    assert stream.samples == 0
+
+    clock.t += 0.05
+    block = stream.drain()
+    assert len(block.timestamps) == 10
+    assert stream.overflows == 1
+
+
+def test_get_timeout_semantics(fifo):
+    clock, bus, stream = fifo
+    assert stream.get() is None
+    assert stream.get(timeout=0.01) is None
+    block = imu.ImuBlock(np.zeros(1), np.zeros((1, 3)), np.zeros((1, 3)), np.zeros(1))
+    stream.blocks.put(block)
+    assert stream.get(timeout=None) is block
+
+
+class FlakyBus(imu.FakeBus):
+    """FakeBus whose first INT_STATUS read after arming fails like an I2C glitch"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_next = False
+
+    def read_byte_data(self, address, register):
+        if register == imu.INT_STATUS and self.fail_next:
+            self.fail_next = False
+            raise OSError(121, "Remote I/O error")
+        return super().read_byte_data(address, register)
+
+
+def test_drain_thread_survives_bus_error():
+    bus = FlakyBus()
+    blocks = []
+    stream = imu.ImuStream(imu.MPU6050(bus=bus), rate_hz=200, drain_interval=0.02,
+                           on_block=blocks.append).start()
+    try:
+        bus.fail_next = True
+        deadline = time.monotonic() + 2.0
+        while (bus.fail_next or len(blocks) < 5) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        received = len(blocks)
+        time.sleep(0.1)
+        assert stream._thread.is_alive()
+        assert len(blocks) > received
+        assert stream.summary()["errors"] == 1
+    finally:
+        stream.stop()
@@ -0,0 +1,49 @@
+"""Vehicle state engine on the synthetic parked / idle / driving trace"""
+import pytest
+
+from drowsiness.motion import DRIVING, IDLE, PARKED, VehicleStateEngine, replay, synthetic_trace
+
+# synthetic_trace(): parked 0-20 s, idle 20-35 s, driving 35-75 s, idle 75-90 s, parked 90-110 s
+EXPECTED = [(PARKED, IDLE, 20.0), (IDLE, DRIVING, 35.0), (DRIVING, IDLE, 75.0), (IDLE, PARKED, 90.0)]
+
+
+def assert_transitions(transitions, engine):
+    assert [(old, new) for _, old, new in transitions] == [(old, new) for old, new, _ in EXPECTED]
+    for (t, old, new), (_, _, segment_start) in zip(transitions, EXPECTED):
+        # Reported after the RMS window fills and the new state's dwell time
+        latest = segment_start + 1.0 + engine.dwell_s[new] + 1.0
+        assert segment_start < t <= latest, (old, new, t)
+
+
+@pytest.mark.parametrize("gyro_bias", [(0.0, 0.0, 0.0), (3.0, -5.0, 7.0), (15.0, -20.0, 18.0)])
+def test_replay_transitions(gyro_bias):
+    engine, transitions = replay(synthetic_trace(gyro_bias=gyro_bias))
+    assert_transitions(transitions, engine)
+    assert engine.state == PARKED
+    assert engine.summary()["gyro_bias_dps"] == pytest.approx(list(gyro_bias), abs=0.1)
+
+
+def test_parked_with_gyro_bias_stays_parked():
+    trace = synthetic_trace(gyro_bias=(4.0, -3.0, 5.0))
+    parked = trace[trace[:, 0] < 20.0]
+    engine, transitions = replay(parked)
+    assert transitions == []
+    assert engine.last.gyro_rms < engine.turn_enter
+
+
+def test_turn_without_acceleration_counts_as_driving():
+    trace = synthetic_trace(gyro_bias=(4.0, -3.0, 5.0))
+    parked = trace[trace[:, 0] < 20.0].copy()
+    # A slow 10 deg/s yaw after the start-up calibration, accelerometer unchanged
+    parked[parked[:, 0] >= 10.0, 6] += 10.0
+    engine, transitions = replay(parked)
+    assert [(old, new) for _, old, new in transitions] == [(PARKED, DRIVING)]
+    assert 10.0 < transitions[0][0] <= 10.0 + engine.dwell_s[DRIVING] + 1.0
+
+
+def test_on_transition_callback_is_kept():
+    seen = []
+    engine = VehicleStateEngine(on_transition=lambda old, new, status: seen.append((old, new)))
+    engine, transitions = replay(synthetic_trace(), engine)
+    assert seen == [(old, new) for _, old, new in transitions]
+    assert engine.on_transition is not None
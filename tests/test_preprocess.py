@@ -0,0 +1,42 @@
+"""CropPreprocessor against the torchvision transforms it replaces"""
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+
+from drowsiness.preprocess import CropPreprocessor, _sample_crops, _torchvision_pipelines  # noqa: E402
+
+TOLERANCE = 0.03
+
+
+@pytest.fixture(scope="module")
+def crops():
+    return _sample_crops(20)
+
+
+@pytest.mark.parametrize("name", ["128", "96-84-norm"])
+def test_buffer_path_matches_torchvision(crops, name):
+    reference, fast = _torchvision_pipelines()[name]
+    buffer = torch.empty(fast.output_shape, dtype=torch.float32)
+    for crop in crops:
+        expected = reference(crop)
+        out = fast.preprocess_into(crop, buffer)
+        assert out is buffer
+        assert out.shape == expected.shape
+        assert float(torch.abs(expected - out).mean()) <= TOLERANCE
+
+
+def test_batch_rows_match_single_crops(crops):
+    fast = CropPreprocessor((96, 96), center_crop=84, mean=0.5, std=0.5, max_batch_size=2)
+    batch = fast.batch(crops[:5])
+    assert batch.shape == (5, 1, 84, 84)
+    for row, crop in enumerate(crops[:5]):
+        np.testing.assert_allclose(batch[row].numpy(), fast(crop).numpy(), atol=1e-6)
+
+
+def test_grayscale_input_skips_conversion():
+    gray = np.random.RandomState(0).randint(0, 256, (150, 120), dtype=np.uint8)
+    out = CropPreprocessor((128, 128))(gray)
+    assert out.shape == (1, 128, 128)
+    assert 0.0 <= float(out.min()) and float(out.max()) <= 1.0